@@ -104,28 +104,36 @@ else
 fi
 echo
 
-# Check Local Services
-print_color $CYAN "═══ Local Services (localhost) ═══"
-check_url "http://localhost:8080" "Dashboard"
-check_url "http://localhost:8080/health" "Dashboard Health"
-check_url "http://localhost:11434/api/tags" "Ollama API"
-check_url "http://localhost:8086" "Roundcube Webmail"
-check_url "http://localhost:5233" "Baikal Calendar"
-check_url "http://localhost:3000/health" "API Gateway"
-check_url "http://localhost:8000" "Windmill"
-
-# Check Public URLs
-print_color $CYAN "═══ Public URLs (acebuddy.quest) ═══"
-check_url "https://ai.acebuddy.quest" "AI Dashboard"
-check_url "https://mail.acebuddy.quest" "Email (Roundcube)"
-check_url "https://calendar.acebuddy.quest" "Calendar (Baikal)"
-check_url "https://files.acebuddy.quest" "Nextcloud"
-check_url "https://chat.acebuddy.quest" "Open WebUI"
-check_url "https://workflows.acebuddy.quest" "Windmill"
-check_url "https://tasks.acebuddy.quest" "Vikunja"
-check_url "https://search.acebuddy.quest" "SearXNG"
-check_url "https://status.acebuddy.quest" "Status Page"
-check_url "https://api.acebuddy.quest/health" "API Gateway"
+# Check endpoints: all at once with the Python prober when aiohttp is available, else one by one with curl
+PROBER="$(dirname "$0")/junk/matrix/bot/health_probe.py"
+if python3 -c "import aiohttp" >/dev/null 2>&1; then
+    print_color $CYAN "═══ Services (local and public) ═══"
+    python3 "$PROBER" --targets "$(dirname "$0")/health-targets.json" || true
+    echo
+else
+    # Check Local Services
+    print_color $CYAN "═══ Local Services (localhost) ═══"
+    check_url "http://localhost:8080" "Dashboard"
+    check_url "http://localhost:8080/health" "Dashboard Health"
+    check_url "http://localhost:11434/api/tags" "Ollama API"
+    check_url "http://localhost:8086" "Roundcube Webmail"
+    check_url "http://localhost:5233" "Baikal Calendar"
+    check_url "http://localhost:3000/health" "API Gateway"
+    check_url "http://localhost:8000" "Windmill"
+
+    # Check Public URLs
+    print_color $CYAN "═══ Public URLs (acebuddy.quest) ═══"
+    check_url "https://ai.acebuddy.quest" "AI Dashboard"
+    check_url "https://mail.acebuddy.quest" "Email (Roundcube)"
+    check_url "https://calendar.acebuddy.quest" "Calendar (Baikal)"
+    check_url "https://files.acebuddy.quest" "Nextcloud"
+    check_url "https://chat.acebuddy.quest" "Open WebUI"
+    check_url "https://workflows.acebuddy.quest" "Windmill"
+    check_url "https://tasks.acebuddy.quest" "Vikunja"
+    check_url "https://search.acebuddy.quest" "SearXNG"
+    check_url "https://status.acebuddy.quest" "Status Page"
+    check_url "https://api.acebuddy.quest/health" "API Gateway"
+fi
 
 # Check Docker Containers
 print_color $CYAN "═══ Docker Containers ═══"
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Matrix Agent Host Launcher
+Runs several agents in one process sharing a Matrix connection pool and sync stream,
+or as a Matrix appservice when APPSERVICE_AS_TOKEN is set
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import signal
+from pathlib import Path
+
+# Add the agents directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
+
+from agents.host import AGENT_TYPES, AgentHost, load_agent_class
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+def build_agent(name: str, store_root: str):
+    """Create an agent from AGENT_TYPES using <PREFIX>_USERNAME / <PREFIX>_PASSWORD"""
+    agent_class = load_agent_class(name)
+    prefix = AGENT_TYPES[name][2]
+
+    domain = os.getenv("MATRIX_DOMAIN", "localhost")
+    username = os.getenv(f"{prefix}_USERNAME", f"@{name}:{domain}")
+    password = os.getenv(f"{prefix}_PASSWORD")
+    if not password and not os.getenv("APPSERVICE_AS_TOKEN"):
+        raise ValueError(f"{prefix}_PASSWORD is not set")
+
+    store_path = os.path.join(store_root, name)
+    Path(store_path).mkdir(parents=True, exist_ok=True)
+
+    return agent_class(
+        homeserver_url=os.getenv("MATRIX_HOMESERVER_URL"),
+        username=username,
+        password=password or "",
+        store_path=store_path
+    )
+
+async def main():
+    """Main function"""
+    logger.info("🏠 Matrix Agent Host")
+    logger.info("===================")
+
+    if not os.getenv("MATRIX_HOMESERVER_URL"):
+        logger.error("Missing required environment variable: MATRIX_HOMESERVER_URL")
+        sys.exit(1)
+
+    names = [n.strip() for n in os.getenv("AGENT_HOST_AGENTS", "orchestrator,llm").split(',') if n.strip()]
+    unknown = [n for n in names if n not in AGENT_TYPES]
+    if unknown:
+        logger.error(f"Unknown agents {unknown}; available: {list(AGENT_TYPES)}")
+        sys.exit(1)
+
+    pool_size = int(os.getenv("AGENT_HOST_POOL_SIZE", "20"))
+    if os.getenv("APPSERVICE_AS_TOKEN"):
+        if not os.getenv("APPSERVICE_HS_TOKEN"):
+            logger.error("APPSERVICE_HS_TOKEN is required in appservice mode")
+            sys.exit(1)
+        # Only appservice mode needs the aiohttp web server
+        from agents.appservice import AppServiceHost
+        host = AppServiceHost(
+            homeserver_url=os.getenv("MATRIX_HOMESERVER_URL"),
+            as_token=os.getenv("APPSERVICE_AS_TOKEN"),
+            hs_token=os.getenv("APPSERVICE_HS_TOKEN"),
+            listen_port=int(os.getenv("APPSERVICE_PORT", "9000")),
+            pool_size=pool_size
+        )
+    else:
+        host = AgentHost(
+            sync_mode=os.getenv("AGENT_HOST_SYNC", "shared"),
+            pool_size=pool_size
+        )
+    store_root = os.getenv("BOT_STORE_DIR", "/app/store")
+    try:
+        for name in names:
+            host.add(build_agent(name, store_root))
+    except Exception as e:
+        logger.error(f"💥 Error creating agents: {e}")
+        sys.exit(1)
+
+    if not await host.start():
+        logger.error("❌ No agents could be started")
+        sys.exit(1)
+
+    sync_task = asyncio.create_task(host.run())
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, sync_task.cancel)
+
+    try:
+        await sync_task
+    except asyncio.CancelledError:
+        logger.info("⏹️ Received shutdown signal")
+    except Exception as e:
+        logger.error(f"💥 Unexpected error in sync loop: {e}")
+    finally:
+        await host.stop()
+
+    logger.info("✨ Agent host exited")
+
+if __name__ == "__main__":
+    asyncio.run(main())
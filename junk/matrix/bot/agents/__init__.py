@@ -7,29 +7,32 @@ Provides various specialized bot agents for the Matrix homelab system
 __version__ = "1.0.0"
 __author__ = "Homelab Bot System"
 
-# Import base classes
-from .base_agent import BaseMatrixAgent, AgentMessage, parse_mention, format_agent_response
+import importlib
+from typing import Any
 
-# Import agent implementations
-try:
-    from .orchestrator_agent import OrchestratorAgent
-except ImportError:
-    pass
+# Name -> submodule; nothing is imported until a name is first used, so
+# `from agents.llm_agent import LLMAgent` does not load every other agent
+_LAZY = {
+    'BaseMatrixAgent': 'base_agent',
+    'AgentMessage': 'base_agent',
+    'parse_mention': 'base_agent',
+    'format_agent_response': 'base_agent',
+    'OrchestratorAgent': 'orchestrator_agent',
+    'LLMAgent': 'llm_agent',
+    'SimpleOrchestratorAgent': 'simple_orchestrator',
+    'SimpleLLMAgent': 'simple_llm'
+}
 
-try:
-    from .llm_agent import LLMAgent
-except ImportError:
-    pass
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
 
-try:
-    from .simple_orchestrator import SimpleOrchestratorAgent
-except ImportError:
-    pass
-
-try:
-    from .simple_llm import SimpleLLMAgent
-except ImportError:
-    pass
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
 
 __all__ = [
     'BaseMatrixAgent',
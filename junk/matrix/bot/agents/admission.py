@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Admission control for the orchestrator
+Bounds in-flight work globally and per requester, queueing the rest with weighted fair queuing
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """Raised when a requester already has too many requests queued"""
+
+class AdmissionTicket:
+    """A single request waiting for, or holding, an execution slot"""
+
+    def __init__(self, requester: str, finish_tag: float, seq: int):
+        self.requester = requester
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.admitted = asyncio.Event()
+        self.released = False
+
+    def __lt__(self, other: "AdmissionTicket") -> bool:
+        return (self.finish_tag, self.seq) < (other.finish_tag, other.seq)
+
+class AdmissionController:
+    """
+    Weighted fair queuing across requesters
+
+    Each ticket gets a virtual finish tag of max(virtual_time, requester's
+    last tag) + cost / weight, so a requester that queues twenty chains
+    only gets its weighted share of slots while others are waiting.
+    """
+
+    def __init__(self,
+                 global_limit: int = 4,
+                 per_requester_limit: int = 2,
+                 max_queued_per_requester: int = 10,
+                 weights: Optional[Dict[str, float]] = None):
+        self.global_limit = global_limit
+        self.per_requester_limit = per_requester_limit
+        self.max_queued_per_requester = max_queued_per_requester
+        self.weights = weights or {}
+
+        self._queue: List[AdmissionTicket] = []  # sorted by finish tag
+        self._inflight: Dict[str, int] = {}
+        self._queued: Dict[str, int] = {}
+        self._last_tag: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self.total_inflight = 0
+
+    def submit(self, requester: str, cost: float = 1.0) -> AdmissionTicket:
+        """Queue a request and admit it immediately if a slot is free"""
+        if self._queued.get(requester, 0) >= self.max_queued_per_requester:
+            raise AdmissionRejected(
+                f"Too many queued requests ({self.max_queued_per_requester}); "
+                "wait for some to finish"
+            )
+
+        weight = self.weights.get(requester, 1.0)
+        start = max(self._virtual_time, self._last_tag.get(requester, 0.0))
+        ticket = AdmissionTicket(requester, start + cost / weight, next(self._seq))
+        self._last_tag[requester] = ticket.finish_tag
+
+        bisect.insort(self._queue, ticket)
+        self._queued[requester] = self._queued.get(requester, 0) + 1
+        self._dispatch()
+        return ticket
+
+    def position(self, ticket: AdmissionTicket) -> int:
+        """1-based queue position, or 0 once admitted"""
+        if ticket.admitted.is_set():
+            return 0
+        return bisect.bisect_left(self._queue, ticket) + 1
+
+    async def wait(self, ticket: AdmissionTicket):
+        await ticket.admitted.wait()
+
+    def release(self, ticket: AdmissionTicket):
+        """Free the ticket's slot, or withdraw it from the queue if never admitted"""
+        if ticket.released:
+            return
+        ticket.released = True
+
+        if ticket.admitted.is_set():
+            self._inflight[ticket.requester] -= 1
+            self.total_inflight -= 1
+        else:
+            index = bisect.bisect_left(self._queue, ticket)
+            if index < len(self._queue) and self._queue[index] is ticket:
+                del self._queue[index]
+                self._queued[ticket.requester] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admit queued tickets in finish-tag order while capacity allows"""
+        index = 0
+        while index < len(self._queue) and self.total_inflight < self.global_limit:
+            ticket = self._queue[index]
+            if self._inflight.get(ticket.requester, 0) >= self.per_requester_limit:
+                index += 1
+                continue
+
+            del self._queue[index]
+            self._queued[ticket.requester] -= 1
+            self._inflight[ticket.requester] = self._inflight.get(ticket.requester, 0) + 1
+            self.total_inflight += 1
+            self._virtual_time = max(self._virtual_time, ticket.finish_tag)
+            ticket.admitted.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "inflight": self.total_inflight,
+            "queued": len(self._queue),
+            "global_limit": self.global_limit,
+            "per_requester_limit": self.per_requester_limit
+        }
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse 'user=weight,user=weight' into a weight map"""
+    weights = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        requester, weight = item.rsplit('=', 1)
+        try:
+            weights[requester.strip()] = float(weight)
+        except ValueError:
+            logger.warning(f"Ignoring invalid requester weight: {item}")
+    return weights
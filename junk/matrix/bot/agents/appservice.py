@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Matrix Application Service transport for the agent fleet
+Receives pushed transactions for every agent user instead of running one /sync per agent
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import re
+import secrets
+import sys
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+import aiohttp
+from aiohttp import web
+from nio import AsyncClient, MatrixRoom, RoomMessageText
+
+from .base_agent import BaseMatrixAgent
+from .host import AgentHost
+from .transport import AgentTransport
+
+logger = logging.getLogger(__name__)
+
+def build_registration(as_id: str,
+                       url: str,
+                       domain: str,
+                       localparts: List[str],
+                       sender_localpart: str = "agent-host",
+                       as_token: Optional[str] = None,
+                       hs_token: Optional[str] = None) -> Dict[str, Any]:
+    """Registration for Synapse's app_service_config_files, claiming the agent users exclusively"""
+    users = "|".join(re.escape(localpart) for localpart in localparts + [sender_localpart])
+    return {
+        "id": as_id,
+        "url": url,
+        "as_token": as_token or secrets.token_hex(32),
+        "hs_token": hs_token or secrets.token_hex(32),
+        "sender_localpart": sender_localpart,
+        "rate_limited": False,
+        "namespaces": {
+            "users": [{"exclusive": True, "regex": f"@({users}):{re.escape(domain)}"}],
+            "aliases": [],
+            "rooms": []
+        }
+    }
+
+def render_registration(registration: Dict[str, Any]) -> str:
+    """Registration as YAML; JSON-quoted scalars keep regex escapes intact without PyYAML"""
+    lines = []
+    for key in ("id", "url", "as_token", "hs_token", "sender_localpart"):
+        lines.append(f"{key}: {json.dumps(registration[key])}")
+    lines.append(f"rate_limited: {'true' if registration['rate_limited'] else 'false'}")
+    lines.append("namespaces:")
+    for kind, entries in registration["namespaces"].items():
+        if not entries:
+            lines.append(f"  {kind}: []")
+            continue
+        lines.append(f"  {kind}:")
+        for entry in entries:
+            lines.append(f"    - exclusive: {'true' if entry['exclusive'] else 'false'}")
+            lines.append(f"      regex: {json.dumps(entry['regex'])}")
+    return "\n".join(lines) + "\n"
+
+class AppServiceTransport(AgentTransport):
+    """Client-server calls made with the appservice token, masquerading as one agent user"""
+
+    name = "appservice"
+
+    def __init__(self, appservice: "AppServiceHost", client: AsyncClient):
+        self.appservice = appservice
+        self.client = client
+        self.user_id = client.user
+
+    async def login(self, password: str) -> bool:
+        """Appservice users need no password; make sure the user exists"""
+        localpart = self.user_id.split(':')[0].lstrip('@')
+        status, body = await self.appservice.request(
+            "POST", "/_matrix/client/v3/register",
+            {"type": "m.login.application_service", "username": localpart}
+        )
+        if status != 200 and body.get("errcode") != "M_USER_IN_USE":
+            logger.error(f"Failed to register appservice user {self.user_id}: {body}")
+            return False
+        self.client.user_id = self.user_id
+        return True
+
+    async def join(self, room_id: str) -> bool:
+        status, body = await self.appservice.request(
+            "POST", f"/_matrix/client/v3/join/{quote(room_id, safe='')}", {}, user_id=self.user_id
+        )
+        if status != 200:
+            logger.error(f"Failed to join room {room_id} as {self.user_id}: {body}")
+            return False
+        return True
+
+    async def send_text(self, room_id: str, body: str, msg_type: str = "m.text") -> bool:
+        status, response = await self.appservice.request(
+            "PUT",
+            f"/_matrix/client/v3/rooms/{quote(room_id, safe='')}/send/m.room.message/{uuid.uuid4().hex}",
+            {"msgtype": msg_type, "body": body},
+            user_id=self.user_id
+        )
+        return status == 200 and "event_id" in response
+
+    async def upload(self, data: bytes, content_type: str, filename: str) -> Optional[str]:
+        status, response = await self.appservice.request(
+            "POST", "/_matrix/media/v3/upload", data=data, content_type=content_type,
+            params={"filename": filename}, user_id=self.user_id
+        )
+        if status != 200 or "content_uri" not in response:
+            logger.error(f"Upload of {filename} as {self.user_id} failed: {response}")
+            return None
+        return response["content_uri"]
+
+    async def download(self, uri: str) -> Optional[bytes]:
+        server, _, media_id = uri[len("mxc://"):].partition('/')
+        media = f"{quote(server, safe='')}/{quote(media_id, safe='')}"
+        # Authenticated media first; homeservers before Matrix 1.11 only serve the legacy path
+        for path in (f"/_matrix/client/v1/media/download/{media}", f"/_matrix/media/v3/download/{media}"):
+            status, data = await self.appservice.fetch(path, user_id=self.user_id)
+            if status == 200:
+                return data
+        logger.error(f"Download of {uri} as {self.user_id} failed: HTTP {status}")
+        return None
+
+class AppServiceHost(AgentHost):
+    """
+    Agent host driven by homeserver pushes instead of /sync
+
+    Synapse PUTs transactions of events for every user in the registration
+    namespace to /_matrix/app/v1/transactions/{txnId}. Each event is routed
+    to the inboxes of the hosted agents in that room; sends, joins and
+    registration use the as_token with ?user_id= masquerading. Transaction
+    ids are remembered so homeserver retries are not delivered twice.
+    """
+
+    def __init__(self,
+                 homeserver_url: str,
+                 as_token: str,
+                 hs_token: str,
+                 listen_host: str = "0.0.0.0",
+                 listen_port: int = 9000,
+                 pool_size: int = 20,
+                 txn_cache_size: int = 1000):
+        super().__init__(sync_mode="shared", pool_size=pool_size)
+        self.homeserver_url = homeserver_url.rstrip('/')
+        self.as_token = as_token
+        self.hs_token = hs_token
+        self.listen_host = listen_host
+        self.listen_port = listen_port
+
+        self.rooms: Dict[str, MatrixRoom] = {}
+        self._seen_txns: "OrderedDict[str, None]" = OrderedDict()
+        self.txn_cache_size = txn_cache_size
+        self._runner: Optional[web.AppRunner] = None
+        self._joins: Set[asyncio.Task] = set()  # accepting invites pushed by the homeserver
+        self.transactions = 0
+
+    def add(self, agent: BaseMatrixAgent):
+        agent.transport = AppServiceTransport(self, agent.client)
+        super().add(agent)
+
+    async def start(self) -> bool:
+        if not await self._connect_agents():
+            return False
+
+        self._open_inboxes(self.agents)
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen_host, self.listen_port).start()
+        logger.info(f"Appservice listening on {self.listen_host}:{self.listen_port} "
+                    f"for {', '.join(a.agent_id for a in self.agents)}")
+        return True
+
+    async def run(self):
+        """Transactions arrive over HTTP; just wait until cancelled"""
+        await asyncio.Event().wait()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        for task in list(self._joins):
+            task.cancel()
+        await super().stop()
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        for prefix in ("/_matrix/app/v1", ""):  # bare paths for pre-1.0 homeservers
+            app.router.add_put(f"{prefix}/transactions/{{txn_id}}", self._on_transaction)
+            app.router.add_get(f"{prefix}/users/{{user_id}}", self._on_user_query)
+            app.router.add_get(f"{prefix}/rooms/{{alias}}", self._on_room_query)
+        return app
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                      user_id: Optional[str] = None, data: Optional[bytes] = None,
+                      content_type: Optional[str] = None,
+                      params: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, Any]]:
+        """Call the client-server API with the appservice token; `data` sends raw bytes instead of JSON"""
+        params = dict(params or {}, **({"user_id": user_id} if user_id else {}))
+        headers = {"Authorization": f"Bearer {self.as_token}"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        try:
+            async with self.session.request(
+                method, f"{self.homeserver_url}{path}", json=body if data is None else None, data=data,
+                params=params or None, headers=headers
+            ) as response:
+                try:
+                    payload = await response.json(content_type=None)
+                except ValueError:
+                    payload = {}
+                return response.status, payload or {}
+        except aiohttp.ClientError as e:
+            logger.error(f"Appservice request {method} {path} failed: {e}")
+            return 0, {"error": str(e)}
+
+    async def fetch(self, path: str, user_id: Optional[str] = None) -> Tuple[int, bytes]:
+        """GET raw bytes (e.g. media) with the appservice token"""
+        try:
+            async with self.session.get(
+                f"{self.homeserver_url}{path}", params={"user_id": user_id} if user_id else None,
+                headers={"Authorization": f"Bearer {self.as_token}"}
+            ) as response:
+                return response.status, await response.read()
+        except aiohttp.ClientError as e:
+            logger.error(f"Appservice fetch {path} failed: {e}")
+            return 0, b""
+
+    def _authorized(self, request: web.Request) -> bool:
+        token = request.headers.get("Authorization", "")
+        token = token[len("Bearer "):] if token.startswith("Bearer ") else request.query.get("access_token", "")
+        return hmac.compare_digest(token, self.hs_token)
+
+    async def _on_transaction(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return web.json_response({"errcode": "M_FORBIDDEN"}, status=403)
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"errcode": "M_NOT_JSON"}, status=400)
+
+        await self.handle_transaction(request.match_info["txn_id"], body.get("events", []))
+        return web.json_response({})
+
+    async def _on_user_query(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return web.json_response({"errcode": "M_FORBIDDEN"}, status=403)
+        user_id = request.match_info["user_id"]
+        if any(agent.client.user == user_id for agent in self.agents):
+            return web.json_response({})
+        return web.json_response({"errcode": "M_NOT_FOUND"}, status=404)
+
+    async def _on_room_query(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return web.json_response({"errcode": "M_FORBIDDEN"}, status=403)
+        return web.json_response({"errcode": "M_NOT_FOUND"}, status=404)
+
+    async def handle_transaction(self, txn_id: str, events: List[Dict[str, Any]]) -> bool:
+        """Route one pushed transaction; returns False if it was a retry already handled"""
+        if txn_id in self._seen_txns:
+            self._seen_txns.move_to_end(txn_id)
+            return False
+        self._seen_txns[txn_id] = None
+        if len(self._seen_txns) > self.txn_cache_size:
+            self._seen_txns.popitem(last=False)
+
+        self.transactions += 1
+        for raw in events:
+            try:
+                self._handle_event(raw)
+            except Exception as e:
+                logger.error(f"Error routing appservice event {raw.get('event_id')}: {e}")
+        return True
+
+    def _handle_event(self, raw: Dict[str, Any]):
+        room_id = raw.get("room_id")
+        if not room_id:
+            return
+
+        if raw.get("type") == "m.room.member":
+            self._track_membership(room_id, raw)
+            return
+        if raw.get("type") != "m.room.message" or raw.get("content", {}).get("msgtype") not in ("m.text", "m.notice"):
+            return
+
+        event = RoomMessageText.from_dict(raw)
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = MatrixRoom(room_id, self.agents[0].client.user)
+        for agent in self.agents:
+            if room_id in agent.joined_rooms and event.sender != agent.client.user:
+                self._route(agent, room, event)
+
+    def _track_membership(self, room_id: str, raw: Dict[str, Any]):
+        """Keep joined_rooms in step with joins, kicks and leaves pushed by the homeserver"""
+        membership = raw.get("content", {}).get("membership")
+        for agent in self.agents:
+            if agent.client.user != raw.get("state_key"):
+                continue
+            if membership == "join":
+                agent.joined_rooms.add(room_id)
+            elif membership in ("leave", "ban"):
+                agent.joined_rooms.discard(room_id)
+            elif membership == "invite":
+                task = asyncio.create_task(agent.join_room(room_id))
+                self._joins.add(task)
+                task.add_done_callback(self._joins.discard)
+
+def main():
+    """Generate an appservice registration for the agent users"""
+    parser = argparse.ArgumentParser(description="Generate a Matrix appservice registration for the agent host")
+    parser.add_argument("output", help="Where to write the registration YAML")
+    parser.add_argument("--url", required=True, help="URL the homeserver pushes transactions to, e.g. http://matrix-agents:9000")
+    parser.add_argument("--domain", required=True, help="Homeserver domain of the agent users")
+    parser.add_argument("--agents", default="orchestrator,llm", help="Comma-separated agent localparts")
+    parser.add_argument("--id", default="homelab-agents", help="Appservice id")
+    args = parser.parse_args()
+
+    registration = build_registration(
+        args.id, args.url, args.domain,
+        [name.strip() for name in args.agents.split(',') if name.strip()]
+    )
+    with open(args.output, "w") as f:
+        f.write(render_registration(registration))
+
+    print(f"✅ Wrote {args.output}; add it to app_service_config_files in homeserver.yaml")
+    print(f"APPSERVICE_AS_TOKEN={registration['as_token']}")
+    print(f"APPSERVICE_HS_TOKEN={registration['hs_token']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
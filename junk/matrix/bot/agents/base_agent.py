@@ -8,6 +8,7 @@ import asyncio
 import logging
 import json
 import os
+import time
 from typing import Dict, List, Optional, Any, Callable
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
@@ -18,12 +19,17 @@ from nio import (
     AsyncClient,
     MatrixRoom,
     RoomMessageText,
-    LoginResponse,
-    JoinResponse,
     Event,
     Response
 )
 
+from .blobstore import BLOB_KEY, PayloadOffloader, offloader_from_env
+from .dedup import EventDeduplicator
+from .metrics import registry as metrics_registry, start_metrics_server
+from .recorder import EventRecorder
+from .tracing import SpanContext, current_span, extract, inject, tracer
+from .transport import AgentTransport, LocalAgentBus, MatrixTransport, default_bus
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -66,13 +72,17 @@ class AgentMessage:
 class BaseMatrixAgent(ABC):
     """Base class for all Matrix-based agents in the multi-agent system"""
 
+    # Leading words of user commands, used to label handler metrics
+    user_commands: tuple = ("help",)
+
     def __init__(self,
                  homeserver_url: str,
                  username: str,
                  password: str,
                  display_name: str,
                  capabilities: List[str],
-                 store_path: Optional[str] = None):
+                 store_path: Optional[str] = None,
+                 bus: Optional[LocalAgentBus] = None):
 
         self.homeserver_url = homeserver_url
         self.username = username
@@ -89,6 +99,14 @@ class BaseMatrixAgent(ABC):
         self.message_handlers = {}
         self.pending_responses = {}
 
+        # Heartbeat keeps the orchestrator's liveness index fresh
+        self.heartbeat_interval = float(os.getenv("AGENT_HEARTBEAT_INTERVAL", "60"))
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+        # Handlers for routed requests run as tasks so they can be cancelled
+        self._inflight_tasks: Dict[str, asyncio.Task] = {}  # request_id -> task
+        self.register_message_handler("task_cancel", self._handle_task_cancel)
+
         # Matrix client
         self.client = AsyncClient(
             homeserver=homeserver_url,
@@ -99,19 +117,75 @@ class BaseMatrixAgent(ABC):
         # Register event callbacks
         self.client.add_event_callback(self._on_message, RoomMessageText)
 
+        # Drop replayed history and events already handled, across restarts
+        self.dedup = EventDeduplicator(
+            capacity=int(os.getenv("AGENT_DEDUP_CAPACITY", "4096")),
+            state_path=os.path.join(self.store_path, f"{self.agent_id}_events.json"),
+            max_catchup_seconds=float(os.getenv("AGENT_CATCHUP_SECONDS", "300"))
+        )
+
+        # Handler, queue and send timings, shared by all agents in the process
+        self.metrics = metrics_registry
+        self._handler_seconds = self.metrics.histogram(
+            "agent_handler_seconds", "Time spent in message and command handlers")
+        self._handler_errors = self.metrics.counter(
+            "agent_handler_errors_total", "Handler invocations that raised")
+        self._queue_wait_seconds = self.metrics.histogram(
+            "agent_queue_wait_seconds", "Delay between receiving a message and its handler starting")
+        self._send_seconds = self.metrics.histogram(
+            "agent_send_seconds", "Time for the transport to accept an outgoing message")
+        self._messages_total = self.metrics.counter(
+            "agent_messages_total", "Agent messages sent and received")
+        self._payload_bytes = self.metrics.counter(
+            "agent_payload_offload_bytes_total", "Message content moved through the blob store")
+
+        # Spans are exported only when TRACE_EXPORT_PATH is set
+        self.tracer = tracer
+
+        # Inbound traffic capture for offline replay, when AGENT_RECORD_PATH is set
+        self.recorder = EventRecorder.from_env(self.agent_id, username)
+
+        # Set when an AgentHost lends this agent its HTTP connection pool
+        self._shared_session = False
+
+        # Targeted messages to agents in this process skip the homeserver;
+        # Matrix carries cross-host traffic and, optionally, an audit trail
+        self.transport: AgentTransport = MatrixTransport(self.client)
+        self.bus = bus or default_bus
+        self.audit_local_messages = os.getenv("AGENT_BUS_AUDIT", "false").lower() == "true"
+
+        # Large content sent over Matrix goes to a blob store (AGENT_BLOB_STORE)
+        self.payloads: Optional[PayloadOffloader] = offloader_from_env(self)
+
         logger.info(f"Initialized agent {self.agent_id} with capabilities: {capabilities}")
 
     async def start(self) -> bool:
-        """Start the agent - login and join required rooms"""
+        """Start the agent - login, join required rooms and sync until stopped"""
+        if not await self.connect():
+            return False
+
+        try:
+            await self._start_sync()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start agent {self.agent_id}: {e}")
+            return False
+
+    async def connect(self) -> bool:
+        """Login, join the coordination room and announce, without syncing"""
         try:
             # Login
-            response = await self.client.login(self.password)
-            if not isinstance(response, LoginResponse):
-                logger.error(f"Failed to login agent {self.agent_id}: {response}")
+            if not await self.transport.login(self.password):
+                logger.error(f"Failed to login agent {self.agent_id}")
                 return False
 
             logger.info(f"Agent {self.agent_id} logged in successfully")
             self.status = "online"
+            self.bus.register(self)
+
+            metrics_port = int(os.getenv("AGENT_METRICS_PORT", "0"))
+            if metrics_port:
+                await start_metrics_server(metrics_port)
 
             # Join coordination room if specified
             coordination_room_id = os.getenv("COORDINATION_ROOM_ID")
@@ -122,9 +196,9 @@ class BaseMatrixAgent(ABC):
             # Register agent in coordination room
             if self.coordination_room:
                 await self._announce_presence()
+                if self.heartbeat_interval > 0:
+                    self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
-            # Start sync
-            await self._start_sync()
             return True
 
         except Exception as e:
@@ -134,27 +208,41 @@ class BaseMatrixAgent(ABC):
     async def stop(self):
         """Stop the agent gracefully"""
         try:
+            if self._heartbeat_task:
+                self._heartbeat_task.cancel()
+                self._heartbeat_task = None
+
+            self.bus.unregister(self)
+            self.dedup.save()
+            if self.recorder:
+                self.recorder.close()
             if self.coordination_room:
                 await self._announce_departure()
 
-            await self.client.close()
+            if self._shared_session:
+                # The host owns the pool and closes it once every agent is down
+                self.client.client_session = None
+            else:
+                await self.client.close()
             self.status = "offline"
             logger.info(f"Agent {self.agent_id} stopped")
 
         except Exception as e:
             logger.error(f"Error stopping agent {self.agent_id}: {e}")
 
+    def attach_session(self, session):
+        """Use a shared aiohttp session instead of a private connection pool"""
+        self.client.client_session = session
+        self._shared_session = True
+
     async def join_room(self, room_id: str) -> bool:
         """Join a Matrix room"""
         try:
-            response = await self.client.join(room_id)
-            if isinstance(response, JoinResponse):
-                self.joined_rooms.add(room_id)
-                logger.info(f"Agent {self.agent_id} joined room {room_id}")
-                return True
-            else:
-                logger.error(f"Failed to join room {room_id}: {response}")
+            if not await self.transport.join(room_id):
                 return False
+            self.joined_rooms.add(room_id)
+            logger.info(f"Agent {self.agent_id} joined room {room_id}")
+            return True
         except Exception as e:
             logger.error(f"Error joining room {room_id}: {e}")
             return False
@@ -162,19 +250,11 @@ class BaseMatrixAgent(ABC):
     async def send_message(self, room_id: str, content: str, msg_type: str = "m.text") -> bool:
         """Send a message to a Matrix room"""
         try:
-            message_content = {
-                "msgtype": msg_type,
-                "body": content
-            }
-
-            response = await self.client.room_send(
-                room_id=room_id,
-                message_type="m.room.message",
-                content=message_content,
-                ignore_unverified_devices=True
-            )
-
-            return hasattr(response, 'event_id')
+            started = time.monotonic()
+            success = await self.transport.send_text(room_id, content, msg_type)
+            self._send_seconds.observe(time.monotonic() - started,
+                                       agent=self.agent_id, transport=self.transport.name)
+            return success
 
         except Exception as e:
             logger.error(f"Error sending message to {room_id}: {e}")
@@ -195,7 +275,7 @@ class BaseMatrixAgent(ABC):
             target=target_agent,
             message_type=message_type,
             content=content,
-            context=context or {},
+            context=dict(context) if context else {},
             timestamp=datetime.now()
         )
 
@@ -205,25 +285,84 @@ class BaseMatrixAgent(ABC):
             logger.error("No room specified and no coordination room available")
             return None
 
-        # Format message for Matrix
-        formatted_content = f"@{target_agent}: {json.dumps(agent_msg.to_dict())}"
+        # Within a trace, the receiver's spans become children of this send
+        with self.tracer.span(f"send {message_type}", self.agent_id, child_only=True,
+                              target=target_agent) as span:
+            inject(agent_msg.context, span)
+            return await self._deliver(agent_msg, target_room)
+
+    async def _deliver(self, agent_msg: AgentMessage, target_room: str) -> Optional[str]:
+        span = current_span()
+
+        # Co-located agent: deliver in memory
+        if agent_msg.target != self.agent_id and self.bus.deliver(agent_msg, target_room):
+            logger.debug(f"Delivered message {agent_msg.id} to local agent {agent_msg.target}")
+            self._messages_total.inc(agent=self.agent_id, direction="out", path="bus")
+            if span:
+                span.set("path", "bus")
+            if self.audit_local_messages:
+                asyncio.create_task(self._audit_local_message(agent_msg, target_room))
+            return agent_msg.id
+
+        # Format message for Matrix, moving large content out of the event
+        message = agent_msg.to_dict()
+        if self.payloads:
+            message["content"] = await self.payloads.offload(agent_msg.content)
+            if message["content"] is not agent_msg.content:
+                self._payload_bytes.inc(message["content"][BLOB_KEY]["size"], agent=self.agent_id, op="offload")
+        formatted_content = f"@{agent_msg.target}: {json.dumps(message)}"
 
         success = await self.send_message(target_room, formatted_content)
+        if span:
+            span.set("path", self.transport.name)
         if success:
-            logger.debug(f"Sent message {agent_msg.id} to agent {target_agent}")
+            logger.debug(f"Sent message {agent_msg.id} to agent {agent_msg.target}")
+            self._messages_total.inc(agent=self.agent_id, direction="out", path=self.transport.name)
             return agent_msg.id
         return None
 
+    async def _audit_local_message(self, agent_msg: AgentMessage, room_id: str):
+        """Mirror a locally delivered message to Matrix as plain text (not re-parsed as agent JSON)"""
+        request_id = agent_msg.context.get("request_id")
+        suffix = f" (request {request_id[:8]})" if request_id else ""
+        await self.send_message(
+            room_id,
+            f"🔁 {agent_msg.sender} → {agent_msg.target}: {agent_msg.message_type}{suffix}",
+            msg_type="m.notice"
+        )
+
     async def reply_to_agent(self,
                             original_msg: AgentMessage,
                             response_content: Any,
                             room_id: Optional[str] = None) -> Optional[str]:
         """Reply to an agent message"""
+        context = {"reply_to": original_msg.id}
+        if original_msg.context.get("request_id"):
+            context["request_id"] = original_msg.context["request_id"]
+
         return await self.send_to_agent(
             target_agent=original_msg.sender,
             message_type=f"{original_msg.message_type}_response",
             content=response_content,
-            context={"reply_to": original_msg.id},
+            context=context,
+            room_id=room_id
+        )
+
+    async def stream_to_agent(self,
+                              original_msg: AgentMessage,
+                              seq: int,
+                              chunk_content: Any,
+                              room_id: Optional[str] = None) -> Optional[str]:
+        """Send a partial result for an agent message ahead of the final reply"""
+        context = {"reply_to": original_msg.id, "seq": seq}
+        if original_msg.context.get("request_id"):
+            context["request_id"] = original_msg.context["request_id"]
+
+        return await self.send_to_agent(
+            target_agent=original_msg.sender,
+            message_type=f"{original_msg.message_type}_chunk",
+            content=chunk_content,
+            context=context,
             room_id=room_id
         )
 
@@ -258,9 +397,14 @@ class BaseMatrixAgent(ABC):
 
     async def _on_message(self, room: MatrixRoom, event: RoomMessageText):
         """Handle incoming Matrix messages"""
+        if self.recorder:
+            self.recorder.record(room.room_id, event)
+
         # Ignore own messages
         if event.sender == self.client.user_id:
             return
+        if not self.dedup.should_process(event.event_id, event.server_timestamp):
+            return
 
         try:
             # Check if this is an agent message
@@ -309,25 +453,134 @@ class BaseMatrixAgent(ABC):
             msg_data = json.loads(json_part)
             agent_msg = AgentMessage.from_dict(msg_data)
 
+            # Only the target fetches offloaded content
+            if self.payloads and PayloadOffloader.is_reference(agent_msg.content):
+                try:
+                    agent_msg.content = await self.payloads.resolve(agent_msg.content)
+                except ValueError as e:
+                    await self._report_unresolved_payload(agent_msg, room, e)
+                    return
+                self._payload_bytes.inc(msg_data["content"][BLOB_KEY]["size"], agent=self.agent_id, op="fetch")
+
             logger.debug(f"Received agent message {agent_msg.id} from {agent_msg.sender}")
+            await self._dispatch_agent_message(agent_msg, room, path=self.transport.name,
+                                               server_ts=event.server_timestamp / 1000)
+
+        except Exception as e:
+            logger.error(f"Error handling agent message: {e}")
+
+    async def _report_unresolved_payload(self, agent_msg: AgentMessage, room: MatrixRoom, error: Exception):
+        """Tell the sender its request failed, rather than leaving it to time out"""
+        logger.error(f"Dropping agent message {agent_msg.id} from {agent_msg.sender}: {error}")
+        if agent_msg.target == "*" or not self._is_cancellable(agent_msg):
+            return
+        await self.reply_to_agent(agent_msg, {"status": "failed", "error": str(error)}, room.room_id)
+
+    async def _dispatch_agent_message(self, agent_msg: AgentMessage, room: MatrixRoom,
+                                      path: str = "bus", server_ts: Optional[float] = None):
+        """Run the handler for an agent message, whichever transport it arrived on"""
+        self._messages_total.inc(agent=self.agent_id, direction="in", path=path)
 
-            # Handle based on message type
+        # Delivery delay: homeserver timestamp (or bus send time) until now
+        parent = extract(agent_msg.context)
+        if parent:
+            sent_at = server_ts or agent_msg.context["trace"].get("sent_at") or time.time()
+            self.tracer.record(f"{path}.delivery", self.agent_id, sent_at, time.time(), parent)
+
+        try:
             if agent_msg.message_type in self.message_handlers:
-                await self.message_handlers[agent_msg.message_type](agent_msg, room)
+                handler = self.message_handlers[agent_msg.message_type]
+                request_id = agent_msg.context.get("request_id")
+                if request_id and self._is_cancellable(agent_msg):
+                    self._spawn_request_task(request_id, self._timed(
+                        "agent", agent_msg.message_type, handler(agent_msg, room),
+                        queued_at=time.monotonic(), parent=parent
+                    ))
+                else:
+                    await self._timed("agent", agent_msg.message_type, handler(agent_msg, room), parent=parent)
             else:
-                await self._handle_unknown_agent_message(agent_msg, room)
+                await self._timed("agent", "unknown", self._handle_unknown_agent_message(agent_msg, room),
+                                  parent=parent)
 
         except Exception as e:
             logger.error(f"Error handling agent message: {e}")
 
+    async def _timed(self, kind: str, name: str, coro, queued_at: Optional[float] = None,
+                     parent: Optional[SpanContext] = None):
+        """Await a handler, recording its latency, errors and (if queued) its wait to start"""
+        started = time.monotonic()
+        if queued_at is not None:
+            self.record_queue_wait("task", started - queued_at)
+            now = time.time()
+            self.tracer.record("queue_wait", self.agent_id, now - (started - queued_at), now, parent)
+
+        # Commands addressed to this agent start a trace; agent messages only join one
+        with self.tracer.span(f"handle {name}", self.agent_id, parent=parent,
+                              child_only=(kind != "user" or name == "unaddressed"), kind=kind):
+            try:
+                return await coro
+            except Exception:
+                self._handler_errors.inc(agent=self.agent_id, kind=kind, name=name)
+                raise
+            finally:
+                self._handler_seconds.observe(time.monotonic() - started,
+                                              agent=self.agent_id, kind=kind, name=name)
+
+    def record_queue_wait(self, queue: str, seconds: float):
+        self._queue_wait_seconds.observe(seconds, agent=self.agent_id, queue=queue)
+
+    def _command_label(self, body: str) -> str:
+        """Bounded metric label for a user message: a known command, other, or unaddressed"""
+        body = body.strip()
+        command = parse_mention(body, self.agent_id)
+        if command is None:
+            if not body.startswith(f"!{self.agent_id}"):
+                return "unaddressed"
+            command = body[len(self.agent_id) + 1:].strip()
+        command = command.lower()
+        return next((name for name in self.user_commands if command.startswith(name)), "other")
+
+    def _room_for(self, room_id: str) -> MatrixRoom:
+        """Room object for a locally delivered message"""
+        return self.client.rooms.get(room_id) or MatrixRoom(room_id, self.client.user_id or self.username)
+
+    def _is_cancellable(self, agent_msg: AgentMessage) -> bool:
+        """Routed requests run as tasks; responses, chunks and control messages run inline"""
+        return (agent_msg.message_type != "task_cancel"
+                and not agent_msg.message_type.endswith(("_response", "_chunk")))
+
+    def _spawn_request_task(self, request_id: str, coro) -> asyncio.Task:
+        """Run a request handler in the background, tracked by request_id"""
+        task = asyncio.create_task(coro)
+        self._inflight_tasks[request_id] = task
+
+        def _done(finished: asyncio.Task):
+            if self._inflight_tasks.get(request_id) is finished:
+                del self._inflight_tasks[request_id]
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _handle_task_cancel(self, agent_msg: AgentMessage, room: MatrixRoom):
+        """Cancel an in-flight request, e.g. the losing side of a hedged request"""
+        request_id = agent_msg.content.get("request_id")
+        task = self._inflight_tasks.get(request_id)
+        if task and not task.done():
+            task.cancel()
+            logger.info(f"Cancelled request {request_id} on behalf of {agent_msg.sender}")
+
     async def _handle_user_message(self, room: MatrixRoom, event: RoomMessageText):
         """Handle messages from human users - implement in subclasses"""
-        await self.process_user_message(room, event)
+        await self._timed("user", self._command_label(event.body), self.process_user_message(room, event))
 
     async def _handle_unknown_agent_message(self, agent_msg: AgentMessage, room: MatrixRoom):
         """Handle unknown agent message types"""
         logger.warning(f"Unknown message type {agent_msg.message_type} from {agent_msg.sender}")
 
+        # Answering broadcasts or replies would have two agents bounce errors forever
+        if agent_msg.target == "*" or not self._is_cancellable(agent_msg):
+            return
+
         await self.reply_to_agent(
             agent_msg,
             {"error": f"Unknown message type: {agent_msg.message_type}"},
@@ -346,6 +599,24 @@ class BaseMatrixAgent(ABC):
             }
         )
 
+    async def _heartbeat_loop(self):
+        """Periodically broadcast a heartbeat so peers know this agent is alive"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.broadcast_to_agents(
+                    "agent_heartbeat",
+                    {
+                        "agent_id": self.agent_id,
+                        "display_name": self.display_name,
+                        "capabilities": self.capabilities,
+                        "status": self.status,
+                        "interval": self.heartbeat_interval
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Heartbeat failed for agent {self.agent_id}: {e}")
+
     async def _announce_departure(self):
         """Announce agent going offline"""
         await self.broadcast_to_agents(
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Content-addressed offload of large inter-agent payloads
+Keeps multi-KB message content out of Matrix events, replacing it with a hash reference
+"""
+
+import hashlib
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from .base_agent import BaseMatrixAgent
+
+logger = logging.getLogger(__name__)
+
+# Message content of the form {"$blob": {"sha256": ..., "size": ..., "uri": ...}}
+BLOB_KEY = "$blob"
+
+class BlobStore(ABC):
+    """Where offloaded payloads live; data is addressed by its SHA-256"""
+
+    name = "base"
+
+    @abstractmethod
+    async def put(self, digest: str, data: bytes) -> Optional[str]:
+        """Store data, returning a URI receivers can fetch it from"""
+        pass
+
+    @abstractmethod
+    async def get(self, uri: str) -> Optional[bytes]:
+        """Data stored under a URI from put(), or None if it cannot be read"""
+        pass
+
+class MatrixMediaBlobStore(BlobStore):
+    """
+    Payloads in the homeserver's media repository
+
+    Uploads and downloads go through the agent's transport, looked up on
+    every call since an appservice host swaps it in after the agent is
+    created; appservice agents have no access token of their own.
+    """
+
+    name = "matrix"
+
+    def __init__(self, agent: "BaseMatrixAgent"):
+        self.agent = agent
+
+    async def put(self, digest: str, data: bytes) -> Optional[str]:
+        return await self.agent.transport.upload(data, "application/json", f"{digest}.json")
+
+    async def get(self, uri: str) -> Optional[bytes]:
+        return await self.agent.transport.download(uri)
+
+class LocalBlobStore(BlobStore):
+    """Payloads as files in a directory shared by the agents (e.g. a Docker volume)"""
+
+    name = "local"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    async def put(self, digest: str, data: bytes) -> Optional[str]:
+        path = self._path(digest)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            return f"local:{digest}"
+        except OSError as e:
+            logger.error(f"Blob write to {path} failed: {e}")
+            return None
+
+    async def get(self, uri: str) -> Optional[bytes]:
+        path = self._path(uri[len("local:"):])
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError as e:
+            logger.error(f"Blob read from {path} failed: {e}")
+            return None
+
+class PayloadOffloader:
+    """
+    Swaps content over `threshold` bytes of JSON for a blob reference and back
+
+    Identical payloads are stored once (the digest is the key) and fetched
+    once per receiver: fetched payloads are kept in an LRU cache bounded by
+    `cache_bytes`, and forwarding one re-sends the existing reference.
+    Since data is addressed by its hash, cached entries never go stale and
+    every fetch is verified.
+    """
+
+    def __init__(self, store: BlobStore, threshold: int = 16384, cache_bytes: int = 32 * 1024 * 1024):
+        self.store = store
+        self.threshold = threshold
+        self.cache_bytes = cache_bytes
+
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._stored: "OrderedDict[str, str]" = OrderedDict()  # digest -> uri
+
+        self.stats = {"offloaded": 0, "offloaded_bytes": 0, "fetched": 0, "fetched_bytes": 0, "cache_hits": 0}
+
+    @staticmethod
+    def is_reference(content: Any) -> bool:
+        return isinstance(content, dict) and len(content) == 1 and isinstance(content.get(BLOB_KEY), dict)
+
+    async def offload(self, content: Any) -> Any:
+        """Content to put on the wire: unchanged if small, else a blob reference"""
+        data = json.dumps(content, separators=(",", ":")).encode()
+        if len(data) <= self.threshold:
+            return content
+
+        digest = hashlib.sha256(data).hexdigest()
+        uri = self._stored.get(digest)
+        if uri is None:
+            try:
+                uri = await self.store.put(digest, data)
+            except Exception as e:
+                logger.error(f"Blob store {self.store.name} failed to store {digest[:12]}: {e}")
+                uri = None
+            if uri is None:
+                return content  # send inline and let the transport cope
+            self._remember(digest, uri)
+            self.stats["offloaded"] += 1
+            self.stats["offloaded_bytes"] += len(data)
+        return {BLOB_KEY: {"sha256": digest, "size": len(data), "uri": uri}}
+
+    async def resolve(self, content: Any) -> Any:
+        """Original content for a blob reference; raises ValueError if it cannot be fetched"""
+        if not self.is_reference(content):
+            return content
+
+        ref: Dict[str, Any] = content[BLOB_KEY]
+        digest = ref.get("sha256", "")
+        data = self._cache.get(digest)
+        if data is not None:
+            self._cache.move_to_end(digest)
+            self.stats["cache_hits"] += 1
+        else:
+            try:
+                data = await self.store.get(ref.get("uri", ""))
+            except Exception as e:
+                raise ValueError(f"Blob {digest[:12]} is unavailable: {e}") from e
+            if data is None:
+                raise ValueError(f"Blob {digest[:12]} is unavailable")
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise ValueError(f"Blob {digest[:12]} failed its hash check")
+            self.stats["fetched"] += 1
+            self.stats["fetched_bytes"] += len(data)
+            self._cache_put(digest, data)
+        # Forwarding the same payload (e.g. a workflow step output) reuses the blob
+        self._remember(digest, ref.get("uri", ""))
+        return json.loads(data)
+
+    def _remember(self, digest: str, uri: str):
+        self._stored[digest] = uri
+        self._stored.move_to_end(digest)
+        if len(self._stored) > 1024:
+            self._stored.popitem(last=False)
+
+    def _cache_put(self, digest: str, data: bytes):
+        if digest in self._cache or len(data) > self.cache_bytes:
+            return
+        self._cache[digest] = data
+        self._cached_bytes += len(data)
+        while self._cached_bytes > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+def offloader_from_env(agent: "BaseMatrixAgent") -> Optional[PayloadOffloader]:
+    """AGENT_BLOB_STORE: 'matrix' (default), a shared directory path, or 'off'"""
+    setting = os.getenv("AGENT_BLOB_STORE", "matrix")
+    if setting.lower() in ("off", "none", "false"):
+        return None
+    store = MatrixMediaBlobStore(agent) if setting.lower() == "matrix" else LocalBlobStore(setting)
+    return PayloadOffloader(
+        store,
+        threshold=int(os.getenv("AGENT_BLOB_THRESHOLD", "16384")),
+        cache_bytes=int(os.getenv("AGENT_BLOB_CACHE_MB", "32")) * 1024 * 1024
+    )
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Circuit breakers for orchestrator routing
+Stops sending work to agents whose backend is failing and probes them before trusting them again
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Error-rate and timeout driven breaker for one (agent, capability) route
+
+    closed    - requests flow, outcomes are recorded in a rolling window
+    open      - requests fail fast until the cool-down elapses
+    half_open - a limited number of probe requests decide whether to close
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 name: str,
+                 window: int = 20,
+                 min_requests: int = 5,
+                 error_rate: float = 0.5,
+                 consecutive_timeouts: int = 2,
+                 open_seconds: float = 30.0,
+                 max_open_seconds: float = 300.0,
+                 half_open_probes: int = 1):
+        self.name = name
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.consecutive_timeouts = consecutive_timeouts
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = failure
+        self._failures = 0
+        self._timeouts_in_row = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._open_seconds = open_seconds
+        self._probes_inflight = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() >= self._opened_at + self._open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_inflight = 0
+            logger.info(f"Circuit {self.name} half-open, probing")
+        return self._state
+
+    def available(self) -> bool:
+        """Whether a request could be sent now, without reserving a probe slot"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        return state == self.HALF_OPEN and self._probes_inflight < self.half_open_probes
+
+    def try_acquire(self) -> bool:
+        """Reserve permission to send one request"""
+        if not self.available():
+            return False
+        if self._state == self.HALF_OPEN:
+            self._probes_inflight += 1
+        return True
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker starts probing again"""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._open_seconds - time.monotonic())
+
+    def record_success(self):
+        if self._state == self.HALF_OPEN:
+            logger.info(f"Circuit {self.name} closed after successful probe")
+            self._state = self.CLOSED
+            self._open_seconds = self.base_open_seconds
+            self._outcomes.clear()
+            self._failures = 0
+        self._timeouts_in_row = 0
+        self._record(False)
+
+    def record_failure(self, timeout: bool = False):
+        if self._state == self.HALF_OPEN:
+            # Failed probe: back off harder before the next one
+            self._trip(min(self.max_open_seconds, self._open_seconds * 2))
+            return
+
+        self._timeouts_in_row = self._timeouts_in_row + 1 if timeout else 0
+        self._record(True)
+
+        if self._state != self.CLOSED:
+            return
+        if self._timeouts_in_row >= self.consecutive_timeouts:
+            self._trip(self.base_open_seconds)
+        elif (len(self._outcomes) >= self.min_requests
+              and self._failures / len(self._outcomes) >= self.error_rate):
+            self._trip(self.base_open_seconds)
+
+    def record_abandoned(self):
+        """Release a probe slot for a request that was cancelled before finishing"""
+        if self._state == self.HALF_OPEN and self._probes_inflight > 0:
+            self._probes_inflight -= 1
+
+    def _record(self, failed: bool):
+        if len(self._outcomes) == self._outcomes.maxlen and self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(failed)
+        if failed:
+            self._failures += 1
+
+    def _trip(self, open_seconds: float):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._open_seconds = open_seconds
+        self._timeouts_in_row = 0
+        self.trips += 1
+        logger.warning(f"Circuit {self.name} opened for {open_seconds:.0f}s")
+
+class BreakerRegistry:
+    """Lazily created breakers keyed by (agent_id, capability)"""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, agent_id: str, capability: str = "*") -> CircuitBreaker:
+        key = (agent_id, capability)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                f"{agent_id}/{capability}", **self.breaker_options
+            )
+        return breaker
+
+    def available(self, agent_id: str, capability: str = "*") -> bool:
+        breaker = self._breakers.get((agent_id, capability))
+        return breaker is None or breaker.available()
+
+    def unhealthy(self) -> List[CircuitBreaker]:
+        """Breakers that are currently open or half-open"""
+        return [b for b in self._breakers.values() if b.state != CircuitBreaker.CLOSED]
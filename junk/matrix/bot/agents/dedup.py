@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Event deduplication for Matrix bots and agents
+Constant-memory guard so no handler runs twice for the same event, even across restarts
+"""
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class EventDeduplicator:
+    """
+    Fixed-size LRU of recent event ids plus a server_timestamp cutoff
+
+    Events older than the cutoff are stale (history replayed by an initial
+    or full_state sync); events whose id is still in the LRU are duplicates.
+    The cutoff advances to the newest event handled and is saved with the
+    most recent ids, so after a restart only events the bot never saw are
+    handled - and at most `max_catchup_seconds` of them.
+    """
+
+    def __init__(self,
+                 capacity: int = 4096,
+                 state_path: Optional[str] = None,
+                 max_catchup_seconds: float = 300.0,
+                 save_interval: float = 5.0):
+        self.capacity = capacity
+        self.state_path = state_path
+        self.save_interval = save_interval
+
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self.high_water_ts = 0  # newest server_timestamp handled, ms
+        self._dirty = False
+        self._last_save = 0.0
+
+        self.stale = 0
+        self.duplicates = 0
+
+        now_ms = int(time.time() * 1000)
+        self._load()
+        floor = now_ms - int(max_catchup_seconds * 1000)
+        # Without saved state, ignore everything from before startup
+        self.cutoff_ts = max(self.high_water_ts, floor) if self.high_water_ts else now_ms
+
+    def should_process(self, event_id: str, server_timestamp: int) -> bool:
+        """Record the event and return True only the first time a fresh event is seen"""
+        if server_timestamp < self.cutoff_ts:
+            self.stale += 1
+            return False
+        if event_id in self._seen:
+            self._seen.move_to_end(event_id)
+            self.duplicates += 1
+            return False
+
+        self._seen[event_id] = None
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+        if server_timestamp > self.high_water_ts:
+            self.high_water_ts = server_timestamp
+
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+        return True
+
+    def save(self):
+        """Persist the cutoff and recent ids (atomic replace)"""
+        if not self.state_path or not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"high_water_ts": self.high_water_ts, "recent": list(self._seen)}, f)
+            os.replace(tmp_path, self.state_path)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Failed to save dedup state to {self.state_path}: {e}")
+        self._last_save = time.monotonic()
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            self.high_water_ts = int(state.get("high_water_ts", 0))
+            for event_id in state.get("recent", [])[-self.capacity:]:
+                self._seen[event_id] = None
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load dedup state from {self.state_path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tracked": len(self._seen),
+            "capacity": self.capacity,
+            "stale": self.stale,
+            "duplicates": self.duplicates
+        }
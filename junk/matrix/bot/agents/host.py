@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Agent host for the multi-agent system
+Runs several agents in one event loop over one connection pool and one sync stream
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from nio import AsyncClientConfig, MatrixRoom, RoomMessageText
+
+from .base_agent import BaseMatrixAgent
+
+logger = logging.getLogger(__name__)
+
+# name -> (module, class, environment prefix for credentials)
+AGENT_TYPES = {
+    "orchestrator": ("agents.orchestrator_agent", "OrchestratorAgent", "ORCHESTRATOR"),
+    "llm": ("agents.llm_agent", "LLMAgent", "LLM_AGENT"),
+}
+
+def load_agent_class(name: str):
+    """Import an agent class by its short name, so hosts only load what they run"""
+    module_name, class_name, _ = AGENT_TYPES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+class AgentHost:
+    """
+    Hosts several BaseMatrixAgent instances in a single process
+
+    Every agent keeps its own login and access token, but they share one
+    aiohttp session, and in "shared" sync mode only the first agent polls
+    /sync. Its room events are fanned out to every agent that is a member
+    of the room, the first one included, each through its own inbox so a
+    slow handler in one agent never stalls the others. Agent-to-agent messages between
+    hosted agents go over the in-process bus and never touch the
+    homeserver at all.
+
+    "per_agent" sync mode keeps a sync loop per agent (still on the shared
+    pool) for agents that sit in rooms the primary agent is not in.
+    """
+
+    def __init__(self, sync_mode: str = "shared", pool_size: int = 20, inbox_size: int = 1000):
+        if sync_mode not in ("shared", "per_agent"):
+            raise ValueError(f"Unknown sync mode: {sync_mode}")
+        self.sync_mode = sync_mode
+        self.pool_size = pool_size
+        self.inbox_size = inbox_size
+
+        self.agents: List[BaseMatrixAgent] = []
+        self.primary: Optional[BaseMatrixAgent] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        self._inboxes: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self.events_routed = 0
+        self.events_dropped = 0
+
+    def add(self, agent: BaseMatrixAgent):
+        self.agents.append(agent)
+
+    async def start(self) -> bool:
+        """Connect every agent over the shared pool; returns False if none came up"""
+        if not await self._connect_agents():
+            return False
+
+        if self.sync_mode == "shared":
+            self.primary = self.agents[0]
+            # Swap the primary's own message handler for the fan-out, so it waits in its inbox like the rest
+            client = self.primary.client
+            client.event_callbacks = [cb for cb in client.event_callbacks if cb.func != self.primary._on_message]
+            client.add_event_callback(self._demultiplex, RoomMessageText)
+            self._open_inboxes(self.agents)
+
+        logger.info(f"Agent host started {len(self.agents)} agents "
+                    f"({', '.join(a.agent_id for a in self.agents)}) in {self.sync_mode} sync mode")
+        return True
+
+    async def _connect_agents(self) -> bool:
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=AsyncClientConfig().request_timeout)
+        )
+
+        connected = []
+        for agent in self.agents:
+            agent.attach_session(self.session)
+            if await agent.connect():
+                connected.append(agent)
+            else:
+                logger.error(f"Agent {agent.agent_id} failed to connect; continuing without it")
+        self.agents = connected
+
+        if not connected:
+            await self.session.close()
+            self.session = None
+            return False
+        return True
+
+    async def run(self):
+        """Sync until cancelled"""
+        if self.sync_mode == "shared":
+            await self.primary._start_sync()
+        else:
+            await asyncio.gather(*(agent._start_sync() for agent in self.agents))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+        for agent in self.agents:
+            await agent.stop()
+
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def _open_inboxes(self, agents: List[BaseMatrixAgent]):
+        for agent in agents:
+            inbox = self._inboxes[agent.agent_id] = asyncio.Queue(maxsize=self.inbox_size)
+            self._workers.append(asyncio.create_task(self._drain(agent, inbox)))
+
+    async def _demultiplex(self, room: MatrixRoom, event: RoomMessageText):
+        """Fan an event from the primary sync out to the hosted agents in the room"""
+        for agent in self.agents:
+            if agent is self.primary or self._is_member(agent, room):
+                self._route(agent, room, event)
+
+    def _route(self, agent: BaseMatrixAgent, room: MatrixRoom, event: RoomMessageText):
+        try:
+            self._inboxes[agent.agent_id].put_nowait((room, event, time.monotonic()))
+            self.events_routed += 1
+        except asyncio.QueueFull:
+            self.events_dropped += 1
+            logger.warning(f"Inbox full for agent {agent.agent_id}, dropping event {event.event_id}")
+
+    def _is_member(self, agent: BaseMatrixAgent, room: MatrixRoom) -> bool:
+        return (room.room_id in agent.joined_rooms
+                or agent.client.user_id in room.users)
+
+    async def _drain(self, agent: BaseMatrixAgent, inbox: asyncio.Queue):
+        """Deliver events to one agent in order"""
+        while True:
+            room, event, queued_at = await inbox.get()
+            agent.record_queue_wait("inbox", time.monotonic() - queued_at)
+            try:
+                await agent._on_message(room, event)
+            except Exception as e:
+                logger.error(f"Agent {agent.agent_id} failed on event {event.event_id}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "agents": len(self.agents),
+            "events_routed": self.events_routed,
+            "events_dropped": self.events_dropped,
+            "backlog": sum(inbox.qsize() for inbox in self._inboxes.values())
+        }
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Liveness index for the multi-agent system
+Tracks which agents are online from their heartbeats without rescanning the registry
+"""
+
+import heapq
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LivenessIndex:
+    """
+    Incrementally maintained online-set for registered agents
+
+    Every heartbeat pushes a new expiry onto a min-heap. Superseded heap
+    entries are skipped lazily when they reach the top, so a sweep only
+    touches agents that actually expired. The capability map only ever
+    contains online agents, which keeps routing away from dead agents.
+    """
+
+    def __init__(self, ttl_seconds: float = 180.0):
+        self.ttl_seconds = ttl_seconds
+        self._expiry: Dict[str, float] = {}  # agent_id -> monotonic deadline
+        self._heap: List[Tuple[float, str]] = []
+        self._capabilities: Dict[str, List[str]] = {}  # agent_id -> capabilities
+        self.capability_map: Dict[str, Set[str]] = {}  # capability -> online agent_ids
+
+    def touch(self, agent_id: str, capabilities: Optional[Iterable[str]] = None,
+              ttl: Optional[float] = None, now: Optional[float] = None) -> bool:
+        """Record a sign of life; returns True if the agent just came online"""
+        now = time.monotonic() if now is None else now
+        came_online = agent_id not in self._expiry
+        reindex = came_online
+
+        if capabilities is not None:
+            capabilities = list(capabilities)
+            if capabilities != self._capabilities.get(agent_id):
+                if not came_online:
+                    self._unindex(agent_id)
+                self._capabilities[agent_id] = capabilities
+                reindex = True
+        elif agent_id not in self._capabilities:
+            self._capabilities[agent_id] = []
+
+        if reindex:
+            for capability in self._capabilities[agent_id]:
+                self.capability_map.setdefault(capability, set()).add(agent_id)
+
+        deadline = now + (ttl or self.ttl_seconds)
+        self._expiry[agent_id] = deadline
+        heapq.heappush(self._heap, (deadline, agent_id))
+        return came_online
+
+    def drop(self, agent_id: str) -> bool:
+        """Remove an agent from the online set; returns True if it was online"""
+        if self._expiry.pop(agent_id, None) is None:
+            return False
+        self._unindex(agent_id)
+        return True
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Drop every agent whose heartbeat deadline has passed"""
+        now = time.monotonic() if now is None else now
+        expired = []
+
+        while self._heap and self._heap[0][0] <= now:
+            deadline, agent_id = heapq.heappop(self._heap)
+            # Stale entry: the agent has heartbeated since, or already dropped
+            if self._expiry.get(agent_id) != deadline:
+                continue
+            self.drop(agent_id)
+            expired.append(agent_id)
+
+        # Superseded entries accumulate with every heartbeat; rebuild once
+        # they clearly outnumber live agents
+        if len(self._heap) > 4 * len(self._expiry) + 64:
+            self._heap = [(d, a) for a, d in self._expiry.items()]
+            heapq.heapify(self._heap)
+
+        if expired:
+            logger.info(f"Agents expired after missed heartbeats: {expired}")
+        return expired
+
+    def is_online(self, agent_id: str) -> bool:
+        return agent_id in self._expiry
+
+    def online_agents(self) -> List[str]:
+        return list(self._expiry)
+
+    def agents_for(self, capability: str) -> Set[str]:
+        return self.capability_map.get(capability, set())
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def _unindex(self, agent_id: str):
+        """Remove an agent from the capability map, pruning empty entries"""
+        for capability in self._capabilities.get(agent_id, []):
+            agents = self.capability_map.get(capability)
+            if agents is None:
+                continue
+            agents.discard(agent_id)
+            if not agents:
+                del self.capability_map[capability]
@@ -8,8 +8,9 @@ import asyncio
 import logging
 import json
 import os
+import time
 import aiohttp
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator
 from datetime import datetime
 
 from nio import MatrixRoom, RoomMessageText
@@ -50,6 +51,8 @@ class LLMAgent(BaseMatrixAgent):
     - Content analysis
     """
 
+    user_commands = ("help", "models", "stats", "summarize", "translate", "code", "analyze")
+
     def __init__(self,
                  homeserver_url: str,
                  username: str,
@@ -129,9 +132,9 @@ class LLMAgent(BaseMatrixAgent):
         self.register_message_handler("code_gen", self._handle_code_generation)
         self.register_message_handler("workflow_step", self._handle_workflow_step)
 
-    async def start(self) -> bool:
-        """Start the LLM agent and check Ollama connection"""
-        success = await super().start()
+    async def connect(self) -> bool:
+        """Connect the LLM agent and check Ollama connection before syncing"""
+        success = await super().connect()
         if success:
             # Test Ollama connection and load available models
             await self._initialize_ollama()
@@ -404,8 +407,10 @@ class LLMAgent(BaseMatrixAgent):
             response = await self._generate_response(content)
 
             if response:
-                # Send response back to room
-                await self.send_message(room.room_id, response)
+                # Answer where the user asked, or here if that room is not reachable
+                user_room = context.get("room_id") or room.room_id
+                if not await self.send_message(user_room, response) and user_room != room.room_id:
+                    await self.send_message(room.room_id, response)
 
                 # Reply to orchestrator if needed
                 if context.get("request_id"):
@@ -519,20 +524,146 @@ class LLMAgent(BaseMatrixAgent):
             input_data = agent_msg.content
             context = agent_msg.context
 
-            # Process the input data
-            response = await self._generate_response(str(input_data))
+            # Per-step params from workflow definitions, e.g. llm[action=summarize]
+            params = context.get("params", {})
+            prompt = self._workflow_prompt(str(input_data), params)
+            options = {k: params[k] for k in ("model", "temperature", "max_tokens") if k in params}
+
+            # Process the input data, streaming paragraphs back if requested
+            if context.get("stream"):
+                response = await self._stream_workflow_step(agent_msg, room, prompt, options)
+            else:
+                response = await self._generate_response(prompt, **options)
 
             # Send response back to orchestrator
             await self.reply_to_agent(
                 agent_msg,
-                {"output": response, "status": "completed"},
+                {"output": response, "status": "completed"} if response
+                else {"status": "failed", "error": "Failed to generate response"},
                 room.room_id
             )
 
         except Exception as e:
             logger.error(f"Error handling workflow step: {e}")
 
+    def _workflow_prompt(self, text: str, params: Dict[str, Any]) -> str:
+        """Build the prompt for a workflow step from its action params"""
+        action = params.get("action", "process")
+
+        if action == "summarize":
+            return f"Please provide a concise summary of the following text:\n\n{text}"
+        if action == "translate":
+            return f"Translate the following text to {params.get('target_language', 'English')}:\n\n{text}"
+        if action == "analyze":
+            return f"Analyze the following text for sentiment, tone, key themes, and insights:\n\n{text}"
+        if action == "code":
+            return f"Generate clean, well-commented code for: {text}"
+        if "prompt" in params:
+            return f"{params['prompt']}\n\n{text}"
+        return text
+
+    async def _stream_workflow_step(self,
+                                    agent_msg: AgentMessage,
+                                    room: MatrixRoom,
+                                    prompt: str,
+                                    options: Dict[str, Any]) -> Optional[str]:
+        """Generate a workflow step output, sending each complete paragraph as a chunk"""
+        paragraphs = []
+        buffer = ""
+
+        try:
+            async for delta in self._stream_response(prompt, **options):
+                buffer += delta
+                while "\n\n" in buffer:
+                    paragraph, buffer = buffer.split("\n\n", 1)
+                    if paragraph.strip():
+                        paragraphs.append(paragraph.strip())
+                        await self.stream_to_agent(
+                            agent_msg, len(paragraphs) - 1, {"text": paragraphs[-1]}, room.room_id
+                        )
+        except Exception as e:
+            # A truncated answer must fail the step, not feed the next one
+            logger.error(f"Error streaming workflow step after {len(paragraphs)} paragraphs: {e}")
+            return None
+
+        if buffer.strip():
+            paragraphs.append(buffer.strip())
+            await self.stream_to_agent(
+                agent_msg, len(paragraphs) - 1, {"text": paragraphs[-1]}, room.room_id
+            )
+
+        return "\n\n".join(paragraphs) or None
+
     # Ollama integration
+    def _build_chat_request(self,
+                            prompt: str,
+                            context: Optional[List[Dict]],
+                            model: Optional[str],
+                            stream: bool,
+                            options: Dict[str, Any]) -> Dict[str, Any]:
+        """Build an Ollama /api/chat request body"""
+        # Prepare messages
+        messages = []
+
+        # Add context if provided
+        if context:
+            messages.extend(context)
+
+        # Add current prompt
+        messages.append({"role": "user", "content": prompt})
+
+        return {
+            "model": model or self.default_model,
+            "messages": messages,
+            "options": {
+                "temperature": options.get("temperature", self.temperature),
+                "num_predict": options.get("max_tokens", self.max_tokens)
+            },
+            "stream": stream
+        }
+
+    async def _stream_response(self,
+                               prompt: str,
+                               context: Optional[List[Dict]] = None,
+                               model: Optional[str] = None,
+                               **options) -> AsyncIterator[str]:
+        """Generate response using Ollama, yielding text as it is produced; raises if the stream breaks off"""
+        data = self._build_chat_request(prompt, context, model, True, options)
+        started = time.time()
+        done = False
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.ollama_url}/api/chat",
+                    json=data,
+                    timeout=aiohttp.ClientTimeout(total=120)
+                ) as resp:
+                    if resp.status != 200:
+                        logger.error(f"Ollama streaming request failed: {resp.status}")
+                        self.stats["errors"] += 1
+                        return
+
+                    async for line in resp.content:
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        delta = chunk.get("message", {}).get("content", "")
+                        if delta:
+                            yield delta
+                        if chunk.get("done"):
+                            done = True
+                            self.stats["tokens_generated"] += chunk.get("eval_count", 0)
+                            self._trace_ollama(chunk, data["model"], started, stream=True)
+                            break
+
+                    if not done:
+                        raise aiohttp.ClientPayloadError("Ollama stream ended before its final chunk")
+
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+
     async def _generate_response(self,
                                 prompt: str,
                                 context: Optional[List[Dict]] = None,
@@ -540,28 +671,8 @@ class LLMAgent(BaseMatrixAgent):
                                 **options) -> Optional[str]:
         """Generate response using Ollama"""
         try:
-            model = model or self.default_model
-
-            # Prepare messages
-            messages = []
-
-            # Add context if provided
-            if context:
-                messages.extend(context)
-
-            # Add current prompt
-            messages.append({"role": "user", "content": prompt})
-
-            # Prepare request
-            data = {
-                "model": model,
-                "messages": messages,
-                "options": {
-                    "temperature": options.get("temperature", self.temperature),
-                    "num_predict": options.get("max_tokens", self.max_tokens)
-                },
-                "stream": False
-            }
+            data = self._build_chat_request(prompt, context, model, False, options)
+            started = time.time()
 
             async with aiohttp.ClientSession() as session:
                 async with session.post(
@@ -572,6 +683,7 @@ class LLMAgent(BaseMatrixAgent):
                     if resp.status == 200:
                         result = await resp.json()
                         response_text = result.get("message", {}).get("content", "")
+                        self._trace_ollama(result, data["model"], started, stream=False)
 
                         # Update stats
                         if "usage" in result:
@@ -588,6 +700,29 @@ class LLMAgent(BaseMatrixAgent):
             self.stats["errors"] += 1
             return None
 
+    def _trace_ollama(self, result: Dict[str, Any], model: str, started: float, stream: bool):
+        """Spans for one Ollama call, split using its own load/prefill/generation timings (ns)"""
+        if not self.tracer.enabled:
+            return
+
+        finished = time.time()
+        call = self.tracer.record("ollama.chat", self.agent_id, started, finished,
+                                  model=model, stream=stream)
+
+        generate = result.get("eval_duration", 0) / 1e9
+        prefill = result.get("prompt_eval_duration", 0) / 1e9
+        load = result.get("load_duration", 0) / 1e9
+        generate_start = finished - generate
+        prefill_start = generate_start - prefill
+
+        if load:
+            self.tracer.record("ollama.load", self.agent_id, prefill_start - load, prefill_start, call)
+        self.tracer.record("ollama.prefill", self.agent_id, prefill_start, generate_start, call,
+                           prompt_tokens=result.get("prompt_eval_count", 0))
+        self.tracer.record("ollama.generate", self.agent_id, generate_start, finished, call,
+                           tokens=result.get("eval_count", 0),
+                           tokens_per_second=round(result.get("eval_count", 0) / generate, 1) if generate else None)
+
     async def _get_available_models(self) -> List[Dict]:
         """Get list of available models from Ollama"""
         try:
@@ -649,7 +784,8 @@ class LLMAgent(BaseMatrixAgent):
             "model": self.default_model,
             "available_models": len(self.available_models),
             "stats": self.stats,
-            "active_conversations": len(self.conversation_history)
+            "active_conversations": len(self.conversation_history),
+            "metrics": self.metrics.snapshot(self.agent_id)
         }
 
     async def handle_health_check(self) -> Dict[str, Any]:
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Metrics for the multi-agent system
+Counters and fixed-bucket latency histograms, rendered in Prometheus text format
+"""
+
+import bisect
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Roughly 1-2.5-5 per decade from 1ms to 10 minutes: fixed, so recording is a
+# bisect and an increment and histograms from different agents aggregate
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 600.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """'{k="v",...}' for a label key plus an optional extra pair such as ('le', '0.5'); shared with metrics_exporter"""
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label_value(v)}"' for k, v in pairs) + "}"
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _matches(key: LabelKey, agent_id: Optional[str]) -> bool:
+    return agent_id is None or ("agent", agent_id) in key
+
+def _series_name(key: LabelKey, agent_id: Optional[str]) -> str:
+    """Compact series name for snapshots, omitting the agent label when filtering on it"""
+    return ",".join(v for k, v in key if agent_id is None or k != "agent") or "total"
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{format_labels(key)} {value:g}")
+        return lines
+
+    def snapshot(self, agent_id: Optional[str] = None) -> Dict[str, float]:
+        return {_series_name(key, agent_id): value
+                for key, value in self._values.items() if _matches(key, agent_id)}
+
+class _HistogramSeries:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are estimated from bucket upper bounds"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _HistogramSeries(len(self.buckets))
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.count += 1
+        series.total += value
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        series = self._series.get(_label_key(labels))
+        return self._quantile(series, q) if series else None
+
+    def _quantile(self, series: _HistogramSeries, q: float) -> Optional[float]:
+        if not series.count:
+            return None
+        rank = q * series.count
+        seen = 0
+        for index, count in enumerate(series.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(key, ('le', '+Inf'))} {series.count}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {series.total:.6f}")
+            lines.append(f"{self.name}_count{format_labels(key)} {series.count}")
+        return lines
+
+    def snapshot(self, agent_id: Optional[str] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        result = {}
+        for key, series in self._series.items():
+            if not _matches(key, agent_id):
+                continue
+            result[_series_name(key, agent_id)] = {
+                "count": series.count,
+                "avg": round(series.total / series.count, 4) if series.count else None,
+                "p50": self._quantile(series, 0.50),
+                "p95": self._quantile(series, 0.95),
+                "p99": self._quantile(series, 0.99)
+            }
+        return result
+
+class MetricsRegistry:
+    """Named metrics shared by every agent in the process"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str,
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(name, lambda: Histogram(name, help_text, buckets))
+
+    def _get(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self, agent_id: Optional[str] = None) -> Dict[str, Dict]:
+        """Plain-dict view, optionally limited to one agent's series"""
+        result = {}
+        for name, metric in list(self._metrics.items()):
+            values = metric.snapshot(agent_id)
+            if values:
+                result[name] = values
+        return result
+
+registry = MetricsRegistry()
+
+_server: Optional["web.AppRunner"] = None
+
+async def start_metrics_server(port: int, host: str = "0.0.0.0") -> bool:
+    """Serve /metrics for the process; later calls are no-ops"""
+    global _server
+    if _server is not None:
+        return True
+    # aiohttp.web is only loaded when the endpoint is enabled
+    from aiohttp import web
+
+    async def metrics_handler(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app)
+    try:
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.error(f"Failed to start metrics endpoint on port {port}: {e}")
+        await runner.cleanup()
+        return False
+
+    _server = runner
+    logger.info(f"📈 Metrics available at http://{host}:{port}/metrics")
+    return True
@@ -8,18 +8,36 @@ import asyncio
 import logging
 import json
 import os
-from typing import Dict, List, Optional, Any, Set, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple, Callable, Awaitable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import re
+import time
 import uuid
 
 from nio import MatrixRoom, RoomMessageText
 
+from .admission import AdmissionController, AdmissionRejected, AdmissionTicket, parse_weights
 from .base_agent import BaseMatrixAgent, AgentMessage, parse_mention, format_agent_response
+from .circuit_breaker import BreakerRegistry
+from .liveness import LivenessIndex
+from .routing import AgentRequestError, HedgeBudget, LatencyTracker
+from .workflow_dsl import (
+    Conditional, Node, Parallel, Sequence, Step, WorkflowLibrary, WorkflowPlan,
+    WorkflowSyntaxError, compile_workflow
+)
 
 logger = logging.getLogger(__name__)
 
+# `workflow run` arguments: key=value or key="value with spaces", before the message
+_RUN_ARG_RE = re.compile(r"""([A-Za-z_][A-Za-z0-9_]*)=("[^"]*"|'[^']*'|\S+)\s*""")
+
+def _unquote(text: str) -> str:
+    """Strip one pair of matching quotes around the whole text"""
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    return text
+
 @dataclass
 class RegisteredAgent:
     """Information about a registered agent"""
@@ -30,10 +48,6 @@ class RegisteredAgent:
     last_seen: datetime
     user_id: str = ""
 
-    def is_online(self, timeout_minutes: int = 5) -> bool:
-        """Check if agent is considered online based on last_seen"""
-        return (datetime.now() - self.last_seen).total_seconds() < (timeout_minutes * 60)
-
 @dataclass
 class WorkflowStep:
     """Single step in a multi-agent workflow"""
@@ -56,6 +70,9 @@ class Workflow:
     status: str = "pending"
     current_step: int = 0
     context: Dict[str, Any] = field(default_factory=dict)
+    streaming: bool = False  # pipeline partial outputs between steps
+    plan: Optional[WorkflowPlan] = None  # compiled definition for non-linear workflows
+    args: Dict[str, str] = field(default_factory=dict)
 
 class OrchestratorAgent(BaseMatrixAgent):
     """
@@ -69,6 +86,8 @@ class OrchestratorAgent(BaseMatrixAgent):
     - System health monitoring
     """
 
+    user_commands = ("help", "status", "agents", "capabilities", "chain", "ask", "workflow")
+
     def __init__(self,
                  homeserver_url: str,
                  username: str,
@@ -92,21 +111,60 @@ class OrchestratorAgent(BaseMatrixAgent):
 
         # Agent registry
         self.agents: Dict[str, RegisteredAgent] = {}
-        self.capability_map: Dict[str, Set[str]] = {}  # capability -> set of agent_ids
+        self.liveness = LivenessIndex(
+            ttl_seconds=float(os.getenv("ORCHESTRATOR_AGENT_TTL", "180"))
+        )
+        self.capability_map: Dict[str, Set[str]] = self.liveness.capability_map  # capability -> online agent_ids
 
         # Workflow management
         self.active_workflows: Dict[str, Workflow] = {}
         self.workflow_history: List[str] = []
+        self.finished_workflows: Dict[str, Workflow] = {}  # most recent, for status queries
+        self.max_finished_workflows = 50
+        self.workflow_library = WorkflowLibrary(os.path.join(self.store_path, "workflows.json"))
 
         # Message routing
         self.pending_requests: Dict[str, Dict[str, Any]] = {}
         self.request_timeouts: Dict[str, datetime] = {}
+        self._response_waiters: Dict[str, asyncio.Future] = {}  # request_id -> response
+        self._chunk_sinks: Dict[str, Callable[[Any], None]] = {}  # request_id -> partial output consumer
+        self.stream_chains = os.getenv("ORCHESTRATOR_STREAM_CHAINS", "false").lower() == "true"
+        self._agent_inflight: Dict[str, int] = {}  # agent_id -> requests awaiting a response
+        self.step_timeout = float(os.getenv("ORCHESTRATOR_STEP_TIMEOUT", "150"))
+        self.cancel_timeout = float(os.getenv("ORCHESTRATOR_CANCEL_TIMEOUT", "5"))
+        self._cancel_sends: Set[asyncio.Task] = set()  # fire-and-forget task_cancel messages
+
+        # Admission control: bounded in-flight work, fair queuing across requesters
+        self.admission = AdmissionController(
+            global_limit=int(os.getenv("ORCHESTRATOR_MAX_INFLIGHT", "4")),
+            per_requester_limit=int(os.getenv("ORCHESTRATOR_MAX_INFLIGHT_PER_USER", "2")),
+            max_queued_per_requester=int(os.getenv("ORCHESTRATOR_MAX_QUEUED_PER_USER", "10")),
+            weights=parse_weights(os.getenv("ORCHESTRATOR_REQUESTER_WEIGHTS", ""))
+        )
+
+        # Circuit breakers per (agent, capability) so broken backends fail fast
+        self.breakers = BreakerRegistry(
+            error_rate=float(os.getenv("ORCHESTRATOR_BREAKER_ERROR_RATE", "0.5")),
+            consecutive_timeouts=int(os.getenv("ORCHESTRATOR_BREAKER_TIMEOUTS", "2")),
+            open_seconds=float(os.getenv("ORCHESTRATOR_BREAKER_OPEN_SECONDS", "30"))
+        )
+
+        # Hedged requests for capabilities served by several replicas
+        self.hedging_enabled = os.getenv("ORCHESTRATOR_HEDGING", "true").lower() == "true"
+        self.hedge_default_delay = float(os.getenv("ORCHESTRATOR_HEDGE_DELAY", "10"))
+        self.latency = LatencyTracker()
+        self.hedge_budget = HedgeBudget(
+            ratio=float(os.getenv("ORCHESTRATOR_HEDGE_RATIO", "0.1")),
+            burst=float(os.getenv("ORCHESTRATOR_HEDGE_BURST", "5"))
+        )
 
         # System state
         self.system_stats = {
             "messages_routed": 0,
             "workflows_completed": 0,
             "agents_discovered": 0,
+            "hedges_sent": 0,
+            "hedges_won": 0,
             "uptime_start": datetime.now()
         }
 
@@ -115,14 +173,23 @@ class OrchestratorAgent(BaseMatrixAgent):
 
         logger.info("Orchestrator agent initialized")
 
+    async def stop(self):
+        for task in list(self._cancel_sends):
+            task.cancel()
+        await super().stop()
+
     def _register_handlers(self):
         """Register handlers for different message types"""
         self.register_message_handler("agent_online", self._handle_agent_online)
         self.register_message_handler("agent_offline", self._handle_agent_offline)
+        self.register_message_handler("agent_heartbeat", self._handle_agent_heartbeat)
         self.register_message_handler("capability_query", self._handle_capability_query)
         self.register_message_handler("route_request", self._handle_route_request)
         self.register_message_handler("workflow_request", self._handle_workflow_request)
         self.register_message_handler("task_response", self._handle_task_response)
+        self.register_message_handler("workflow_step_response", self._handle_task_response)
+        self.register_message_handler("user_request_response", self._handle_task_response)
+        self.register_message_handler("workflow_step_chunk", self._handle_workflow_chunk)
         self.register_message_handler("health_check", self._handle_health_check_msg)
 
     async def process_user_message(self, room: MatrixRoom, event: RoomMessageText):
@@ -187,23 +254,36 @@ class OrchestratorAgent(BaseMatrixAgent):
 **Agent Interaction:**
 • `!orchestrator ask <agent> <message>` - Send message to specific agent
 • `!orchestrator chain <agent1>-><agent2> <message>` - Chain multiple agents
+  (steps may name an agent or a capability; capabilities with several replicas are hedged)
+• `!orchestrator chain --stream <agent1>-><agent2> <message>` - Pipeline partial outputs between steps
 
 **Advanced Workflows:**
-• `!orchestrator workflow create <name> <steps>` - Create workflow
-• `!orchestrator workflow list` - List active workflows
+• `!orchestrator workflow create <name> "<definition>"` - Create workflow
+• `!orchestrator workflow run <name> [arg=value ...] <message>` - Run a saved workflow
+• `!orchestrator workflow list` - List saved and active workflows
+• `!orchestrator workflow show <name>` - Show a workflow definition
+• `!orchestrator workflow delete <name>` - Delete a workflow
 • `!orchestrator workflow status <id>` - Check workflow status
 
+**Workflow Definitions:**
+• `a->b` sequence, `(a | b)` parallel branches, `if contains "x" then a else b`
+• Wrap multi-step branches in parentheses: `if longer 10 then (a->b) else c`
+• `llm[action=translate, target_language=$lang]` per-step params, `$args` given at run time
+
 **Examples:**
 • `!orchestrator ask llm "What is quantum computing?"`
 • `!orchestrator chain search->llm "Find and summarize Python tutorials"`
 • `!orchestrator workflow create research "search->rag->llm"`
+• `!orchestrator workflow run digest lang=german "Summarize today's news"`
 """
         await self.send_message(room_id, help_text)
 
     async def _send_status(self, room_id: str):
         """Send system status"""
         uptime = datetime.now() - self.system_stats["uptime_start"]
-        online_agents = len([a for a in self.agents.values() if a.is_online()])
+        self._refresh_liveness()
+        online_agents = len(self.liveness)
+        admission = self.admission.stats()
 
         status_text = f"""📊 **System Status**
 
@@ -212,10 +292,15 @@ class OrchestratorAgent(BaseMatrixAgent):
 **Active Agents:** {online_agents}/{len(self.agents)}
 **Messages Routed:** {self.system_stats['messages_routed']}
 **Workflows Completed:** {self.system_stats['workflows_completed']}
+**Hedged Requests:** {self.system_stats['hedges_sent']} sent, {self.system_stats['hedges_won']} won
 **Active Workflows:** {len(self.active_workflows)}
+**Admission:** {admission['inflight']}/{admission['global_limit']} in flight, {admission['queued']} queued
 
 **Agent Status:**
 {self._format_agent_status()}
+
+**Circuit Breakers:**
+{self._format_breaker_status()}
 """
         await self.send_message(room_id, status_text)
 
@@ -225,9 +310,10 @@ class OrchestratorAgent(BaseMatrixAgent):
             await self.send_message(room_id, "📭 No agents currently registered")
             return
 
+        self._refresh_liveness()
         agent_list = "🤖 **Registered Agents:**\n\n"
         for agent in self.agents.values():
-            status_emoji = "🟢" if agent.is_online() else "🔴"
+            status_emoji = "🟢" if self.liveness.is_online(agent.agent_id) else "🔴"
             capabilities = ", ".join(agent.capabilities)
             agent_list += f"{status_emoji} **{agent.display_name}** (`{agent.agent_id}`)\n"
             agent_list += f"   ⚡ Capabilities: {capabilities}\n"
@@ -237,24 +323,27 @@ class OrchestratorAgent(BaseMatrixAgent):
 
     async def _send_capabilities(self, room_id: str):
         """Send capability mapping"""
+        self._refresh_liveness()
         if not self.capability_map:
             await self.send_message(room_id, "📭 No capabilities registered")
             return
 
+        # The capability map only holds online agents, so no filtering is needed
         capabilities_text = "⚡ **Available Capabilities:**\n\n"
         for capability, agent_ids in self.capability_map.items():
-            online_agents = [aid for aid in agent_ids
-                           if aid in self.agents and self.agents[aid].is_online()]
-            if online_agents:
-                capabilities_text += f"• **{capability}**: {', '.join(online_agents)}\n"
+            capabilities_text += f"• **{capability}**: {', '.join(sorted(agent_ids))}\n"
 
         await self.send_message(room_id, capabilities_text)
 
     async def _handle_chain_command(self, command: str, room_id: str, sender: str):
         """Handle chain command: chain agent1->agent2->agent3 message"""
         try:
-            # Parse: chain search->llm "find tutorials"
+            # Parse: chain [--stream] search->llm "find tutorials"
             parts = command[5:].strip()  # Remove "chain"
+            streaming = self.stream_chains
+            if parts.startswith("--stream"):
+                streaming = True
+                parts = parts[8:].strip()
 
             if "->" not in parts:
                 await self.send_message(room_id, "❌ Invalid chain format. Use: `chain agent1->agent2 message`")
@@ -267,14 +356,22 @@ class OrchestratorAgent(BaseMatrixAgent):
                 return
 
             chain_spec, message = chain_and_msg
-            agents = [a.strip() for a in chain_spec.split('->')]
-
-            # Validate agents exist and are online
-            missing_agents = []
-            for agent_id in agents:
-                if agent_id not in self.agents or not self.agents[agent_id].is_online():
-                    missing_agents.append(agent_id)
+            try:
+                plan = compile_workflow(chain_spec)
+            except WorkflowSyntaxError as e:
+                await self.send_message(room_id, f"❌ Invalid chain: {e}")
+                return
+            if plan.arguments:
+                # A chain has nowhere to take values from; only saved workflows do
+                await self.send_message(
+                    room_id,
+                    f"❌ Chains take no arguments ({', '.join(sorted('$' + a for a in plan.arguments))}); "
+                    f"save it with `workflow create` and pass them to `workflow run`"
+                )
+                return
 
+            # Validate every step resolves to an online agent or capability
+            missing_agents = self._unavailable_targets(plan)
             if missing_agents:
                 await self.send_message(
                     room_id,
@@ -283,11 +380,20 @@ class OrchestratorAgent(BaseMatrixAgent):
                 return
 
             # Create and execute workflow
-            workflow_id = await self._create_chain_workflow(agents, message, sender, room_id)
-            await self.send_message(
-                room_id,
-                f"🔄 Started chain workflow `{workflow_id}` with {len(agents)} agents"
-            )
+            agents = plan.linear_targets()
+            if agents is not None:
+                workflow_id, position = await self._create_chain_workflow(
+                    agents, message, sender, room_id, streaming
+                )
+            else:
+                workflow_id, position = await self._create_plan_workflow(
+                    "chain", plan, {}, message, sender, room_id
+                )
+            if position == 0:
+                await self.send_message(
+                    room_id,
+                    f"🔄 Started chain workflow `{workflow_id}` with {plan.step_count()} steps"
+                )
 
         except Exception as e:
             logger.error(f"Error handling chain command: {e}")
@@ -306,36 +412,220 @@ class OrchestratorAgent(BaseMatrixAgent):
             agent_id, message = parts
             message = message.strip('"\'')  # Remove quotes
 
-            # Check if agent exists and is online
-            if agent_id not in self.agents:
+            # Check if agent (or a replica of the capability) exists and is online
+            self._refresh_liveness()
+            if agent_id not in self.agents and agent_id not in self.capability_map:
                 await self.send_message(room_id, f"❌ Agent `{agent_id}` not found")
                 return
 
-            if not self.agents[agent_id].is_online():
+            if not self._resolve_replicas(agent_id, healthy_only=False):
                 await self.send_message(room_id, f"❌ Agent `{agent_id}` is offline")
                 return
 
-            # Route message to agent
-            request_id = await self._route_message_to_agent(
-                agent_id, "user_request", message, sender, room_id
-            )
-
-            if request_id:
+            replicas = self._resolve_replicas(agent_id)
+            if not replicas:
                 await self.send_message(
-                    room_id,
-                    f"📤 Sent message to {agent_id}. Request ID: `{request_id}`"
+                    room_id, f"🔌 `{agent_id}` is failing (circuit open), try again shortly"
                 )
-            else:
-                await self.send_message(room_id, "❌ Failed to send message")
+                return
+            capability = self._route_capability(agent_id)
+            agent_id = replicas[0]
+
+            # Route message to agent once admitted
+            await self._submit_admitted(
+                sender, room_id, f"request for `{agent_id}`",
+                lambda: self._run_ask(agent_id, message, sender, room_id, capability)
+            )
 
         except Exception as e:
             logger.error(f"Error handling ask command: {e}")
             await self.send_message(room_id, f"❌ Error: {str(e)}")
 
+    async def _run_ask(self, agent_id: str, message: str, sender: str, room_id: str,
+                       capability: str = "*"):
+        """Send a user request to an agent and hold the admission slot until it answers"""
+        await self.send_message(room_id, f"📤 Asking {agent_id}...")
+        try:
+            await self._request_agent(agent_id, "user_request", message, sender, room_id,
+                                      capability=capability)
+        except asyncio.TimeoutError:
+            await self.send_message(
+                room_id, f"⌛ {agent_id} did not answer within {self.step_timeout:.0f}s"
+            )
+        except AgentRequestError as e:
+            await self.send_message(room_id, f"❌ {agent_id} failed: {e}")
+
+    # Admission control
+    async def _submit_admitted(self,
+                               requester: str,
+                               room_id: str,
+                               description: str,
+                               job: Callable[[], Awaitable[Any]]) -> Optional[int]:
+        """
+        Queue a job behind admission control and tell the requester where it stands
+
+        Returns 0 if the job started immediately, its queue position if it
+        was queued, or None if it was rejected.
+        """
+        try:
+            ticket = self.admission.submit(requester)
+        except AdmissionRejected as e:
+            await self.send_message(room_id, f"🚦 {e}")
+            return None
+
+        position = self.admission.position(ticket)
+        if position:
+            await self.send_message(
+                room_id, f"⏳ Queued {description} at position {position}"
+            )
+
+        asyncio.create_task(self._run_admitted(ticket, job))
+        return position
+
+    async def _run_admitted(self, ticket: AdmissionTicket, job: Callable[[], Awaitable[Any]]):
+        """Wait for an execution slot, run the job and free the slot"""
+        try:
+            await self.admission.wait(ticket)
+            await job()
+        except Exception as e:
+            logger.error(f"Error running admitted job for {ticket.requester}: {e}")
+        finally:
+            self.admission.release(ticket)
+
     async def _handle_workflow_command(self, command: str, room_id: str, sender: str):
         """Handle workflow management commands"""
-        # TODO: Implement workflow creation, listing, and management
-        await self.send_message(room_id, "🚧 Workflow commands coming soon!")
+        # Everything after the subcommand stays raw text: definitions carry their own quoted strings
+        parts = command.split(None, 2)
+        subcommand = parts[1].lower() if len(parts) > 1 else "list"
+        rest = parts[2] if len(parts) > 2 else ""
+        args = rest.split()
+
+        if subcommand == "create":
+            await self._workflow_create(rest, room_id)
+        elif subcommand == "run":
+            await self._workflow_run(rest, room_id, sender)
+        elif subcommand == "list":
+            await self._workflow_list(room_id)
+        elif subcommand == "show" and args:
+            plan = self.workflow_library.get(args[0])
+            if plan:
+                await self.send_message(room_id, f"📋 **{args[0]}**: `{plan.source}`")
+            else:
+                await self.send_message(room_id, f"❌ Workflow `{args[0]}` not found")
+        elif subcommand == "delete" and args:
+            if self.workflow_library.remove(args[0]):
+                await self.send_message(room_id, f"🗑️ Deleted workflow `{args[0]}`")
+            else:
+                await self.send_message(room_id, f"❌ Workflow `{args[0]}` not found")
+        elif subcommand == "status" and args:
+            await self._workflow_status(args[0], room_id)
+        else:
+            await self.send_message(
+                room_id,
+                "❌ Usage: `workflow create|run|list|show|delete|status ...` - see `!orchestrator help`"
+            )
+
+    async def _workflow_create(self, text: str, room_id: str):
+        """Compile and store a named workflow definition"""
+        parts = text.split(None, 1)
+        if len(parts) < 2:
+            await self.send_message(room_id, "❌ Usage: `workflow create <name> \"<definition>\"`")
+            return
+
+        name, source = parts[0], _unquote(parts[1])
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+            await self.send_message(room_id, "❌ Workflow names may only use letters, digits, `_` and `-`")
+            return
+
+        try:
+            plan = self.workflow_library.define(name, source)
+        except WorkflowSyntaxError as e:
+            await self.send_message(room_id, f"❌ Invalid workflow: {e}")
+            return
+
+        summary = f"✅ Saved workflow `{name}` ({plan.step_count()} steps)"
+        if plan.arguments:
+            summary += f"\nArguments: {', '.join(sorted('$' + a for a in plan.arguments))}"
+        await self.send_message(room_id, summary)
+
+    async def _workflow_run(self, text: str, room_id: str, sender: str):
+        """Run a stored workflow with arguments"""
+        parts = text.split(None, 1)
+        if not parts:
+            await self.send_message(room_id, "❌ Usage: `workflow run <name> [arg=value ...] <message>`")
+            return
+
+        name = parts[0]
+        plan = self.workflow_library.get(name)
+        if not plan:
+            await self.send_message(room_id, f"❌ Workflow `{name}` not found")
+            return
+
+        run_args = {}
+        rest = parts[1] if len(parts) > 1 else ""
+        while True:
+            match = _RUN_ARG_RE.match(rest)
+            if not match:
+                break
+            run_args[match.group(1)] = _unquote(match.group(2))
+            rest = rest[match.end():]
+        message = _unquote(rest.strip())
+
+        missing_args = plan.arguments - run_args.keys()
+        if missing_args:
+            await self.send_message(
+                room_id, f"❌ Missing arguments: {', '.join(sorted(missing_args))}"
+            )
+            return
+        if not message:
+            await self.send_message(room_id, "❌ Missing message for the workflow")
+            return
+
+        missing_agents = self._unavailable_targets(plan)
+        if missing_agents:
+            await self.send_message(room_id, f"❌ Agents not available: {', '.join(missing_agents)}")
+            return
+
+        workflow_id, position = await self._create_plan_workflow(
+            name, plan, run_args, message, sender, room_id
+        )
+        if position == 0:
+            await self.send_message(room_id, f"🔄 Started workflow `{name}` as `{workflow_id}`")
+
+    async def _workflow_list(self, room_id: str):
+        """List stored workflow definitions and running workflows"""
+        lines = ["📋 **Saved Workflows:**"]
+        if self.workflow_library.plans:
+            for name, plan in sorted(self.workflow_library.plans.items()):
+                lines.append(f"• `{name}`: `{plan.source}`")
+        else:
+            lines.append("None yet - create one with `workflow create`")
+
+        lines.append("\n🔄 **Active Workflows:**")
+        if self.active_workflows:
+            for workflow in self.active_workflows.values():
+                lines.append(f"• `{workflow.id}` {workflow.name} - {workflow.status}")
+        else:
+            lines.append("None")
+
+        await self.send_message(room_id, "\n".join(lines))
+
+    async def _workflow_status(self, workflow_id: str, room_id: str):
+        """Show the steps of a running or recently finished workflow"""
+        workflow = self.active_workflows.get(workflow_id) or self.finished_workflows.get(workflow_id)
+        if not workflow:
+            await self.send_message(room_id, f"❌ Workflow `{workflow_id}` not found")
+            return
+
+        emoji = {"pending": "⏸️", "running": "🔄", "completed": "✅", "failed": "❌"}
+        lines = [f"📊 **Workflow `{workflow.id}`** ({workflow.name}) - {workflow.status}"]
+        for i, step in enumerate(workflow.steps, 1):
+            line = f"{emoji.get(step.status, '•')} {i}. `{step.agent_id}` {step.action}"
+            if step.error:
+                line += f" - {step.error}"
+            lines.append(line)
+
+        await self.send_message(room_id, "\n".join(lines))
 
     # Agent Management
     async def _handle_agent_online(self, agent_msg: AgentMessage, room: MatrixRoom):
@@ -344,33 +634,38 @@ class OrchestratorAgent(BaseMatrixAgent):
             content = agent_msg.content
             agent_id = content["agent_id"]
 
-            # Register or update agent
-            self.agents[agent_id] = RegisteredAgent(
-                agent_id=agent_id,
-                display_name=content["display_name"],
-                capabilities=content["capabilities"],
-                status=content["status"],
-                last_seen=datetime.now(),
-                user_id=agent_msg.sender
-            )
-
-            # Update capability map
-            for capability in content["capabilities"]:
-                if capability not in self.capability_map:
-                    self.capability_map[capability] = set()
-                self.capability_map[capability].add(agent_id)
-
-            self.system_stats["agents_discovered"] += 1
+            self._register_agent(agent_msg)
             logger.info(f"Agent {agent_id} registered with capabilities: {content['capabilities']}")
 
         except Exception as e:
             logger.error(f"Error handling agent online: {e}")
 
+    async def _handle_agent_heartbeat(self, agent_msg: AgentMessage, room: MatrixRoom):
+        """Handle periodic agent heartbeat"""
+        try:
+            agent_id = agent_msg.content["agent_id"]
+            agent = self.agents.get(agent_id)
+
+            # Agents that started before the orchestrator register on first heartbeat
+            if agent is None or agent.capabilities != agent_msg.content["capabilities"]:
+                self._register_agent(agent_msg)
+                logger.info(f"Agent {agent_id} registered from heartbeat")
+                return
+
+            agent.last_seen = datetime.now()
+            agent.status = agent_msg.content.get("status", "online")
+            self.liveness.touch(agent_id, ttl=self._heartbeat_ttl(agent_msg.content))
+            self._refresh_liveness()
+
+        except Exception as e:
+            logger.error(f"Error handling agent heartbeat: {e}")
+
     async def _handle_agent_offline(self, agent_msg: AgentMessage, room: MatrixRoom):
         """Handle agent going offline"""
         try:
             agent_id = agent_msg.content["agent_id"]
 
+            self.liveness.drop(agent_id)
             if agent_id in self.agents:
                 self.agents[agent_id].status = "offline"
                 logger.info(f"Agent {agent_id} went offline")
@@ -378,16 +673,48 @@ class OrchestratorAgent(BaseMatrixAgent):
         except Exception as e:
             logger.error(f"Error handling agent offline: {e}")
 
+    def _register_agent(self, agent_msg: AgentMessage):
+        """Register or update an agent from an online or heartbeat announcement"""
+        content = agent_msg.content
+        agent_id = content["agent_id"]
+        is_new = agent_id not in self.agents
+
+        self.agents[agent_id] = RegisteredAgent(
+            agent_id=agent_id,
+            display_name=content["display_name"],
+            capabilities=content["capabilities"],
+            status=content["status"],
+            last_seen=datetime.now(),
+            user_id=agent_msg.sender
+        )
+        self.liveness.touch(agent_id, content["capabilities"], ttl=self._heartbeat_ttl(content))
+
+        if is_new:
+            self.system_stats["agents_discovered"] += 1
+
+    def _heartbeat_ttl(self, content: Dict[str, Any]) -> Optional[float]:
+        """Allow a few missed heartbeats before an agent is considered gone"""
+        interval = content.get("interval")
+        return 3 * float(interval) if interval else None
+
+    def _refresh_liveness(self):
+        """Expire agents whose heartbeats stopped arriving"""
+        for agent_id in self.liveness.expire():
+            if agent_id in self.agents:
+                self.agents[agent_id].status = "offline"
+
     # Message Routing
     async def _route_message_to_agent(self,
                                      agent_id: str,
                                      message_type: str,
                                      content: Any,
                                      requester: str,
-                                     room_id: str) -> Optional[str]:
+                                     room_id: str,
+                                     request_id: Optional[str] = None,
+                                     context: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """Route a message to a specific agent"""
         try:
-            request_id = str(uuid.uuid4())
+            request_id = request_id or str(uuid.uuid4())
 
             # Store pending request
             self.pending_requests[request_id] = {
@@ -403,6 +730,7 @@ class OrchestratorAgent(BaseMatrixAgent):
                 message_type=message_type,
                 content=content,
                 context={
+                    **(context or {}),
                     "request_id": request_id,
                     "requester": requester,
                     "room_id": room_id
@@ -412,6 +740,7 @@ class OrchestratorAgent(BaseMatrixAgent):
             if msg_id:
                 self.system_stats["messages_routed"] += 1
                 return request_id
+            self.pending_requests.pop(request_id, None)
             return None
 
         except Exception as e:
@@ -422,8 +751,9 @@ class OrchestratorAgent(BaseMatrixAgent):
                                    agents: List[str],
                                    message: str,
                                    requester: str,
-                                   room_id: str) -> str:
-        """Create a chain workflow"""
+                                   room_id: str,
+                                   streaming: bool = False) -> Tuple[str, Optional[int]]:
+        """Create a chain workflow and queue it behind admission control"""
         workflow_id = str(uuid.uuid4())[:8]
 
         # Create workflow steps
@@ -442,15 +772,23 @@ class OrchestratorAgent(BaseMatrixAgent):
             name=f"chain_{workflow_id}",
             steps=steps,
             requester=requester,
-            room_id=room_id
+            room_id=room_id,
+            streaming=streaming
         )
 
         self.active_workflows[workflow_id] = workflow
 
-        # Start execution
-        asyncio.create_task(self._execute_workflow(workflow_id))
+        # Start execution once admitted
+        position = await self._submit_admitted(
+            requester, room_id, f"workflow `{workflow_id}`",
+            lambda: self._execute_workflow(workflow_id)
+        )
+        if position is None:
+            del self.active_workflows[workflow_id]
+        elif position:
+            workflow.status = "queued"
 
-        return workflow_id
+        return workflow_id, position
 
     async def _execute_workflow(self, workflow_id: str):
         """Execute a workflow"""
@@ -458,51 +796,451 @@ class OrchestratorAgent(BaseMatrixAgent):
             workflow = self.active_workflows[workflow_id]
             workflow.status = "running"
 
-            for i, step in enumerate(workflow.steps):
-                step.status = "running"
-                workflow.current_step = i
-
-                # Determine input data
-                if i == 0:
-                    input_data = step.input_data
+            with self.tracer.span("workflow", self.agent_id, workflow_id=workflow_id,
+                                  workflow=workflow.name, requester=workflow.requester):
+                if workflow.plan is not None:
+                    await self._run_plan(workflow)
+                elif workflow.streaming and len(workflow.steps) > 1:
+                    await self._run_streaming_steps(workflow)
                 else:
-                    # Use output from previous step
-                    prev_step = workflow.steps[i-1]
-                    input_data = prev_step.output
+                    await self._run_sequential_steps(workflow)
+
+            if workflow.status != "failed":
+                workflow.status = "completed"
+                self.system_stats["workflows_completed"] += 1
+                final_output = workflow.context.get(
+                    "output", workflow.steps[-1].output if workflow.steps else None
+                )
+                await self.send_message(
+                    workflow.room_id,
+                    f"✅ Workflow `{workflow_id}` completed\n\n{final_output}"
+                )
+            else:
+                failed = workflow.steps[workflow.current_step]
+                await self.send_message(
+                    workflow.room_id,
+                    f"❌ Workflow `{workflow_id}` failed at step {workflow.current_step + 1} "
+                    f"(`{failed.agent_id}`): {failed.error}"
+                )
+
+        except Exception as e:
+            logger.error(f"Error executing workflow {workflow_id}: {e}")
+            workflow = self.active_workflows.get(workflow_id)
+            if workflow is not None:
+                workflow.status = "failed"
+                await self.send_message(workflow.room_id, f"❌ Workflow `{workflow_id}` failed: {e}")
+
+        finally:
+            self._archive_workflow(workflow_id)
+
+    def _archive_workflow(self, workflow_id: str):
+        """Move a finished workflow out of the active set, keeping recent ones for status"""
+        workflow = self.active_workflows.pop(workflow_id, None)
+        if workflow is None:
+            return
+
+        self.workflow_history.append(workflow_id)
+        self.finished_workflows[workflow_id] = workflow
+        while len(self.finished_workflows) > self.max_finished_workflows:
+            oldest = self.workflow_history.pop(0)
+            self.finished_workflows.pop(oldest, None)
+
+    def _unavailable_targets(self, plan: WorkflowPlan) -> List[str]:
+        """Plan targets that resolve to no online agent"""
+        self._refresh_liveness()
+        return sorted(t for t in plan.targets if not self._resolve_replicas(t, healthy_only=False))
+
+    async def _create_plan_workflow(self,
+                                    name: str,
+                                    plan: WorkflowPlan,
+                                    args: Dict[str, str],
+                                    message: str,
+                                    requester: str,
+                                    room_id: str) -> Tuple[str, Optional[int]]:
+        """Create a workflow from a compiled plan and queue it behind admission control"""
+        workflow_id = str(uuid.uuid4())[:8]
+        workflow = Workflow(
+            id=workflow_id,
+            name=name,
+            steps=[],  # filled in as plan steps execute
+            requester=requester,
+            room_id=room_id,
+            plan=plan,
+            args=args,
+            context={"input": message}
+        )
+        self.active_workflows[workflow_id] = workflow
+
+        position = await self._submit_admitted(
+            requester, room_id, f"workflow `{workflow_id}`",
+            lambda: self._execute_workflow(workflow_id)
+        )
+        if position is None:
+            del self.active_workflows[workflow_id]
+        elif position:
+            workflow.status = "queued"
 
-                # Execute step
-                request_id = await self._route_message_to_agent(
+        return workflow_id, position
+
+    async def _run_plan(self, workflow: Workflow):
+        """Execute a compiled workflow plan"""
+        try:
+            workflow.context["output"] = await self._run_node(
+                workflow.plan.root, workflow.context["input"], workflow
+            )
+        except (asyncio.TimeoutError, AgentRequestError):
+            pass  # the failing step has already marked the workflow
+
+    async def _run_node(self, node: Node, data: Any, workflow: Workflow) -> Any:
+        """Execute one plan node on its input and return its output"""
+        if isinstance(node, Step):
+            return await self._run_plan_step(node, data, workflow)
+
+        if isinstance(node, Sequence):
+            for child in node.nodes:
+                data = await self._run_node(child, data, workflow)
+            return data
+
+        if isinstance(node, Parallel):
+            branches = [asyncio.create_task(self._run_node(b, data, workflow)) for b in node.branches]
+            try:
+                outputs = await asyncio.gather(*branches)
+            finally:
+                for branch in branches:
+                    branch.cancel()
+            return "\n\n---\n\n".join(str(o) for o in outputs if o)
+
+        if isinstance(node, Conditional):
+            if node.predicate.evaluate(data, workflow.args):
+                return await self._run_node(node.then, data, workflow)
+            if node.otherwise is not None:
+                return await self._run_node(node.otherwise, data, workflow)
+            return data
+
+        raise AgentRequestError(f"Unknown plan node {node!r}")
+
+    async def _run_plan_step(self, node: Step, data: Any, workflow: Workflow) -> Any:
+        """Execute a single plan step, recording it on the workflow"""
+        params = node.bind(workflow.args)
+        step = WorkflowStep(
+            agent_id=node.target,
+            action=params.get("action", "process"),
+            input_data=data,
+            status="running"
+        )
+        workflow.steps.append(step)
+        index = len(workflow.steps) - 1
+        workflow.current_step = index
+
+        try:
+            result = await self._request_with_hedging(
+                node.target,
+                "workflow_step",
+                data,
+                workflow.requester,
+                workflow.room_id,
+                context={"params": params} if params else None
+            )
+        except (asyncio.TimeoutError, AgentRequestError) as e:
+            self._fail_step(workflow, index, e)
+            raise
+
+        step.status = "completed"
+        step.output = result.get("output")
+        return step.output
+
+    async def _run_sequential_steps(self, workflow: Workflow):
+        """Run workflow steps one after another, each on the previous step's full output"""
+        for i, step in enumerate(workflow.steps):
+            step.status = "running"
+            workflow.current_step = i
+
+            # Determine input data
+            if i == 0:
+                input_data = step.input_data
+            else:
+                # Use output from previous step
+                prev_step = workflow.steps[i-1]
+                input_data = prev_step.output
+
+            # Execute step and wait for its output
+            try:
+                result = await self._request_with_hedging(
                     step.agent_id,
                     "workflow_step",
                     input_data,
                     workflow.requester,
                     workflow.room_id
                 )
+            except (asyncio.TimeoutError, AgentRequestError) as e:
+                self._fail_step(workflow, i, e)
+                return
 
-                if not request_id:
-                    step.status = "failed"
-                    step.error = "Failed to route message"
-                    workflow.status = "failed"
-                    break
+            step.status = "completed"
+            step.output = result.get("output")
 
-                # Wait for response (TODO: implement proper waiting mechanism)
-                await asyncio.sleep(2)  # Placeholder
-                step.status = "completed"
-                step.output = f"Output from {step.agent_id}"  # Placeholder
+    async def _run_streaming_steps(self, workflow: Workflow):
+        """
+        Run workflow steps as a pipeline
 
-            if workflow.status != "failed":
-                workflow.status = "completed"
-                self.system_stats["workflows_completed"] += 1
+        Each step streams partial outputs (paragraphs) to the next step, which
+        starts working on them while the upstream step is still generating.
+        """
+        queues = [asyncio.Queue() for _ in range(len(workflow.steps) + 1)]
+        queues[0].put_nowait(workflow.steps[0].input_data)
+        queues[0].put_nowait(None)
 
-            # Send completion message
-            await self.send_message(
-                workflow.room_id,
-                f"✅ Workflow `{workflow_id}` completed with status: {workflow.status}"
+        stages = [
+            asyncio.create_task(self._run_stream_stage(workflow, i, queues[i], queues[i + 1]))
+            for i in range(len(workflow.steps))
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except (asyncio.TimeoutError, AgentRequestError):
+            pass  # the failing stage has already marked the workflow
+        finally:
+            for stage in stages:
+                stage.cancel()
+
+    async def _run_stream_stage(self,
+                                workflow: Workflow,
+                                index: int,
+                                inbox: asyncio.Queue,
+                                outbox: asyncio.Queue):
+        """Feed every partial input of one pipeline stage to its agent, in order"""
+        step = workflow.steps[index]
+        step.status = "running"
+        outputs = []
+
+        try:
+            while True:
+                item = await inbox.get()
+                if item is None:
+                    break
+                result = await self._request_streaming(
+                    step.agent_id, item, workflow, outbox.put_nowait
+                )
+                outputs.append(result.get("output") or "")
+        except (asyncio.TimeoutError, AgentRequestError) as e:
+            self._fail_step(workflow, index, e)
+            raise
+
+        step.output = "\n\n".join(o for o in outputs if o)
+        step.status = "completed"
+        outbox.put_nowait(None)
+
+    async def _request_streaming(self,
+                                 target: str,
+                                 content: Any,
+                                 workflow: Workflow,
+                                 on_chunk: Callable[[Any], None]) -> Dict[str, Any]:
+        """Request a streamed step; agents that cannot stream yield one final chunk"""
+        replicas = self._resolve_replicas(target)
+        if not replicas:
+            raise AgentRequestError(f"No healthy agent for `{target}`")
+
+        forwarded = 0
+
+        def forward(text: Any):
+            nonlocal forwarded
+            forwarded += 1
+            on_chunk(text)
+
+        result = await self._request_agent(
+            replicas[0], "workflow_step", content, workflow.requester, workflow.room_id,
+            capability=self._route_capability(target),
+            context={"stream": True},
+            on_chunk=forward
+        )
+        if not forwarded and result.get("output"):
+            on_chunk(result["output"])
+        return result
+
+    def _fail_step(self, workflow: Workflow, index: int, error: BaseException):
+        """Mark a workflow step, and the workflow, as failed"""
+        step = workflow.steps[index]
+        step.status = "failed"
+        if isinstance(error, asyncio.TimeoutError):
+            step.error = f"Timed out after {self.step_timeout:.0f}s"
+        else:
+            step.error = str(error)
+        workflow.current_step = index
+        workflow.status = "failed"
+
+    # Request/response routing
+    def _route_capability(self, target: str) -> str:
+        """Breaker key for a routing target: the capability, or '*' for a direct agent"""
+        return "*" if self.liveness.is_online(target) else target
+
+    def _resolve_replicas(self, target: str, healthy_only: bool = True) -> List[str]:
+        """Resolve an agent id or capability to online agents, least loaded first"""
+        capability = self._route_capability(target)
+        if capability == "*":
+            replicas = [target]
+        else:
+            replicas = list(self.liveness.agents_for(target))
+
+        if healthy_only:
+            replicas = [a for a in replicas if self.breakers.available(a, capability)]
+        replicas.sort(key=lambda a: (self._agent_inflight.get(a, 0), a))
+        return replicas
+
+    async def _request_agent(self,
+                             agent_id: str,
+                             message_type: str,
+                             content: Any,
+                             requester: str,
+                             room_id: str,
+                             timeout: Optional[float] = None,
+                             capability: str = "*",
+                             context: Optional[Dict[str, Any]] = None,
+                             on_chunk: Optional[Callable[[Any], None]] = None) -> Dict[str, Any]:
+        """Route a request to one agent and wait for its response content"""
+        breaker = self.breakers.get(agent_id, capability)
+        if not breaker.try_acquire():
+            raise AgentRequestError(
+                f"Circuit open for {breaker.name}, retry in {breaker.retry_in():.0f}s"
             )
 
-        except Exception as e:
-            logger.error(f"Error executing workflow {workflow_id}: {e}")
-            workflow.status = "failed"
+        request_id = str(uuid.uuid4())
+        waiter = asyncio.get_running_loop().create_future()
+        self._response_waiters[request_id] = waiter
+        if on_chunk:
+            self._chunk_sinks[request_id] = on_chunk
+        self._agent_inflight[agent_id] = self._agent_inflight.get(agent_id, 0) + 1
+
+        with self.tracer.span(f"request {message_type}", self.agent_id, child_only=True,
+                              agent=agent_id, capability=capability, request_id=request_id):
+            try:
+                if not await self._route_message_to_agent(
+                    agent_id, message_type, content, requester, room_id,
+                    request_id=request_id, context=context
+                ):
+                    breaker.record_abandoned()
+                    raise AgentRequestError(f"Failed to route message to {agent_id}")
+
+                try:
+                    response = await asyncio.wait_for(
+                        waiter, self.step_timeout if timeout is None else timeout
+                    )
+                except asyncio.TimeoutError:
+                    breaker.record_failure(timeout=True)
+                    raise
+                except asyncio.CancelledError:
+                    # Lost a hedge race: tell the agent to stop working on it, without
+                    # holding up the cancellation on network I/O
+                    breaker.record_abandoned()
+                    self._send_cancel(agent_id, request_id)
+                    raise
+
+                if not isinstance(response, dict):
+                    response = {"output": response}
+                if response.get("status") == "failed" or "error" in response:
+                    breaker.record_failure()
+                    raise AgentRequestError(response.get("error", f"{agent_id} reported failure"))
+
+                breaker.record_success()
+                return response
+
+            finally:
+                self._response_waiters.pop(request_id, None)
+                self._chunk_sinks.pop(request_id, None)
+                self.pending_requests.pop(request_id, None)
+                self._agent_inflight[agent_id] -= 1
+
+    def _send_cancel(self, agent_id: str, request_id: str):
+        """Send task_cancel in the background, giving up after cancel_timeout seconds"""
+        if self.status == "offline":
+            return  # shutting down: the agent will not hear from us again anyway
+
+        async def send():
+            try:
+                await asyncio.wait_for(
+                    self.send_to_agent(agent_id, "task_cancel", {"request_id": request_id}),
+                    self.cancel_timeout
+                )
+            except Exception as e:
+                logger.debug(f"task_cancel for {request_id} to {agent_id} not sent: {e}")
+
+        task = asyncio.create_task(send())
+        self._cancel_sends.add(task)
+        task.add_done_callback(self._cancel_sends.discard)
+
+    async def _request_with_hedging(self,
+                                    target: str,
+                                    message_type: str,
+                                    content: Any,
+                                    requester: str,
+                                    room_id: str,
+                                    context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send a request to a replica of `target`, hedging to a second replica
+        if the first has not answered within the target's p95 latency
+        """
+        replicas = self._resolve_replicas(target)
+        if not replicas:
+            if self._resolve_replicas(target, healthy_only=False):
+                raise AgentRequestError(f"All replicas of `{target}` are failing (circuit open)")
+            raise AgentRequestError(f"No online agent for `{target}`")
+        capability = self._route_capability(target)
+
+        started = time.monotonic()
+        deadline = started + self.step_timeout
+        self.hedge_budget.earn(target)
+
+        def launch(agent_id: str) -> asyncio.Task:
+            task = asyncio.create_task(self._request_agent(
+                agent_id, message_type, content, requester, room_id,
+                timeout=max(0.0, deadline - time.monotonic()),
+                capability=capability,
+                context=context
+            ))
+            attempts[task] = agent_id
+            return task
+
+        attempts: Dict[asyncio.Task, str] = {}
+        pending = {launch(replicas[0])}
+        hedge_candidates = replicas[1:] if self.hedging_enabled else []
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                hedge_delay = None
+                if hedge_candidates:
+                    p95 = self.latency.percentile(target, 0.95) or self.hedge_default_delay
+                    hedge_delay = max(0.0, started + p95 - time.monotonic())
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Primary is slower than usual: hedge if the budget allows
+                    if self.hedge_budget.try_spend(target):
+                        hedge = launch(hedge_candidates.pop(0))
+                        pending.add(hedge)
+                        self.system_stats["hedges_sent"] += 1
+                        logger.info(f"Hedging {target} request to {attempts[hedge]}")
+                    hedge_candidates = []
+                    continue
+
+                for task in done:
+                    if task.exception() is None:
+                        self.latency.record(target, time.monotonic() - started)
+                        if len(attempts) > 1 and task is not next(iter(attempts)):
+                            self.system_stats["hedges_won"] += 1
+                        return task.result()
+                    last_error = task.exception()
+
+                # A failed replica can still be backed up by a hedge
+                if not pending and hedge_candidates:
+                    pending.add(launch(hedge_candidates.pop(0)))
+
+            raise last_error or AgentRequestError(f"No response from `{target}`")
+
+        finally:
+            for task in pending:
+                task.cancel()
 
     # Helper methods
     def _format_agent_status(self) -> str:
@@ -510,13 +1248,27 @@ class OrchestratorAgent(BaseMatrixAgent):
         if not self.agents:
             return "No agents registered"
 
-        status_lines = []
-        for agent in self.agents.values():
-            emoji = "🟢" if agent.is_online() else "🔴"
-            status_lines.append(f"{emoji} {agent.agent_id}")
+        status_lines = [f"🟢 {agent_id}" for agent_id in self.liveness.online_agents()]
+        offline_count = len(self.agents) - len(status_lines)
+        if offline_count > 0:
+            status_lines.append(f"🔴 {offline_count} offline")
 
         return "\n".join(status_lines)
 
+    def _format_breaker_status(self) -> str:
+        """Format open and half-open circuit breakers for display"""
+        unhealthy = self.breakers.unhealthy()
+        if not unhealthy:
+            return "✅ All circuits closed"
+
+        lines = []
+        for breaker in unhealthy:
+            if breaker.state == breaker.OPEN:
+                lines.append(f"🔴 {breaker.name} open (probe in {breaker.retry_in():.0f}s)")
+            else:
+                lines.append(f"🟡 {breaker.name} half-open (probing)")
+        return "\n".join(lines)
+
     async def _handle_capability_query(self, agent_msg: AgentMessage, room: MatrixRoom):
         """Handle capability query from agents"""
         # TODO: Implement capability queries
@@ -534,8 +1286,25 @@ class OrchestratorAgent(BaseMatrixAgent):
 
     async def _handle_task_response(self, agent_msg: AgentMessage, room: MatrixRoom):
         """Handle task responses from agents"""
-        # TODO: Implement response handling for pending requests
-        pass
+        request_id = agent_msg.context.get("request_id")
+        if not request_id:
+            return
+
+        self.pending_requests.pop(request_id, None)
+        waiter = self._response_waiters.get(request_id)
+        if waiter and not waiter.done():
+            waiter.set_result(agent_msg.content)
+
+    async def _handle_workflow_chunk(self, agent_msg: AgentMessage, room: MatrixRoom):
+        """Pass a partial workflow step output on to the next pipeline stage"""
+        sink = self._chunk_sinks.get(agent_msg.context.get("request_id"))
+        if not sink:
+            return
+
+        content = agent_msg.content
+        text = content.get("text") if isinstance(content, dict) else content
+        if text:
+            sink(text)
 
     async def _handle_health_check_msg(self, agent_msg: AgentMessage, room: MatrixRoom):
         """Handle health check messages"""
@@ -553,12 +1322,14 @@ class OrchestratorAgent(BaseMatrixAgent):
             "registered_agents": len(self.agents),
             "active_workflows": len(self.active_workflows),
             "system_stats": self.system_stats,
-            "capabilities": self.capabilities
+            "capabilities": self.capabilities,
+            "metrics": self.metrics.snapshot(self.agent_id)
         }
 
     async def handle_health_check(self) -> Dict[str, Any]:
         """Handle health check requests"""
-        online_agents = len([a for a in self.agents.values() if a.is_online()])
+        self._refresh_liveness()
+        online_agents = len(self.liveness)
 
         return {
             "status": "healthy",
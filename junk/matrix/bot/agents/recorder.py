@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Recording of inbound Matrix traffic for agents
+Captures events with their arrival times so they can be replayed against an agent offline
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from nio import RoomMessageText
+
+from .transport import AgentTransport
+
+logger = logging.getLogger(__name__)
+
+class EventRecorder:
+    """
+    Appends inbound events to a gzipped JSONL file
+
+    Each line is {"ts": arrival wall-clock time, "room": room_id, "event": raw
+    event}; a {"header": ...} line at the start of each run records which
+    agent it was. Runs append as separate gzip members, which gzip readers
+    concatenate transparently.
+    """
+
+    def __init__(self, path: str, agent_id: str, user_id: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self._last_flush = time.monotonic()
+        self.recorded = 0
+        self._write({"header": {"agent_id": agent_id, "user_id": user_id, "started": time.time()}})
+
+    @classmethod
+    def from_env(cls, agent_id: str, user_id: str) -> Optional["EventRecorder"]:
+        """Recorder writing to $AGENT_RECORD_PATH/<agent_id>.events.jsonl.gz, if set"""
+        directory = os.getenv("AGENT_RECORD_PATH")
+        if not directory:
+            return None
+        path = os.path.join(directory, f"{agent_id}.events.jsonl.gz")
+        try:
+            recorder = cls(path, agent_id, user_id)
+            logger.info(f"Recording inbound events for {agent_id} to {path}")
+            return recorder
+        except OSError as e:
+            logger.error(f"Event recording disabled, cannot open {path}: {e}")
+            return None
+
+    def record(self, room_id: str, event: RoomMessageText):
+        self._write({"ts": time.time(), "room": room_id, "event": event.source})
+        self.recorded += 1
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        # Flushing a gzip stream costs compression ratio; only do it periodically
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        self._file.close()
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield header and event entries from a recording, skipping a truncated last line"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable line in {path}")
+        except EOFError:
+            logger.warning(f"Recording {path} ends mid-stream (agent still running?)")
+
+class CaptureTransport(AgentTransport):
+    """Transport that records outbound traffic instead of sending it"""
+
+    name = "capture"
+
+    def __init__(self):
+        self.sent: List[Dict[str, Any]] = []
+
+    async def login(self, password: str) -> bool:
+        return True
+
+    async def join(self, room_id: str) -> bool:
+        return True
+
+    async def send_text(self, room_id: str, body: str, msg_type: str = "m.text") -> bool:
+        self.sent.append({"ts": time.time(), "room": room_id, "msgtype": msg_type, "body": body})
+        return True
+
+    async def upload(self, data: bytes, content_type: str, filename: str) -> Optional[str]:
+        return None  # no media repository: payloads stay inline
+
+    async def download(self, uri: str) -> Optional[bytes]:
+        return None
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Routing helpers for the orchestrator
+Latency tracking and hedge budgets for capabilities served by several replicas
+"""
+
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class AgentRequestError(Exception):
+    """Raised when an agent answers a routed request with an error"""
+
+class LatencyTracker:
+    """Rolling window of response latencies per routing target"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._cache: Dict[str, Dict[float, float]] = {}  # target -> quantile -> value
+
+    def record(self, target: str, seconds: float):
+        samples = self._samples.get(target)
+        if samples is None:
+            samples = self._samples[target] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._cache.pop(target, None)
+
+    def percentile(self, target: str, q: float) -> Optional[float]:
+        """Return the q-quantile (0..1) of recent latencies, or None without enough data"""
+        samples = self._samples.get(target)
+        if not samples or len(samples) < self.min_samples:
+            return None
+
+        cached = self._cache.setdefault(target, {})
+        if q not in cached:
+            ordered = sorted(samples)
+            cached[q] = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return cached[q]
+
+    def summary(self, target: str) -> Dict[str, Optional[float]]:
+        return {
+            "samples": len(self._samples.get(target, ())),
+            "p50": self.percentile(target, 0.50),
+            "p95": self.percentile(target, 0.95)
+        }
+
+class HedgeBudget:
+    """
+    Token bucket limiting hedged requests per capability
+
+    Every primary request earns `ratio` tokens up to `burst`; sending a
+    hedge spends one. With ratio=0.1 hedging adds at most ~10% load.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens: Dict[str, float] = {}
+        self.hedges_sent: Dict[str, int] = {}
+
+    def earn(self, capability: str):
+        tokens = self._tokens.get(capability, self.burst)
+        self._tokens[capability] = min(self.burst, tokens + self.ratio)
+
+    def try_spend(self, capability: str) -> bool:
+        tokens = self._tokens.get(capability, self.burst)
+        if tokens < 1.0:
+            return False
+        self._tokens[capability] = tokens - 1.0
+        self.hedges_sent[capability] = self.hedges_sent.get(capability, 0) + 1
+        return True
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Distributed tracing for the multi-agent system
+Propagates trace context in AgentMessage.context and exports spans as JSON lines
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+class SpanContext:
+    """The part of a span that crosses process boundaries"""
+
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+class Span(SpanContext):
+    __slots__ = ("parent_id", "name", "service", "start", "end", "attributes", "status")
+
+    def __init__(self, name: str, service: str, parent: Optional[SpanContext] = None,
+                 start: Optional[float] = None, attributes: Optional[Dict[str, Any]] = None):
+        super().__init__(parent.trace_id if parent else secrets.token_hex(16), secrets.token_hex(8))
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.service = service
+        self.start = time.time() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP span field names, one span per line"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "service": self.service,
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int((self.end or self.start) * 1e9),
+            "durationMs": round(((self.end or self.start) - self.start) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class JsonlSpanExporter:
+    """Appends finished spans to a local JSONL file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        self._file.close()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+class Tracer:
+    """Creates spans when an exporter is configured; otherwise every call is a cheap no-op"""
+
+    def __init__(self, exporter: Optional[JsonlSpanExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, service: str, parent: Optional[SpanContext] = None,
+             child_only: bool = False, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Time a block as a span, the child of `parent` or else of the current span
+
+        With child_only, nothing is recorded unless there is a trace to join,
+        so background traffic does not start traces of its own.
+        """
+        parent = parent or current_span()
+        if not self.enabled or (child_only and parent is None):
+            yield None
+            return
+
+        span = Span(name, service, parent, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            span.set("error", str(e) or type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.time()
+            self.exporter.export(span)
+
+    def record(self, name: str, service: str, start: float, end: float,
+               parent: Optional[SpanContext] = None, **attributes) -> Optional[Span]:
+        """Export a span for an interval measured elsewhere (queueing, Ollama timings)"""
+        parent = parent or current_span()
+        if not self.enabled or parent is None:
+            return None
+        span = Span(name, service, parent, start=start, attributes=attributes)
+        span.end = max(start, end)
+        self.exporter.export(span)
+        return span
+
+def inject(context: Dict[str, Any], span: Optional[SpanContext]):
+    """Carry a span's identity to the receiving agent"""
+    if span is not None:
+        context["trace"] = {"trace_id": span.trace_id, "span_id": span.span_id, "sent_at": time.time()}
+
+def extract(context: Dict[str, Any]) -> Optional[SpanContext]:
+    trace = context.get("trace")
+    if not isinstance(trace, dict) or "trace_id" not in trace or "span_id" not in trace:
+        return None
+    return SpanContext(trace["trace_id"], trace["span_id"])
+
+def _tracer_from_env() -> Tracer:
+    path = os.getenv("TRACE_EXPORT_PATH")
+    if not path:
+        return Tracer()
+    try:
+        return Tracer(JsonlSpanExporter(path))
+    except OSError as e:
+        logger.error(f"Tracing disabled, cannot open {path}: {e}")
+        return Tracer()
+
+tracer = _tracer_from_env()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Message transports for the multi-agent system
+Matrix for cross-host traffic, an in-memory bus for agents sharing a process
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from nio import AsyncClient, JoinResponse, LoginResponse, MemoryDownloadResponse, UploadResponse
+
+if TYPE_CHECKING:
+    from .base_agent import AgentMessage, BaseMatrixAgent
+
+logger = logging.getLogger(__name__)
+
+class AgentTransport(ABC):
+    """How an agent authenticates, joins rooms, puts text into them and moves media"""
+
+    name = "base"
+
+    @abstractmethod
+    async def login(self, password: str) -> bool:
+        """Authenticate the agent's client"""
+        pass
+
+    @abstractmethod
+    async def join(self, room_id: str) -> bool:
+        """Join a room as the agent"""
+        pass
+
+    @abstractmethod
+    async def send_text(self, room_id: str, body: str, msg_type: str = "m.text") -> bool:
+        """Post a message into a room as the agent"""
+        pass
+
+    @abstractmethod
+    async def upload(self, data: bytes, content_type: str, filename: str) -> Optional[str]:
+        """Put data in the media repository, returning its mxc:// URI (None if that failed)"""
+        pass
+
+    @abstractmethod
+    async def download(self, uri: str) -> Optional[bytes]:
+        """Fetch an mxc:// URI from the media repository (None if that failed)"""
+        pass
+
+class MatrixTransport(AgentTransport):
+    """Plain client-server API calls through the agent's own homeserver connection"""
+
+    name = "matrix"
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def login(self, password: str) -> bool:
+        response = await self.client.login(password)
+        if not isinstance(response, LoginResponse):
+            logger.error(f"Login failed for {self.client.user}: {response}")
+            return False
+        return True
+
+    async def join(self, room_id: str) -> bool:
+        response = await self.client.join(room_id)
+        if not isinstance(response, JoinResponse):
+            logger.error(f"Failed to join room {room_id}: {response}")
+            return False
+        return True
+
+    async def send_text(self, room_id: str, body: str, msg_type: str = "m.text") -> bool:
+        response = await self.client.room_send(
+            room_id=room_id,
+            message_type="m.room.message",
+            content={"msgtype": msg_type, "body": body},
+            ignore_unverified_devices=True
+        )
+        return hasattr(response, 'event_id')
+
+    async def upload(self, data: bytes, content_type: str, filename: str) -> Optional[str]:
+        response, _ = await self.client.upload(
+            lambda *_: data, content_type=content_type, filename=filename, filesize=len(data)
+        )
+        if isinstance(response, UploadResponse):
+            return response.content_uri
+        logger.error(f"Upload of {filename} failed: {response}")
+        return None
+
+    async def download(self, uri: str) -> Optional[bytes]:
+        response = await self.client.download(mxc=uri)
+        if isinstance(response, MemoryDownloadResponse):
+            return response.body
+        logger.error(f"Download of {uri} failed: {response}")
+        return None
+
+class LocalAgentBus:
+    """
+    In-memory delivery between agents running in the same event loop
+
+    A targeted message to a co-located agent skips the homeserver entirely:
+    no room_send, no database write, no waiting for the receiver's next
+    sync. Delivery is scheduled as a task so the sender never runs the
+    receiver's handler on its own stack.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, "BaseMatrixAgent"] = {}
+        self._pending: Set[asyncio.Task] = set()
+        self.delivered = 0
+
+    def register(self, agent: "BaseMatrixAgent"):
+        self._agents[agent.agent_id] = agent
+        logger.debug(f"Agent {agent.agent_id} joined the local bus")
+
+    def unregister(self, agent: "BaseMatrixAgent"):
+        if self._agents.get(agent.agent_id) is agent:
+            del self._agents[agent.agent_id]
+
+    def has(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def local_agents(self) -> List[str]:
+        return list(self._agents)
+
+    def deliver(self, agent_msg: "AgentMessage", room_id: str) -> bool:
+        """Hand a message to a co-located agent; False if the target is not local"""
+        target = self._agents.get(agent_msg.target)
+        if target is None:
+            return False
+
+        task = asyncio.create_task(target._dispatch_agent_message(agent_msg, target._room_for(room_id)))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        self.delivered += 1
+        return True
+
+# Process-wide bus; agents started in the same process find each other here
+default_bus = LocalAgentBus()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Workflow definition language for the orchestrator
+Compiles workflow definitions once into validated, cached execution plans
+
+Syntax:
+    search -> llm                          sequence
+    (llm[action=summarize] | translate)    parallel branches on the same input
+    if contains "error" then analyze else llm
+    if longer 500 then (llm[action=summarize] -> translate) else translate
+    llm[action=translate, target_language=$lang]   per-step params, $args bound at run time
+
+Predicates: contains "x", matches "regex", longer N, empty, $arg == "value",
+each optionally prefixed with `not`. A branch is a single step or group, so
+a multi-step branch goes in parentheses.
+"""
+
+import ast
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class WorkflowSyntaxError(ValueError):
+    """Raised when a workflow definition cannot be compiled"""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} (at position {position})")
+        self.position = position
+
+# Plan nodes are immutable so compiled plans can be cached and shared
+
+@dataclass(frozen=True)
+class Arg:
+    """Reference to a run-time argument"""
+    name: str
+
+@dataclass(frozen=True)
+class Step:
+    target: str  # agent id or capability
+    params: Tuple[Tuple[str, Any], ...] = ()
+
+    def bind(self, args: Dict[str, str]) -> Dict[str, Any]:
+        """Params with $arg references replaced by run-time values"""
+        return {k: args[v.name] if isinstance(v, Arg) else v for k, v in self.params}
+
+@dataclass(frozen=True)
+class Predicate:
+    kind: str  # contains, matches, longer, empty, arg_equals
+    value: Any = None
+    arg: Optional[str] = None
+    negate: bool = False
+
+    def evaluate(self, text: Any, args: Dict[str, str]) -> bool:
+        text = "" if text is None else str(text)
+        if self.kind == "contains":
+            result = self.value.lower() in text.lower()
+        elif self.kind == "matches":
+            result = re.search(self.value, text) is not None
+        elif self.kind == "longer":
+            result = len(text) > self.value
+        elif self.kind == "empty":
+            result = not text.strip()
+        else:
+            result = args.get(self.arg) == self.value
+        return result != self.negate
+
+@dataclass(frozen=True)
+class Sequence:
+    nodes: Tuple["Node", ...]
+
+@dataclass(frozen=True)
+class Parallel:
+    branches: Tuple["Node", ...]
+
+@dataclass(frozen=True)
+class Conditional:
+    predicate: Predicate
+    then: "Node"
+    otherwise: Optional["Node"] = None
+
+Node = Union[Step, Sequence, Parallel, Conditional]
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+    """A compiled, validated workflow"""
+    source: str
+    root: Node
+    targets: FrozenSet[str]
+    arguments: FrozenSet[str]
+
+    def linear_targets(self) -> Optional[List[str]]:
+        """Targets of a plain a->b->c chain without params, else None"""
+        nodes = self.root.nodes if isinstance(self.root, Sequence) else (self.root,)
+        if all(isinstance(n, Step) and not n.params for n in nodes):
+            return [n.target for n in nodes]
+        return None
+
+    def step_count(self) -> int:
+        return _count_steps(self.root)
+
+def _count_steps(node: Node) -> int:
+    if isinstance(node, Step):
+        return 1
+    if isinstance(node, Sequence):
+        return sum(_count_steps(n) for n in node.nodes)
+    if isinstance(node, Parallel):
+        return sum(_count_steps(n) for n in node.branches)
+    return _count_steps(node.then) + (_count_steps(node.otherwise) if node.otherwise else 0)
+
+# Tokenizer
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<arrow>->)
+  | (?P<eq>==)
+  | (?P<punct>[()\[\]|,=])
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<arg>\$[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<ident>[A-Za-z_](?:[A-Za-z0-9_.:@]|-(?!>))*)
+""", re.VERBOSE)
+
+_KEYWORDS = {"if", "then", "else", "not"}
+_PREDICATES = {"contains", "matches", "longer", "empty"}
+MAX_DEPTH = 16
+
+def _tokenize(source: str) -> List[Tuple[str, str, int]]:
+    tokens = []
+    pos = 0
+    while pos < len(source):
+        match = _TOKEN_RE.match(source, pos)
+        if not match:
+            raise WorkflowSyntaxError(f"Unexpected character {source[pos]!r}", pos)
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "punct":
+            kind = text
+        elif kind == "arrow":
+            kind = "->"
+        elif kind == "eq":
+            kind = "=="
+        if kind != "ws":
+            tokens.append((kind, text, pos))
+        pos = match.end()
+    tokens.append(("end", "", len(source)))
+    return tokens
+
+class _Parser:
+    """Recursive descent parser producing plan nodes"""
+
+    def __init__(self, source: str):
+        self.tokens = _tokenize(source)
+        self.index = 0
+        self.depth = 0
+        self.targets = set()
+        self.arguments = set()
+
+    def peek(self) -> Tuple[str, str, int]:
+        return self.tokens[self.index]
+
+    def next(self) -> Tuple[str, str, int]:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, kind: str, text: Optional[str] = None) -> Tuple[str, str, int]:
+        token = self.next()
+        if token[0] != kind or (text is not None and token[1] != text):
+            raise WorkflowSyntaxError(f"Expected {text or kind}, got {token[1] or 'end'!r}", token[2])
+        return token
+
+    def parse(self) -> Node:
+        node = self.sequence()
+        kind, text, pos = self.peek()
+        if kind != "end":
+            raise self.unexpected()
+        return node
+
+    def unexpected(self) -> WorkflowSyntaxError:
+        kind, text, pos = self.peek()
+        if (kind, text) == ("ident", "else"):
+            # `if p then a->b else c` reads as `(if p then a)->b` and leaves the else stranded
+            return WorkflowSyntaxError("Unexpected 'else'; put a multi-step then branch in parentheses, "
+                                       "e.g. `if longer 10 then (a->b) else c`", pos)
+        return WorkflowSyntaxError(f"Unexpected {text or 'end'!r}", pos)
+
+    def sequence(self) -> Node:
+        nodes = [self.unit()]
+        while self.peek()[0] == "->":
+            self.next()
+            nodes.append(self.unit())
+        return nodes[0] if len(nodes) == 1 else Sequence(tuple(nodes))
+
+    def unit(self) -> Node:
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise WorkflowSyntaxError("Workflow is nested too deeply", self.peek()[2])
+        try:
+            kind, text, pos = self.peek()
+            if kind == "(":
+                return self.group()
+            if kind == "ident" and text == "if":
+                return self.conditional()
+            if kind == "ident" and text not in _KEYWORDS:
+                return self.step()
+            raise WorkflowSyntaxError(f"Expected a step, got {text or 'end'!r}", pos)
+        finally:
+            self.depth -= 1
+
+    def group(self) -> Node:
+        self.expect("(")
+        branches = [self.sequence()]
+        while self.peek()[0] == "|":
+            self.next()
+            branches.append(self.sequence())
+        if self.peek()[:2] == ("ident", "else"):
+            raise self.unexpected()
+        self.expect(")")
+        return branches[0] if len(branches) == 1 else Parallel(tuple(branches))
+
+    def conditional(self) -> Node:
+        self.expect("ident", "if")
+        predicate = self.predicate()
+        self.expect("ident", "then")
+        then = self.unit()
+        otherwise = None
+        if self.peek()[:2] == ("ident", "else"):
+            self.next()
+            otherwise = self.unit()
+        return Conditional(predicate, then, otherwise)
+
+    def predicate(self) -> Predicate:
+        negate = False
+        if self.peek()[:2] == ("ident", "not"):
+            self.next()
+            negate = True
+
+        kind, text, pos = self.next()
+        if kind == "arg":
+            self.expect("==")
+            self.arguments.add(text[1:])
+            return Predicate("arg_equals", self.literal(), arg=text[1:], negate=negate)
+        if kind != "ident" or text not in _PREDICATES:
+            raise WorkflowSyntaxError(f"Unknown predicate {text!r}", pos)
+
+        if text == "empty":
+            return Predicate("empty", negate=negate)
+        if text == "longer":
+            value = self.literal()
+            if not isinstance(value, (int, float)):
+                raise WorkflowSyntaxError("longer expects a number", pos)
+            return Predicate("longer", value, negate=negate)
+
+        value = self.literal()
+        if not isinstance(value, str):
+            raise WorkflowSyntaxError(f"{text} expects a string", pos)
+        if text == "matches":
+            try:
+                re.compile(value)
+            except re.error as e:
+                raise WorkflowSyntaxError(f"Invalid regex: {e}", pos)
+        return Predicate(text, value, negate=negate)
+
+    def step(self) -> Step:
+        _, target, _ = self.expect("ident")
+        self.targets.add(target)
+        params = []
+        if self.peek()[0] == "[":
+            self.next()
+            seen = set()
+            while True:
+                _, key, pos = self.expect("ident")
+                if key in seen:
+                    raise WorkflowSyntaxError(f"Duplicate param {key!r}", pos)
+                seen.add(key)
+                self.expect("=")
+                params.append((key, self.value()))
+                if self.peek()[0] == ",":
+                    self.next()
+                    continue
+                self.expect("]")
+                break
+        return Step(target, tuple(params))
+
+    def value(self) -> Any:
+        kind, text, _ = self.peek()
+        if kind == "arg":
+            self.next()
+            self.arguments.add(text[1:])
+            return Arg(text[1:])
+        if kind == "ident":
+            self.next()
+            return text
+        return self.literal()
+
+    def literal(self) -> Any:
+        kind, text, pos = self.next()
+        if kind == "string":
+            return ast.literal_eval(text)
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        raise WorkflowSyntaxError(f"Expected a literal, got {text or 'end'!r}", pos)
+
+@lru_cache(maxsize=256)
+def compile_workflow(source: str) -> WorkflowPlan:
+    """Parse and validate a workflow definition; identical sources share one plan"""
+    parser = _Parser(source.strip())
+    root = parser.parse()
+    return WorkflowPlan(
+        source=source.strip(),
+        root=root,
+        targets=frozenset(parser.targets),
+        arguments=frozenset(parser.arguments)
+    )
+
+class WorkflowLibrary:
+    """Named workflow plans, persisted as their source so they survive restarts"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.plans: Dict[str, WorkflowPlan] = {}
+        self._load()
+
+    def define(self, name: str, source: str) -> WorkflowPlan:
+        plan = compile_workflow(source)
+        self.plans[name] = plan
+        self._save()
+        return plan
+
+    def get(self, name: str) -> Optional[WorkflowPlan]:
+        return self.plans.get(name)
+
+    def remove(self, name: str) -> bool:
+        if self.plans.pop(name, None) is None:
+            return False
+        self._save()
+        return True
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                for name, source in json.load(f).items():
+                    self.plans[name] = compile_workflow(source)
+            logger.info(f"Loaded {len(self.plans)} workflow definitions")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load workflows from {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump({name: plan.source for name, plan in self.plans.items()}, f, indent=2)
+        except OSError as e:
+            logger.error(f"Failed to save workflows to {self.path}: {e}")
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Alert rules for the monitoring bot
+Threshold, rate-of-change and container restart rules evaluated against each new metrics sample
+"""
+
+import logging
+import math
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics_history import parse_duration
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES = ("cpu > 90% for 5m; mem available < 2GB for 2m; disk > 90%; "
+                 "disk growth > 1GB/h; temp > 85C for 2m; container restart")
+
+def _max_temperature(snapshot: Dict[str, Any]) -> Optional[float]:
+    temperatures = [t for t in snapshot.get('temperatures', {}).values() if isinstance(t, (int, float))]
+    return max(temperatures) if temperatures else None
+
+# Metric name in rules -> (kind, reader); readers return None when the value is unavailable
+METRICS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Optional[float]]]] = {
+    "cpu": ("percent", lambda s: s['cpu']['usage']),
+    "mem": ("percent", lambda s: s['memory']['percent']),
+    "mem used": ("bytes", lambda s: s['memory']['used']),
+    "mem available": ("bytes", lambda s: s['memory']['available']),
+    "swap": ("percent", lambda s: s['swap']['percent']),
+    "disk": ("percent", lambda s: s['disk']['percent']),
+    "disk used": ("bytes", lambda s: s['disk']['used']),
+    "disk free": ("bytes", lambda s: s['disk']['free']),
+    "temp": ("celsius", _max_temperature),
+    "net rx": ("bytes", lambda s: s.get('io', {}).get('rx')),
+    "net tx": ("bytes", lambda s: s.get('io', {}).get('tx')),
+    "disk read": ("bytes", lambda s: s.get('io', {}).get('read')),
+    "disk write": ("bytes", lambda s: s.get('io', {}).get('write'))
+}
+
+_BYTE_UNITS = {"b": 1, "kb": 1024, "mb": 1024**2, "gb": 1024**3, "tb": 1024**4}
+_UNITS = {
+    "percent": {"%": 1, "": 1},
+    "bytes": {**_BYTE_UNITS, "": 1},
+    "celsius": {"c": 1, "°c": 1, "": 1}
+}
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_RULE = re.compile(
+    r"^(?P<metric>[a-z ]+?)\s+(?P<growth>growth\s+)?(?P<op>[<>]=?)\s*(?P<value>\S+)"
+    r"(?:\s+for\s+(?P<for>\S+))?(?:\s+clear\s+(?P<clear>\S+))?$"
+)
+
+def _parse_value(text: str, kind: str, rate: bool) -> Tuple[float, Optional[str]]:
+    """'90%', '2GB', '85C', '1GB/h' -> (value in base units, period) for the metric's kind"""
+    match = re.fullmatch(r"([\d.]+)\s*([a-z%°]*)(?:/([smhd]))?", text.lower())
+    if not match:
+        raise ValueError(f"bad value '{text}'")
+    number, unit, period = match.groups()
+    if unit not in _UNITS[kind]:
+        raise ValueError(f"unit '{unit}' does not fit a {kind} metric")
+    if period and not rate:
+        raise ValueError(f"'/{period}' only applies to growth rules")
+    return float(number) * _UNITS[kind][unit], period
+
+def format_value(value: float, kind: str) -> str:
+    if kind == "percent":
+        return f"{value:.1f}%"
+    if kind == "celsius":
+        return f"{value:.1f}°C"
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if value < 1024.0:
+            return f"{sign}{value:.1f}{unit}"
+        value /= 1024.0
+    return f"{sign}{value:.1f}PB"
+
+class Rule(ABC):
+    """One alert rule; `evaluate` is called once per sample and keeps O(1) state"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.firing = False
+        self.since: Optional[float] = None  # when the current firing started
+        self.posted = False  # the current firing was announced
+        self.value: Optional[float] = None
+
+    @abstractmethod
+    def evaluate(self, timestamp: float, snapshot: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        """(state, key, detail) for each transition caused by this sample
+
+        state is 'firing', 'resolved' or 'event'; key tells apart alerts of
+        one rule (e.g. the container of a restart) for cooldowns.
+        """
+        pass
+
+    def current(self) -> str:
+        """Latest evaluated value, formatted, or '' when there is none"""
+        return ""
+
+class ThresholdRule(Rule):
+    """
+    `<metric> <op> <value> [for <duration>] [clear <value>]`
+
+    Fires once the condition has held for the whole duration. It only
+    resolves when the value crosses the clear level (by default 5% back
+    from the threshold), so a value hovering at the threshold does not
+    flap.
+    """
+
+    def __init__(self, text: str, metric: str, op: str, threshold: float,
+                 duration: float = 0.0, clear: Optional[float] = None):
+        super().__init__(text)
+        self.kind, self.read = METRICS[metric]
+        self.above = op.startswith(">")
+        self.inclusive = op.endswith("=")
+        self.threshold = threshold
+        self.duration = duration
+        self.clear = clear if clear is not None else threshold * (0.95 if self.above else 1.05)
+        self._pending_since: Optional[float] = None
+
+    def _breached(self, value: float) -> bool:
+        if self.above:
+            return value >= self.threshold if self.inclusive else value > self.threshold
+        return value <= self.threshold if self.inclusive else value < self.threshold
+
+    def _cleared(self, value: float) -> bool:
+        return value < self.clear if self.above else value > self.clear
+
+    def current(self):
+        return format_value(self.value, self.kind) if self.value is not None else ""
+
+    def evaluate(self, timestamp, snapshot):
+        value = self.read(snapshot)
+        if value is None:
+            return []
+        self.value = value
+
+        if self.firing:
+            if self._cleared(value):
+                self.firing = False
+                self._pending_since = None
+                return [("resolved", "", f"now {format_value(value, self.kind)}")]
+            return []
+
+        if not self._breached(value):
+            self._pending_since = None
+            return []
+        if self._pending_since is None:
+            self._pending_since = timestamp
+        if timestamp - self._pending_since >= self.duration:
+            self.firing = True
+            self.since = timestamp
+            return [("firing", "", f"now {format_value(value, self.kind)}")]
+        return []
+
+class GrowthRule(Rule):
+    """
+    `<metric> growth <op> <value>/<period> [for <window>]`
+
+    The rate of change is smoothed with an exponential moving average
+    whose time constant is the window (default 10m), so it needs only
+    the previous sample. Resolves at 80% of the threshold rate.
+    """
+
+    def __init__(self, text: str, metric: str, op: str, threshold: float, period: str, window: float = 600.0):
+        super().__init__(text)
+        self.kind, self.read = METRICS[metric]
+        self.above = op.startswith(">")
+        self.period = period
+        self.threshold = threshold / _PERIODS[period]  # per second
+        self.window = window
+        self._previous: Optional[Tuple[float, float]] = None
+        self._started: Optional[float] = None
+        self.rate: Optional[float] = None
+
+    def current(self):
+        return f"{format_value(self.value, self.kind)}/{self.period}" if self.value is not None else ""
+
+    def evaluate(self, timestamp, snapshot):
+        value = self.read(snapshot)
+        if value is None:
+            return []
+        previous, self._previous = self._previous, (timestamp, value)
+        if previous is None or timestamp <= previous[0]:
+            self._started = self._started or timestamp
+            return []
+
+        elapsed = timestamp - previous[0]
+        instant = (value - previous[1]) / elapsed
+        alpha = 1 - math.exp(-elapsed / self.window)
+        self.rate = instant if self.rate is None else self.rate + alpha * (instant - self.rate)
+        self.value = self.rate * _PERIODS[self.period]
+        now = f"now {self.current()}"
+
+        breached = self.rate > self.threshold if self.above else self.rate < self.threshold
+        cleared = self.rate < self.threshold * 0.8 if self.above else self.rate > self.threshold * 1.2
+        if self.firing and cleared:
+            self.firing = False
+            return [("resolved", "", now)]
+        # Wait for a full window so the average is not just the first few samples
+        if not self.firing and breached and timestamp - self._started >= self.window:
+            self.firing = True
+            self.since = timestamp
+            return [("firing", "", now)]
+        return []
+
+class ContainerRestartRule(Rule):
+    """`container restart`: one alert per restart reported by the Docker events stream"""
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self._counts: Optional[Dict[str, int]] = None
+
+    def evaluate(self, timestamp, snapshot):
+        counts = snapshot.get('container_restarts', {})
+        previous, self._counts = self._counts, dict(counts)
+        if previous is None:
+            return []
+        return [("event", name, f"{name} restarted ({count} restarts since the bot started)")
+                for name, count in counts.items() if count > previous.get(name, 0)]
+
+def parse_rule(text: str) -> Rule:
+    """Build a rule from its text form; raises ValueError if it cannot be parsed"""
+    normalized = " ".join(text.lower().split())
+    if normalized in ("container restart", "container restarts"):
+        return ContainerRestartRule(text.strip())
+
+    match = _RULE.match(normalized)
+    if not match or match.group("metric") not in METRICS:
+        raise ValueError(f"unknown rule '{text.strip()}' (metrics: {', '.join(METRICS)})")
+    metric, op = match.group("metric"), match.group("op")
+    # 'disk > 500GB' and 'disk growth > 1GB/h' mean the used bytes, not the percentage
+    if f"{metric} used" in METRICS and re.search(r"\d\s*[kmgt]?b\b", match.group("value")):
+        metric = f"{metric} used"
+    kind = METRICS[metric][0]
+    duration = parse_duration(match.group("for")) if match.group("for") else None
+    if match.group("for") and duration is None:
+        raise ValueError(f"bad duration '{match.group('for')}'")
+
+    if match.group("growth"):
+        threshold, period = _parse_value(match.group("value"), kind, rate=True)
+        if not period:
+            raise ValueError("growth rules need a rate, e.g. 1GB/h")
+        return GrowthRule(text.strip(), metric, op, threshold, period, window=duration or 600)
+
+    threshold, _ = _parse_value(match.group("value"), kind, rate=False)
+    clear = _parse_value(match.group("clear"), kind, rate=False)[0] if match.group("clear") else None
+    return ThresholdRule(text.strip(), metric, op, threshold, duration or 0, clear)
+
+class AlertEngine:
+    """
+    Evaluates every rule against each new sample
+
+    Each rule keeps only its own small state, so a sample costs
+    O(rules) and nothing rescans history. A rule that is already firing
+    does not alert again until it resolves (deduplication), and an alert
+    posted within the last `cooldown` seconds stays quiet when it fires
+    again, so a metric flapping around its clear level posts at most once
+    per cooldown.
+    """
+
+    def __init__(self, rules: List[Rule], cooldown: float = 900.0):
+        self.rules = rules
+        self.cooldown = cooldown
+        self.suppressed = 0
+        self._last_posted: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls) -> "AlertEngine":
+        """ALERT_RULES: ';'-separated rules ('off' disables), ALERT_COOLDOWN: seconds"""
+        spec = os.getenv("ALERT_RULES", DEFAULT_RULES)
+        rules = []
+        if spec.strip().lower() not in ("off", "none", ""):
+            for text in spec.split(';'):
+                if not text.strip():
+                    continue
+                try:
+                    rules.append(parse_rule(text))
+                except ValueError as e:
+                    logger.error(f"❌ Ignoring alert rule: {e}")
+        return cls(rules, cooldown=float(os.getenv("ALERT_COOLDOWN", "900")))
+
+    def evaluate(self, snapshot: Dict[str, Any]) -> List[str]:
+        """Messages to post for this sample"""
+        timestamp = snapshot.get('timestamp', time.time())
+        messages = []
+        for rule in self.rules:
+            try:
+                transitions = rule.evaluate(timestamp, snapshot)
+            except (KeyError, TypeError) as e:
+                logger.error(f"❌ Alert rule '{rule.text}' failed: {e}")
+                continue
+            for state, key, detail in transitions:
+                if state == "resolved":
+                    if rule.posted:  # only announce recoveries of posted alerts
+                        rule.posted = False
+                        duration = int(timestamp - rule.since)
+                        messages.append(f"✅ **RESOLVED:** {rule.text} — {detail} (after {duration // 60}m {duration % 60}s)")
+                    continue
+                alert_key = f"{rule.text}|{key}"
+                if timestamp - self._last_posted.get(alert_key, -math.inf) < self.cooldown:
+                    self.suppressed += 1
+                    continue
+                self._last_posted[alert_key] = timestamp
+                rule.posted = state == "firing"
+                icon = "🔁" if state == "event" else "🚨"
+                messages.append(f"{icon} **ALERT:** {rule.text} — {detail}")
+        return messages
+
+    def active(self) -> List[Rule]:
+        return [rule for rule in self.rules if rule.firing]
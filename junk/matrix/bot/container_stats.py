@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Docker container stats collector for the monitoring bot
+Streams per-container CPU, memory, network and block I/O from the Docker Engine API
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from io_rates import counter_delta
+
+logger = logging.getLogger(__name__)
+
+class DockerStatsCollector:
+    """
+    Keeps the latest stats of every running container in memory
+
+    One pooled aiohttp session talks to the Engine API, over the unix
+    socket or, with `docker_host`, over TCP (e.g. to a socket proxy that
+    only allows the read-only calls made here). Each running container gets a long-lived streaming
+    `/containers/{id}/stats` request, which Docker feeds about once a
+    second with CPU figures already paired with the previous reading;
+    a one-shot (`stream=false`) request would block for a second per
+    container instead. The container list is refreshed every `refresh`
+    seconds, and right away when the `/events` stream reports a container
+    start, starting streams for new containers and dropping streams of
+    stopped ones. Starts of containers seen before count as restarts.
+    """
+
+    def __init__(self, socket_path: str = "/var/run/docker.sock", refresh: float = 30.0, max_streams: int = 64,
+                 docker_host: Optional[str] = None):
+        self.socket_path = socket_path
+        self.docker_host = docker_host
+        # The host part of URLs on the unix socket is ignored
+        self.base_url = f"http://{docker_host[len('tcp://'):]}" if docker_host else "http://docker"
+        self.refresh = refresh
+        self.max_streams = max_streams
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._events_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._streams: Dict[str, asyncio.Task] = {}  # container id -> stream task
+        self._stats: Dict[str, Dict[str, Any]] = {}  # container id -> latest stats
+        self._previous: Dict[str, tuple] = {}  # container id -> (time, counters) for rates
+        self._seen: set = set()  # names of containers seen running
+        self.restarts: Dict[str, int] = {}  # name -> restarts since the collector started
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["DockerStatsCollector"]:
+        """
+        DOCKER_HOST=tcp://host:port (e.g. a socket proxy) or the socket at
+        DOCKER_SOCKET; None when neither is configured or reachable
+        """
+        if os.getenv("CONTAINER_STATS", "true").lower() != "true":
+            return None
+        refresh = float(os.getenv("CONTAINER_STATS_REFRESH", "30"))
+        docker_host = os.getenv("DOCKER_HOST", "")
+        if docker_host.startswith("tcp://"):
+            return cls(refresh=refresh, docker_host=docker_host)
+        socket_path = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+        if not os.path.exists(socket_path):
+            return None
+        return cls(socket_path, refresh=refresh)
+
+    async def start(self):
+        if self._task is None:
+            if self.docker_host:
+                connector = aiohttp.TCPConnector(limit=self.max_streams + 1)
+            else:
+                connector = aiohttp.UnixConnector(path=self.socket_path, limit=self.max_streams + 1)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=None, connect=5))
+            self._task = asyncio.create_task(self._run())
+            self._events_task = asyncio.create_task(self._watch_events())
+
+    async def stop(self):
+        tasks = list(self._streams.values()) + [t for t in (self._task, self._events_task) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._streams.clear()
+        self._task = self._events_task = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._sync_containers()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Docker container list error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.refresh)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _watch_events(self):
+        filters = json.dumps({"type": ["container"], "event": ["start"]})
+        while True:
+            try:
+                async with self._session.get(f"{self.base_url}/events", params={"filters": filters}) as response:
+                    response.raise_for_status()
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+                        event = json.loads(line)
+                        name = (event.get('Actor') or {}).get('Attributes', {}).get('name')
+                        if name in self._seen:
+                            self.restarts[name] = self.restarts.get(name, 0) + 1
+                            logger.info(f"🐳 Container {name} restarted")
+                        self._wake.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Docker events stream error: {e}")
+            await asyncio.sleep(self.refresh)
+
+    async def _sync_containers(self):
+        async with self._session.get(f"{self.base_url}/containers/json",
+                                     timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            containers = await response.json()
+
+        running = {c['Id']: (c.get('Names') or [c['Id'][:12]])[0].lstrip('/') for c in containers}
+        self._seen.update(running.values())
+        for container_id in list(self._streams):
+            if container_id not in running:
+                self._streams.pop(container_id).cancel()
+                self._forget(container_id)
+        for container_id, name in running.items():
+            if container_id not in self._streams and len(self._streams) < self.max_streams:
+                self._streams[container_id] = asyncio.create_task(self._stream(container_id, name))
+
+    async def _stream(self, container_id: str, name: str):
+        try:
+            async with self._session.get(f"{self.base_url}/containers/{container_id}/stats",
+                                         params={"stream": "true"}) as response:
+                response.raise_for_status()
+                # Docker writes one JSON document per line
+                async for line in response.content:
+                    if line.strip():
+                        self._update(container_id, name, json.loads(line))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Docker stats stream for {name} failed: {e}")
+        # Stream ended (container stopped or error); the next refresh restarts it if needed
+        self._streams.pop(container_id, None)
+        self._forget(container_id)
+
+    def _forget(self, container_id: str):
+        self._stats.pop(container_id, None)
+        self._previous.pop(container_id, None)
+
+    def _update(self, container_id: str, name: str, raw: Dict[str, Any]):
+        cpu, precpu = raw.get('cpu_stats') or {}, raw.get('precpu_stats') or {}
+        cpu_delta = cpu.get('cpu_usage', {}).get('total_usage', 0) - precpu.get('cpu_usage', {}).get('total_usage', 0)
+        system_delta = cpu.get('system_cpu_usage', 0) - precpu.get('system_cpu_usage', 0)
+        online = cpu.get('online_cpus') or len(cpu.get('cpu_usage', {}).get('percpu_usage') or []) or 1
+        # Same formula as `docker stats`: 100% is one full core
+        # (the first document of a stream has an empty precpu_stats)
+        cpu_percent = (cpu_delta / system_delta * online * 100
+                       if precpu.get('system_cpu_usage') and system_delta > 0 and cpu_delta > 0 else 0.0)
+
+        memory = raw.get('memory_stats') or {}
+        extra = memory.get('stats') or {}
+        # Page cache is reclaimable; cgroup v2 reports inactive_file, v1 total_inactive_file
+        cache = extra.get('inactive_file', extra.get('total_inactive_file', 0))
+        memory_used = max(0, memory.get('usage', 0) - cache)
+        memory_limit = memory.get('limit', 0)
+
+        networks = (raw.get('networks') or {}).values()
+        block = (raw.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []
+        counters = (
+            sum(n.get('rx_bytes', 0) for n in networks),
+            sum(n.get('tx_bytes', 0) for n in networks),
+            sum(b.get('value', 0) for b in block if b.get('op', '').lower() == 'read'),
+            sum(b.get('value', 0) for b in block if b.get('op', '').lower() == 'write')
+        )
+        now = time.monotonic()
+        previous = self._previous.get(container_id)
+        self._previous[container_id] = (now, counters)
+        if previous and now > previous[0]:
+            elapsed = now - previous[0]
+            rates = [counter_delta(c, p) / elapsed for c, p in zip(counters, previous[1])]
+        else:
+            rates = [0.0] * len(counters)
+
+        self._stats[container_id] = {
+            'name': name,
+            'id': container_id[:12],
+            'cpu': cpu_percent,
+            'memory': memory_used,
+            'memory_limit': memory_limit,
+            'memory_percent': memory_used / memory_limit * 100 if memory_limit else 0.0,
+            'net_rx': rates[0],
+            'net_tx': rates[1],
+            'block_read': rates[2],
+            'block_write': rates[3],
+            'pids': (raw.get('pids_stats') or {}).get('current', 0),
+            'updated': now
+        }
+
+    def latest(self, max_age: float = 10.0) -> Dict[str, Dict[str, Any]]:
+        """Stats by container name, leaving out containers whose stream has gone quiet"""
+        now = time.monotonic()
+        return {s['name']: s for s in list(self._stats.values()) if now - s['updated'] <= max_age}
@@ -6,20 +6,19 @@ Enhanced Matrix Bot with proper encryption support and LLM integration for acebu
 import asyncio
 import logging
 import os
-import platform
-import datetime
-import socket
-import psutil
+import time
 import aiohttp
 import json
-try:
-    import GPUtil
-    GPU_AVAILABLE = True
-except ImportError:
-    GPU_AVAILABLE = False
-from nio import AsyncClient, MatrixRoom, RoomMessageText, LoginResponse, JoinResponse, MegolmEvent
+from nio import AsyncClient, MatrixRoom, RoomMessageText, LoginResponse, JoinResponse, MegolmEvent, RoomSendResponse
 from nio.crypto import TrustState
 
+from alerts import AlertEngine
+from health_probe import HealthProber, format_results
+from host_metrics import HostMetricsSampler
+from metrics_exporter import OpenMetricsExporter, declare_host_metrics, export_snapshot, exporter_port
+from metrics_history import METRICS, format_duration, parse_duration, sparkline
+from round_trip import STAGES, RoundTripMonitor
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +27,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class EnhancedMatrixBot:
+    # Command label values for metrics; anything else is counted as 'unknown'
+    BOT_COMMANDS = ("help", "ping", "info", "status", "echo", "server", "cpu", "memory", "disk", "network",
+                    "temp", "gpu", "room", "history", "containers", "alerts", "health", "slo")
+
     def __init__(self):
         # Configuration from environment variables
         self.homeserver_url = os.getenv("MATRIX_HOMESERVER_URL")
@@ -53,6 +56,39 @@ class EnhancedMatrixBot:
             store_path=self.store_path
         )
 
+        # Host statistics are sampled in the background; commands read the latest snapshot
+        self.sampler = HostMetricsSampler.from_env()
+
+        # Alert rules are checked against every sample and posted to the alert room
+        self.alerts = AlertEngine.from_env()
+        self.alert_room_id = os.getenv("ALERT_ROOM_ID", self.target_room_id)
+        self._alert_tasks = set()
+        self.sampler.add_listener(self.check_alerts)
+
+        # Host sample and bot counters for Prometheus on BOT_METRICS_PORT
+        self.metrics = OpenMetricsExporter()
+        declare_host_metrics(self.metrics)
+        self.metrics.declare("bot_commands", "counter", "Chat commands handled")
+        self.metrics.declare("bot_command_duration_seconds", "histogram", "Time to handle a chat command", "seconds")
+        self.metrics.declare("bot_ollama_request_duration_seconds", "histogram", "Ollama generate requests by outcome", "seconds")
+        self.metrics.declare("bot_messages_sent", "counter", "Messages sent to rooms")
+        self.metrics.declare("bot_send_failures", "counter", "Messages the homeserver did not accept")
+        self.metrics.declare("bot_alerts_posted", "counter", "Alert and recovery messages posted")
+        self.sampler.add_listener(self.export_metrics)
+
+        # Service health probes for 'bbot health', all run at once over a shared connection pool
+        self.health = HealthProber.from_env()
+        self.metrics.declare("service_up", "gauge", "1 if the last health probe of a service passed, 0.5 on a warning")
+        self.metrics.declare("service_probe_latency_seconds", "gauge", "Latency of the last successful health probe", "seconds")
+
+        # Synthetic pings to the agents in SLO_ROOM_ID, timed until their replies arrive
+        self.round_trip = RoundTripMonitor.from_env(self.send_message)
+        if self.round_trip:
+            self.metrics.declare("bot_roundtrip_seconds", "histogram", "Agent round-trip time by stage (first reply, complete, sync delay)", "seconds")
+            self.metrics.declare("bot_roundtrip_quantile_seconds", "gauge", "Agent round-trip percentiles over the current and previous hour", "seconds")
+            self.metrics.declare("bot_roundtrip_probes", "counter", "Synthetic agent probes by outcome")
+            self.round_trip.add_listener(self.export_round_trip)
+
         # Add callbacks for both encrypted and unencrypted messages
         self.client.add_event_callback(self.message_callback, RoomMessageText)
         self.client.add_event_callback(self.encrypted_message_callback, MegolmEvent)
@@ -92,22 +128,31 @@ class EnhancedMatrixBot:
             return False
 
     async def send_message(self, room_id, message):
-        """Send message to room"""
+        """Send message to room; True if the homeserver accepted it"""
         try:
-            await self.client.room_send(
+            response = await self.client.room_send(
                 room_id=room_id,
                 message_type="m.room.message",
                 content={"msgtype": "m.text", "body": message},
                 ignore_unverified_devices=True
             )
+            if isinstance(response, RoomSendResponse):
+                self.metrics.inc("bot_messages_sent")
+                return True
+            self.metrics.inc("bot_send_failures")
+            logger.error(f"❌ Send message error: {response}")
         except Exception as e:
+            self.metrics.inc("bot_send_failures")
             logger.error(f"❌ Send message error: {e}")
+        return False
 
     async def message_callback(self, room: MatrixRoom, event: RoomMessageText):
         """Handle unencrypted messages"""
         if event.sender == self.client.user_id:
             return
 
+        if self.round_trip:
+            self.round_trip.on_message(room.room_id, event.sender, event.server_timestamp)
         logger.info(f"💬 Message from {event.sender}: {event.body[:50]}...")
         await self.process_command(room, event.sender, event.body)
 
@@ -119,62 +164,70 @@ class EnhancedMatrixBot:
         try:
             decrypted_event = await self.client.decrypt_event(event)
             if hasattr(decrypted_event, 'body'):
+                if self.round_trip:
+                    self.round_trip.on_message(room.room_id, event.sender, event.server_timestamp)
                 logger.info(f"🔐 Encrypted message from {event.sender}: {decrypted_event.body[:50]}...")
                 await self.process_command(room, event.sender, decrypted_event.body)
         except Exception as e:
             logger.error(f"❌ Decryption failed: {e}")
 
-    async def get_server_stats(self):
-        """Get comprehensive system statistics"""
-        try:
-            stats = {
-                'system': {
-                    'hostname': socket.gethostname(),
-                    'platform': f"{platform.system()} {platform.release()}",
-                    'uptime': str(datetime.timedelta(seconds=int(psutil.boot_time()))),
-                },
-                'cpu': {
-                    'usage': psutil.cpu_percent(interval=1),
-                    'cores': psutil.cpu_count(),
-                    'frequency': psutil.cpu_freq().current if psutil.cpu_freq() else None,
-                },
-                'memory': dict(psutil.virtual_memory()._asdict()),
-                'swap': dict(psutil.swap_memory()._asdict()),
-                'disk': dict(psutil.disk_usage('/')._asdict()),
-                'network': dict(psutil.net_io_counters()._asdict()),
-                'temperatures': {},
-                'gpu': []
-            }
+    def check_alerts(self, snapshot):
+        """Sampler listener: evaluate alert rules and post what changed"""
+        for message in self.alerts.evaluate(snapshot):
+            logger.warning(message)
+            self.metrics.inc("bot_alerts_posted")
+            if self.client.logged_in:
+                task = asyncio.create_task(self.send_message(self.alert_room_id, message))
+                self._alert_tasks.add(task)
+                task.add_done_callback(self._alert_tasks.discard)
+
+    def export_metrics(self, snapshot):
+        """Sampler listener: copy the new sample into the metrics exporter"""
+        export_snapshot(self.metrics, snapshot, self.sampler.system)
+        self.metrics.set("host_metrics_sample_duration_seconds", self.sampler.last_duration)
+        self.metrics.set("host_metrics_samples", self.sampler.samples)
+        self.metrics.replace("bot_alert_firing", [({"rule": rule.text}, float(rule.firing)) for rule in self.alerts.rules])
+
+    def export_round_trip(self, result):
+        """Round-trip listener: record one probe result for /metrics"""
+        self.metrics.inc("bot_roundtrip_probes", agent=result.agent, outcome=result.outcome)
+        for stage in STAGES:
+            value = getattr(result, stage)
+            if value is not None:
+                self.metrics.observe("bot_roundtrip_seconds", value, agent=result.agent, stage=stage)
+                sketch = self.round_trip.window(result.agent, stage, hours=2)
+                for q in (0.5, 0.9, 0.99):
+                    self.metrics.set("bot_roundtrip_quantile_seconds", sketch.quantile(q),
+                                     agent=result.agent, stage=stage, quantile=f"{q:g}")
+
+    def format_alerts(self):
+        if not self.alerts.rules:
+            return "🔕 **Alerts:** no rules configured (ALERT_RULES)"
+        lines = [f"🚨 **Alerts** ({len(self.alerts.active())} firing, cooldown {self.alerts.cooldown / 60:.0f}m):"]
+        for rule in self.alerts.rules:
+            if rule.firing:
+                state = f"🔴 firing for {int(time.time() - rule.since) // 60}m"
+            else:
+                state = "🟢 ok"
+            value = rule.current()
+            lines.append(f"• {rule.text}: {state}" + (f", now {value}" if value else ""))
+        if self.alerts.suppressed:
+            lines.append(f"• {self.alerts.suppressed} repeats suppressed by cooldown")
+        return "\n".join(lines)
 
-            # Temperature sensors
-            try:
-                temps = psutil.sensors_temperatures()
-                if temps:
-                    for name, entries in temps.items():
-                        for entry in entries:
-                            label = entry.label or name
-                            stats['temperatures'][label] = entry.current
-            except Exception:
-                pass
-
-            # GPU information
-            if GPU_AVAILABLE:
-                try:
-                    gpus = GPUtil.getGPUs()
-                    for gpu in gpus:
-                        stats['gpu'].append({
-                            'name': gpu.name,
-                            'load': f"{gpu.load*100:.1f}%",
-                            'memory': f"{gpu.memoryUsed}MB/{gpu.memoryTotal}MB",
-                            'temp': f"{gpu.temperature}°C" if gpu.temperature else "N/A"
-                        })
-                except Exception:
-                    pass
-
-            return stats
-        except Exception as e:
-            logger.error(f"❌ Stats error: {e}")
+    async def get_server_stats(self):
+        """Get comprehensive system statistics from the latest background sample"""
+        if self.sampler.age is None:
             return None
+        return {
+            'system': {
+                'hostname': self.sampler.system['hostname'],
+                'platform': self.sampler.system['platform'],
+                'uptime': self.sampler.uptime(),
+            },
+            **{section: self.sampler.latest(section)
+               for section in ('cpu', 'memory', 'swap', 'disk', 'network', 'io', 'temperatures', 'gpu', 'containers')}
+        }
 
     def format_bytes(self, bytes_value):
         """Format bytes to human readable format"""
@@ -184,8 +237,132 @@ class EnhancedMatrixBot:
             bytes_value /= 1024.0
         return f"{bytes_value:.1f}PB"
 
+    def format_rate(self, bytes_per_second):
+        return f"{self.format_bytes(bytes_per_second)}/s"
+
+    def format_disk_io(self, name, disk):
+        line = (f"• {name}: R {self.format_rate(disk['read'])} ({disk['read_iops']:.0f} IOPS), "
+                f"W {self.format_rate(disk['write'])} ({disk['write_iops']:.0f} IOPS)")
+        if disk['await'] is not None:
+            line += f", await {disk['await']:.1f}ms"
+        if disk['util'] is not None:
+            line += f", {disk['util']:.0f}% busy"
+        return line
+
+    def format_containers(self, sort_key):
+        """Running containers, busiest first, for 'bbot containers [cpu|memory|io]'"""
+        if self.sampler.containers is None:
+            return "🐳 **Containers:** Docker API not available (set DOCKER_HOST to the socket proxy, or mount /var/run/docker.sock)"
+        containers = self.sampler.latest('containers')
+        if not containers:
+            return "🐳 **Containers:** no running containers reported yet"
+
+        keys = {
+            'cpu': lambda c: c['cpu'],
+            'memory': lambda c: c['memory'],
+            'io': lambda c: c['net_rx'] + c['net_tx'] + c['block_read'] + c['block_write']
+        }
+        ordered = sorted(containers.values(), key=keys.get(sort_key, keys['cpu']), reverse=True)
+        lines = [f"🐳 **Containers ({len(ordered)} running, by {sort_key if sort_key in keys else 'cpu'}):**"]
+        for c in ordered:
+            lines.append(f"• {c['name']}: CPU {c['cpu']:.1f}%, Mem {self.format_bytes(c['memory'])} ({c['memory_percent']:.1f}%)")
+            lines.append(f"  - Net ↑{self.format_rate(c['net_tx'])} ↓{self.format_rate(c['net_rx'])}, "
+                         f"Disk R {self.format_rate(c['block_read'])} W {self.format_rate(c['block_write'])}, {c['pids']} pids")
+        return "\n".join(lines)
+
+    async def check_health(self, name: str = "") -> str:
+        """Run the health probes, optionally only the service called `name`, and record them for /metrics"""
+        started = time.perf_counter()
+        results = await self.health.run([name] if name else None)
+        if not results:
+            return f"🩺 No health target named '{name}'. Targets: {', '.join(t['name'] for t in self.health.targets)}"
+        up = {"ok": 1.0, "warn": 0.5, "fail": 0.0}
+        for result in results:
+            self.metrics.set("service_up", up[result.status], service=result.name)
+            if result.latency is not None:
+                self.metrics.set("service_probe_latency_seconds", result.latency, service=result.name)
+        return format_results(results, time.perf_counter() - started)
+
+    def format_slo(self, agent=None):
+        """Round-trip percentiles: all agents for 'bbot slo', hour by hour for 'bbot slo <agent>'"""
+        if not self.round_trip:
+            return "⏱️ **SLO:** round-trip probes are off (set SLO_ROOM_ID to a room the agents are in)"
+
+        def seconds(value):
+            if value is None:
+                return "-"
+            return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s"
+
+        names = [probe.name for probe in self.round_trip.probes]
+        if agent:
+            if agent not in names:
+                return f"⏱️ Unknown agent '{agent}'. Probed agents: {', '.join(names)}"
+            lines = [f"⏱️ **Round Trip: {agent}** (per hour, complete reply p50 / p90 / p99):"]
+            first = dict(self.round_trip.hourly(agent, "first"))
+            for hour, sketch in self.round_trip.hourly(agent, "complete")[-24:]:
+                label = time.strftime("%a %H:00", time.localtime(hour * 3600))
+                lines.append(f"• {label}: {seconds(sketch.quantile(0.5))} / {seconds(sketch.quantile(0.9))} / "
+                             f"{seconds(sketch.quantile(0.99))} (n={sketch.count}, first reply p50 "
+                             f"{seconds(first[hour].quantile(0.5)) if hour in first else '-'})")
+            if len(lines) == 1:
+                lines.append("• No completed probes yet")
+            return "\n".join(lines)
+
+        lines = [f"⏱️ **Round Trip SLO** (last hour / 24h, every {format_duration(self.round_trip.interval)}):"]
+        for name in names:
+            outcomes = {outcome: n for (a, outcome), n in self.round_trip.outcomes.items() if a == name}
+            total = sum(outcomes.values())
+            lines.append(f"**{name}** - {outcomes.get('ok', 0)}/{total} ok" +
+                         (f", {outcomes['timeout']} timed out" if outcomes.get('timeout') else ""))
+            for stage, label in (("first", "First reply"), ("complete", "Complete"), ("sync", "Sync delay")):
+                hour, day = self.round_trip.window(name, stage, 1), self.round_trip.window(name, stage, 24)
+                if day.count:
+                    lines.append(f"  {label}: p50 {seconds(hour.quantile(0.5))} p90 {seconds(hour.quantile(0.9))} "
+                                 f"p99 {seconds(hour.quantile(0.99))} / p50 {seconds(day.quantile(0.5))} "
+                                 f"p99 {seconds(day.quantile(0.99))}")
+        return "\n".join(lines)
+
+    def format_history(self, args):
+        """Render min/avg/max and a sparkline for 'bbot history <metric> [window]'"""
+        history = self.sampler.history
+        if args and ':' in args[0]:
+            # '<container>:cpu' or '<container>:memory'
+            container, _, metric = args[0].partition(':')
+            history = self.sampler.container_history.get(container)
+            if history is None:
+                return f"❌ No history for container '{container}'"
+            if metric not in history.metrics:
+                return f"❌ Container metrics: {', '.join(history.metrics)}"
+            args = [metric] + args[1:]
+        elif not args or args[0] not in METRICS:
+            windows = ", ".join(f"{format_duration(t.span)} at {format_duration(t.step)}" for t in history.tiers)
+            return (f"📈 **Usage:** bbot history <metric> [window]\n"
+                    f"• Metrics: {', '.join(METRICS)}, or <container>:cpu / <container>:memory\n"
+                    f"• Kept: {windows} ({self.format_bytes(history.memory_bytes())} fixed)")
+
+        metric = args[0]
+        seconds = parse_duration(args[1]) if len(args) > 1 else 3600
+        if not seconds:
+            return f"❌ Invalid window '{args[1]}', use e.g. 10m, 1h, 7d"
+
+        label, unit = METRICS[metric]
+        result = history.query(metric, seconds)
+        if result['last'] is None:
+            return f"📈 **{label} history:** no samples yet"
+
+        if unit == "B/s":
+            fmt = self.format_rate
+        else:
+            fmt = lambda v: f"{v:.1f}{unit}"
+        return f"""📈 **{label} history ({format_duration(seconds)}, {format_duration(result['step'])} resolution):**
+`{sparkline(result['series'])}`
+• Min: {fmt(result['min'])} • Avg: {fmt(result['avg'])} • Max: {fmt(result['max'])}
+• Now: {fmt(result['last'])}"""
+
     async def query_ollama(self, model, prompt, max_words=100):
         """Query Ollama API"""
+        started = time.perf_counter()
+        outcome = "error"
         try:
             data = {
                 "model": model,
@@ -206,26 +383,42 @@ class EnhancedMatrixBot:
                 ) as response:
                     if response.status == 200:
                         result = await response.json()
+                        outcome = "ok"
                         return result.get('response', 'No response received')
                     else:
                         return f"Error: HTTP {response.status}"
         except asyncio.TimeoutError:
+            outcome = "timeout"
             return "Error: Request timed out"
         except Exception as e:
             return f"Error: {str(e)}"
+        finally:
+            self.metrics.observe("bot_ollama_request_duration_seconds", time.perf_counter() - started,
+                                 model=model, outcome=outcome)
 
     async def process_command(self, room: MatrixRoom, sender: str, message_body: str):
         """Process bot commands from either encrypted or unencrypted messages"""
         command = message_body.strip()
         sender_name = sender.split(':')[0][1:]  # Extract username
 
+        started = time.perf_counter()
+        words = command.lower().split()
+
         # Bot commands (bbot/Bbot)
         if command.lower().startswith("bbot"):
+            name = words[1] if len(words) > 1 and words[1] in self.BOT_COMMANDS else "unknown"
             await self.handle_bot_command(room, sender_name, command)
+            label = f"bbot {name}"
 
         # AI commands (aai/Aai)
         elif command.lower().startswith("aai"):
             await self.handle_ai_command(room, sender_name, command)
+            label = "aai"
+
+        else:
+            return
+        self.metrics.inc("bot_commands", command=label)
+        self.metrics.observe("bot_command_duration_seconds", time.perf_counter() - started, command=label)
 
     async def handle_bot_command(self, room: MatrixRoom, sender_name: str, command: str):
         """Handle bot system commands"""
@@ -242,9 +435,14 @@ class EnhancedMatrixBot:
 • bbot cpu - CPU information
 • bbot memory - Memory usage
 • bbot disk - Disk usage
-• bbot network - Network statistics
+• bbot network - Network and disk I/O rates
 • bbot temp - Temperature sensors
 • bbot gpu - GPU information (if available)
+• bbot alerts - Alert rules and their state
+• bbot containers [cpu|memory|io] - Docker container usage
+• bbot history <metric> <window> - Trend, e.g. 'bbot history cpu 1h'
+• bbot health [service] - Probe homelab services
+• bbot slo [agent] - Agent round-trip latency percentiles
 • bbot echo <text> - Echo your message
 • bbot room - Room information"""
             await self.send_message(room.room_id, help_text)
@@ -284,11 +482,22 @@ class EnhancedMatrixBot:
 • Disk: {self.format_bytes(stats['disk']['used'])}/{self.format_bytes(stats['disk']['total'])} ({stats['disk']['percent']:.1f}%)
 • Network: ↑{self.format_bytes(stats['network']['bytes_sent'])} ↓{self.format_bytes(stats['network']['bytes_recv'])}"""
 
+                io = stats['io']
+                if io:
+                    server_info += (f"\n• Network Rate: ↑{self.format_rate(io['tx'])} ↓{self.format_rate(io['rx'])}"
+                                    f"\n• Disk I/O: R {self.format_rate(io['read'])} W {self.format_rate(io['write'])}"
+                                    f" ({io['read_iops'] + io['write_iops']:.0f} IOPS)")
+
                 if stats['temperatures']:
                     temp_str = ", ".join([f"{k}: {v}°C" for k, v in stats['temperatures'].items() if isinstance(v, (int, float))])
                     if temp_str:
                         server_info += f"\n• Temperature: {temp_str}"
 
+                containers = stats['containers']
+                if containers:
+                    top = max(containers.values(), key=lambda c: c['cpu'])
+                    server_info += f"\n• Containers: {len(containers)} running, busiest {top['name']} ({top['cpu']:.1f}% CPU)"
+
                 if stats['gpu']:
                     gpu_str = ", ".join([f"{gpu['name']}: {gpu['load']} load, {gpu['temp']}" for gpu in stats['gpu']])
                     server_info += f"\n• GPU: {gpu_str}"
@@ -298,60 +507,81 @@ class EnhancedMatrixBot:
                 await self.send_message(room.room_id, "❌ Unable to retrieve server statistics")
 
         elif cmd == "bbot cpu":
-            stats = await self.get_server_stats()
-            if stats:
+            cpu = self.sampler.latest('cpu')
+            if cpu:
                 cpu_info = f"""🖥️ **CPU Information:**
-• Usage: {stats['cpu']['usage']:.1f}%
-• Cores: {stats['cpu']['cores']}
-• Frequency: {stats['cpu']['frequency']:.0f} MHz""" if stats['cpu']['frequency'] else f"""🖥️ **CPU Information:**
-• Usage: {stats['cpu']['usage']:.1f}%
-• Cores: {stats['cpu']['cores']}
+• Usage: {cpu['usage']:.1f}%
+• Cores: {cpu['cores']}
+• Frequency: {cpu['frequency']:.0f} MHz""" if cpu['frequency'] else f"""🖥️ **CPU Information:**
+• Usage: {cpu['usage']:.1f}%
+• Cores: {cpu['cores']}
 • Frequency: N/A"""
                 await self.send_message(room.room_id, cpu_info)
             else:
                 await self.send_message(room.room_id, "❌ Unable to retrieve CPU information")
 
         elif cmd == "bbot memory":
-            stats = await self.get_server_stats()
-            if stats:
+            memory, swap = self.sampler.latest('memory'), self.sampler.latest('swap')
+            if memory and swap:
                 memory_info = f"""💾 **Memory Information:**
-• Used: {self.format_bytes(stats['memory']['used'])} ({stats['memory']['percent']:.1f}%)
-• Available: {self.format_bytes(stats['memory']['available'])}
-• Total: {self.format_bytes(stats['memory']['total'])}
-• Swap Used: {self.format_bytes(stats['swap']['used'])} ({stats['swap']['percent']:.1f}%)
-• Swap Total: {self.format_bytes(stats['swap']['total'])}"""
+• Used: {self.format_bytes(memory['used'])} ({memory['percent']:.1f}%)
+• Available: {self.format_bytes(memory['available'])}
+• Total: {self.format_bytes(memory['total'])}
+• Swap Used: {self.format_bytes(swap['used'])} ({swap['percent']:.1f}%)
+• Swap Total: {self.format_bytes(swap['total'])}"""
                 await self.send_message(room.room_id, memory_info)
             else:
                 await self.send_message(room.room_id, "❌ Unable to retrieve memory information")
 
         elif cmd == "bbot disk":
-            stats = await self.get_server_stats()
-            if stats:
+            disk = self.sampler.latest('disk')
+            if disk:
                 disk_info = f"""💿 **Disk Information:**
-• Used: {self.format_bytes(stats['disk']['used'])} ({stats['disk']['percent']:.1f}%)
-• Free: {self.format_bytes(stats['disk']['total'] - stats['disk']['used'])}
-• Total: {self.format_bytes(stats['disk']['total'])}"""
+• Used: {self.format_bytes(disk['used'])} ({disk['percent']:.1f}%)
+• Free: {self.format_bytes(disk['total'] - disk['used'])}
+• Total: {self.format_bytes(disk['total'])}"""
+                disks = self.sampler.latest('disks')
+                if disks:
+                    disk_info += "\n\n📀 **Disk I/O:**\n" + "\n".join(
+                        self.format_disk_io(name, d) for name, d in sorted(disks.items()))
                 await self.send_message(room.room_id, disk_info)
             else:
                 await self.send_message(room.room_id, "❌ Unable to retrieve disk information")
 
         elif cmd == "bbot network":
-            stats = await self.get_server_stats()
-            if stats:
+            network = self.sampler.latest('network')
+            if network:
                 network_info = f"""🌐 **Network Information:**
-• Bytes Sent: {self.format_bytes(stats['network']['bytes_sent'])}
-• Bytes Received: {self.format_bytes(stats['network']['bytes_recv'])}
-• Packets Sent: {stats['network']['packets_sent']:,}
-• Packets Received: {stats['network']['packets_recv']:,}"""
+• Bytes Sent: {self.format_bytes(network['bytes_sent'])}
+• Bytes Received: {self.format_bytes(network['bytes_recv'])}
+• Packets Sent: {network['packets_sent']:,}
+• Packets Received: {network['packets_recv']:,}"""
+
+                interfaces = self.sampler.latest('interfaces')
+                if interfaces:
+                    busiest = sorted(interfaces.items(), key=lambda item: item[1]['rx'] + item[1]['tx'], reverse=True)
+                    network_info += "\n\n📶 **Current Rates:**"
+                    for name, nic in busiest[:6]:
+                        network_info += (f"\n• {name}: ↑{self.format_rate(nic['tx'])} ({nic['tx_packets']:.0f} pkt/s)"
+                                         f" ↓{self.format_rate(nic['rx'])} ({nic['rx_packets']:.0f} pkt/s)")
+                        if nic['errors']:
+                            network_info += f" ⚠️ {nic['errors']:.1f} err/s"
+                    if len(busiest) > 6:
+                        network_info += f"\n• … {len(busiest) - 6} quieter interfaces"
+
+                disks = self.sampler.latest('disks')
+                if disks:
+                    network_info += "\n\n📀 **Disk I/O:**\n" + "\n".join(
+                        self.format_disk_io(name, d) for name, d in sorted(disks.items()))
                 await self.send_message(room.room_id, network_info)
             else:
                 await self.send_message(room.room_id, "❌ Unable to retrieve network information")
 
         elif cmd == "bbot temp":
-            stats = await self.get_server_stats()
-            if stats and stats['temperatures']:
+            temperatures = self.sampler.latest('temperatures')
+            if temperatures:
                 temp_readings = []
-                for sensor, temp in stats['temperatures'].items():
+                for sensor, temp in temperatures.items():
                     if isinstance(temp, (int, float)):
                         temp_readings.append(f"• {sensor}: {temp}°C")
                     else:
@@ -366,10 +596,10 @@ class EnhancedMatrixBot:
                 await self.send_message(room.room_id, "❌ Unable to retrieve temperature information")
 
         elif cmd == "bbot gpu":
-            stats = await self.get_server_stats()
-            if stats and stats['gpu']:
+            gpus = self.sampler.latest('gpu')
+            if gpus:
                 gpu_info = "🎮 **GPU Information:**\n"
-                for i, gpu in enumerate(stats['gpu'], 1):
+                for i, gpu in enumerate(gpus, 1):
                     gpu_info += f"• GPU {i}: {gpu['name']}\n"
                     gpu_info += f"  - Load: {gpu['load']}\n"
                     gpu_info += f"  - Memory: {gpu['memory']}\n"
@@ -378,6 +608,23 @@ class EnhancedMatrixBot:
             else:
                 await self.send_message(room.room_id, "🎮 **GPU Information:** No GPU detected or GPU monitoring unavailable")
 
+        elif cmd == "bbot alerts":
+            await self.send_message(room.room_id, self.format_alerts())
+
+        elif cmd == "bbot containers" or cmd.startswith("bbot containers "):
+            parts = cmd.split()
+            await self.send_message(room.room_id, self.format_containers(parts[2] if len(parts) > 2 else 'cpu'))
+
+        elif cmd == "bbot history" or cmd.startswith("bbot history "):
+            await self.send_message(room.room_id, self.format_history(cmd.split()[2:]))
+
+        elif cmd == "bbot health" or cmd.startswith("bbot health "):
+            await self.send_message(room.room_id, await self.check_health(cmd[len("bbot health"):].strip()))
+
+        elif cmd == "bbot slo" or cmd.startswith("bbot slo "):
+            parts = cmd.split()
+            await self.send_message(room.room_id, self.format_slo(parts[2] if len(parts) > 2 else None))
+
         elif cmd == "bbot room":
             member_count = len(room.users)
             room_info = f"""🏠 **Room Information:**
@@ -469,6 +716,11 @@ class EnhancedMatrixBot:
         # Create store directory
         os.makedirs(self.store_path, exist_ok=True)
 
+        # Start sampling so stats are ready by the first command
+        await self.sampler.start()
+        if exporter_port():
+            await self.metrics.start(exporter_port())
+
         # Login
         if not await self.login():
             logger.error("❌ Failed to login, exiting")
@@ -483,6 +735,11 @@ class EnhancedMatrixBot:
             greeting = f"🤖 Bot online! Commands: 'bbot help' for system info, 'aai help' for AI chat"
             await self.send_message(self.target_room_id, greeting)
 
+        # Probes start once the bot is in the probe room; replies arrive through the sync below
+        if self.round_trip and (self.round_trip.room_id == self.target_room_id
+                                or await self.join_room(self.round_trip.room_id)):
+            self.round_trip.start()
+
         # Start syncing
         logger.info("🔄 Starting sync...")
         await self.client.sync_forever(timeout=30000)
@@ -490,6 +747,11 @@ class EnhancedMatrixBot:
     async def close(self):
         """Close client connection"""
         try:
+            await self.sampler.stop()
+            await self.metrics.stop()
+            await self.health.close()
+            if self.round_trip:
+                await self.round_trip.stop()
             await self.client.close()
             logger.info("👋 Bot connection closed")
         except Exception as e:
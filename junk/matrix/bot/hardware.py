@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Hardware capability detection for the monitoring bot
+Checks for optional hardware once and only loads its libraries when the hardware is there
+"""
+
+import functools
+import importlib.util
+import logging
+import shutil
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+_gpu_disabled = False
+
+@functools.lru_cache(maxsize=None)
+def has_nvidia_gpu() -> bool:
+    """nvidia-smi on the PATH and GPUtil installed, checked once per process without running anything"""
+    return shutil.which("nvidia-smi") is not None and importlib.util.find_spec("GPUtil") is not None
+
+def read_gpus() -> List[Dict[str, str]]:
+    """
+    Load, memory and temperature of each NVIDIA GPU
+
+    GPUtil runs nvidia-smi on every call, so it is not even imported on
+    hosts without it, and a host where nvidia-smi fails or reports no GPU
+    is not asked again.
+    """
+    global _gpu_disabled
+    if _gpu_disabled or not has_nvidia_gpu():
+        return []
+    import GPUtil
+    try:
+        gpus = GPUtil.getGPUs()
+    except Exception as e:
+        logger.warning(f"⚠️ GPU monitoring disabled: {e}")
+        gpus = []
+    if not gpus:
+        _gpu_disabled = True
+    return [{
+        'name': gpu.name,
+        'load': f"{gpu.load*100:.1f}%",
+        'memory': f"{gpu.memoryUsed}MB/{gpu.memoryTotal}MB",
+        'temp': f"{gpu.temperature}°C" if gpu.temperature else "N/A"
+    } for gpu in gpus]
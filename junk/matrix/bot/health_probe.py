@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Homelab service health prober
+Checks every configured service concurrently and reports status and latency per target
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Target kinds that are HTTP GETs with a fixed path and expected JSON fields
+PRESETS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "matrix": ("/_matrix/client/versions", {"versions": None}),
+    "ollama": ("/api/tags", {"models": None}),
+    "qdrant": ("/collections", {"status": "ok"})
+}
+
+def default_targets() -> List[Dict[str, Any]]:
+    """Services as seen from a container on the homelab network"""
+    return [
+        {"name": "Matrix Synapse", "kind": "matrix",
+         "url": os.getenv("MATRIX_HOMESERVER_URL", "http://matrix-synapse:8008")},
+        {"name": "Ollama", "kind": "ollama", "url": os.getenv("OLLAMA_URL", "http://172.20.0.30:11434")},
+        {"name": "Qdrant", "kind": "qdrant", "url": os.getenv("QDRANT_URL", "http://qdrant:6333")},
+        {"name": "Redis", "kind": "redis", "host": "ai-redis", "port": 6379},
+        {"name": "API Gateway", "kind": "http", "url": "http://api-gateway:3000/health"},
+        {"name": "Mail (SMTP)", "kind": "smtp", "host": "maddy-mail", "port": 587},
+        {"name": "Caddy", "kind": "tcp", "host": "caddy", "port": 443}
+    ]
+
+@dataclass
+class ProbeResult:
+    name: str
+    kind: str
+    status: str  # "ok", "warn" or "fail"
+    latency: Optional[float]  # seconds; None when the probe never got an answer
+    detail: str
+
+class HealthProber:
+    """
+    Runs all health probes at once
+
+    HTTP-based probes share one pooled aiohttp session (kept between runs,
+    so repeated checks reuse connections and DNS lookups); TCP, SMTP and
+    Redis probes open a plain socket. Every probe has its own deadline,
+    so a full run takes as long as the slowest target, not the sum.
+
+    A target is a dict with `name`, `kind` (http, tcp, smtp, redis,
+    matrix, ollama, qdrant), `url` or `host`/`port`, and optionally
+    `timeout`, `status` (accepted HTTP codes), `warn_status` and `json`
+    (field -> expected value, None for "present"; dots for nesting).
+    """
+
+    def __init__(self, targets: List[Dict[str, Any]], timeout: float = 5.0, pool_size: int = 32):
+        self.targets = targets
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_env(cls) -> "HealthProber":
+        """HEALTH_TARGETS_FILE: JSON list of targets (default: the homelab services); HEALTH_PROBE_TIMEOUT: seconds"""
+        return cls(load_targets(os.getenv("HEALTH_TARGETS_FILE")),
+                   timeout=float(os.getenv("HEALTH_PROBE_TIMEOUT", "5")))
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def run(self, names: Optional[List[str]] = None) -> List[ProbeResult]:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        targets = [t for t in self.targets if not names or t['name'].lower() in names]
+        return list(await asyncio.gather(*(self.probe(t) for t in targets)))
+
+    async def probe(self, target: Dict[str, Any]) -> ProbeResult:
+        kind = target.get('kind', 'http')
+        timeout = float(target.get('timeout', self.timeout))
+        started = time.perf_counter()
+        try:
+            handler = getattr(self, f"_probe_{'http' if kind in PRESETS else kind}", None)
+            if handler is None:
+                return ProbeResult(target['name'], kind, "fail", None, f"unknown kind '{kind}'")
+            status, detail = await asyncio.wait_for(handler(target), timeout)
+            return ProbeResult(target['name'], kind, status, time.perf_counter() - started, detail)
+        except asyncio.TimeoutError:
+            return ProbeResult(target['name'], kind, "fail", None, f"no answer within {timeout:g}s")
+        except (OSError, aiohttp.ClientError, ValueError) as e:
+            return ProbeResult(target['name'], kind, "fail", None, str(e) or type(e).__name__)
+
+    async def _probe_http(self, target: Dict[str, Any]) -> Tuple[str, str]:
+        url = target['url']
+        expected_json = target.get('json')
+        if target.get('kind') in PRESETS:
+            path, preset_json = PRESETS[target['kind']]
+            url = url.rstrip('/') + path
+            expected_json = expected_json or preset_json
+
+        async with self._session.get(url, allow_redirects=False) as response:
+            ok_codes = target.get('status', [200])
+            if response.status in target.get('warn_status', []):
+                return "warn", f"HTTP {response.status}"
+            if response.status not in ok_codes:
+                return "fail", f"HTTP {response.status}"
+            if not expected_json:
+                return "ok", f"HTTP {response.status}"
+
+            body = await response.json(content_type=None)
+            for field, expected in expected_json.items():
+                value = body
+                for part in field.split('.'):
+                    value = value.get(part) if isinstance(value, dict) else None
+                if value is None or (expected is not None and value != expected):
+                    return "fail", f"{field} is {value!r}"
+            if target.get('kind') == "ollama":
+                return "ok", f"{len(body['models'])} models"
+            return "ok", f"HTTP {response.status}"
+
+    async def _probe_tcp(self, target: Dict[str, Any]) -> Tuple[str, str]:
+        _, writer = await asyncio.open_connection(target['host'], target['port'])
+        writer.close()
+        return "ok", "connected"
+
+    async def _probe_smtp(self, target: Dict[str, Any]) -> Tuple[str, str]:
+        reader, writer = await asyncio.open_connection(target['host'], target['port'])
+        try:
+            banner = (await reader.readline()).decode(errors="replace").strip()
+            writer.write(b"QUIT\r\n")
+            await writer.drain()
+        finally:
+            writer.close()
+        if banner.startswith("220"):
+            return "ok", banner[4:60]
+        return "fail", f"unexpected banner {banner[:60]!r}"
+
+    async def _probe_redis(self, target: Dict[str, Any]) -> Tuple[str, str]:
+        reader, writer = await asyncio.open_connection(target['host'], target['port'])
+        try:
+            if target.get('password'):
+                writer.write(f"AUTH {target['password']}\r\n".encode())
+                await writer.drain()
+                await reader.readline()
+            writer.write(b"PING\r\n")
+            await writer.drain()
+            reply = (await reader.readline()).decode(errors="replace").strip()
+        finally:
+            writer.close()
+        return ("ok", "PONG") if reply == "+PONG" else ("fail", reply[:60] or "no reply")
+
+def load_targets(path: Optional[str]) -> List[Dict[str, Any]]:
+    if not path:
+        return default_targets()
+    with open(path) as f:
+        return json.load(f)
+
+STATUS_ICONS = {"ok": "✅", "warn": "⚠️", "fail": "❌"}
+
+def format_results(results: List[ProbeResult], elapsed: float) -> str:
+    failed = sum(r.status == "fail" for r in results)
+    lines = [f"🩺 **Health Check** ({len(results) - failed}/{len(results)} up, {elapsed * 1000:.0f}ms):"]
+    for r in sorted(results, key=lambda r: (r.status == "ok", r.name)):
+        latency = f"{r.latency * 1000:.0f}ms" if r.latency is not None else "-"
+        lines.append(f"{STATUS_ICONS[r.status]} {r.name} ({latency}): {r.detail}")
+    return "\n".join(lines)
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Probe homelab services concurrently")
+    parser.add_argument("--targets", default=os.getenv("HEALTH_TARGETS_FILE"),
+                        help="JSON file with the target list (default: homelab services)")
+    parser.add_argument("--timeout", type=float, default=float(os.getenv("HEALTH_PROBE_TIMEOUT", "5")),
+                        help="Default per-probe deadline, seconds")
+    parser.add_argument("--only", default="", help="Comma-separated target names")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    prober = HealthProber(load_targets(args.targets), timeout=args.timeout)
+    started = time.perf_counter()
+    try:
+        results = await prober.run([n.strip().lower() for n in args.only.split(',') if n.strip()])
+    finally:
+        await prober.close()
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({"elapsed": elapsed, "results": [asdict(r) for r in results]}, indent=2))
+    else:
+        print(format_results(results, elapsed).replace("**", ""))
+    return 1 if any(r.status == "fail" for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
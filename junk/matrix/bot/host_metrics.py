@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Host metrics sampler for the monitoring bot
+Collects system statistics in a background thread so commands answer from memory
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import platform
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from hardware import read_gpus
+from io_rates import (DISK_FIELDS, LOOPBACK, NET_FIELDS, CounterRates, disk_rates, interface_rates,
+                      is_whole_disk, totals)
+from container_stats import DockerStatsCollector
+from metrics_history import DEFAULT_TIERS, MetricsHistory
+from proc_reader import ProcReader, disk_usage, network_totals
+
+logger = logging.getLogger(__name__)
+
+def _psutil():
+    """psutil, imported on first use: on Linux the /proc reader usually makes it unnecessary"""
+    import psutil
+    return psutil
+
+class HostMetricsSampler:
+    """
+    Periodically samples host metrics off the event loop
+
+    Cheap counters (CPU, memory, swap, disk, network) are read every
+    `interval` seconds; temperature sensors and GPUs, which shell out or
+    walk sysfs, every `slow_interval`. CPU usage is the average since the
+    previous sample, so nothing sleeps; network and disk I/O rates are
+    likewise computed from the counters of successive samples. Each round
+    builds a new snapshot dict and swaps it in whole, so readers never see
+    a half-updated one. Every snapshot is also added to a fixed-size
+    multi-resolution history, as are the stats of up to
+    `max_container_histories` containers when Docker is reachable. On
+    Linux a ProcReader reads the counters straight from /proc and /sys;
+    psutil covers other platforms and whatever the reader cannot, and is
+    only imported then.
+    """
+
+    def __init__(self, interval: float = 5.0, slow_interval: float = 30.0, disk_path: str = "/",
+                 history_tiers: str = DEFAULT_TIERS, containers: Optional[DockerStatsCollector] = None,
+                 max_container_histories: int = 16, proc: Optional[ProcReader] = None):
+        self.interval = interval
+        self.slow_interval = slow_interval
+        self.disk_path = disk_path
+        self.history_tiers = history_tiers
+        self.history = MetricsHistory.from_spec(history_tiers, base_step=interval)
+        self.containers = containers
+        self.container_history: Dict[str, MetricsHistory] = {}
+        self.max_container_histories = max_container_histories
+        self.proc = proc
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+        # Static facts are read once
+        self.system = {
+            'hostname': socket.gethostname(),
+            'platform': f"{platform.system()} {platform.release()}",
+            'boot_time': proc.boot_time() if proc else _psutil().boot_time(),
+            'cores': os.cpu_count()
+        }
+
+        self._snapshot: Dict[str, Any] = {}
+        self._net_rates = CounterRates(NET_FIELDS)
+        self._disk_rates = CounterRates(DISK_FIELDS)
+        self._last_slow = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.samples = 0
+        self.last_duration = 0.0
+
+    @classmethod
+    def from_env(cls) -> "HostMetricsSampler":
+        return cls(
+            interval=float(os.getenv("HOST_METRICS_INTERVAL", "5")),
+            slow_interval=float(os.getenv("HOST_METRICS_SLOW_INTERVAL", "30")),
+            disk_path=os.getenv("HOST_METRICS_DISK_PATH", "/"),
+            history_tiers=os.getenv("HOST_METRICS_HISTORY", DEFAULT_TIERS),
+            containers=DockerStatsCollector.from_env(),
+            proc=ProcReader.open()
+        )
+
+    async def start(self):
+        if self._task is None:
+            # First call only sets the baseline
+            self.proc.cpu_percent() if self.proc else _psutil().cpu_percent(interval=None)
+            if self.containers:
+                await self.containers.start()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.containers:
+            await self.containers.stop()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                slow = time.monotonic() - self._last_slow >= self.slow_interval
+                snapshot = await asyncio.to_thread(self._collect, slow)
+                if slow:
+                    self._last_slow = time.monotonic()
+                snapshot['containers'] = self.containers.latest() if self.containers else {}
+                snapshot['container_restarts'] = dict(self.containers.restarts) if self.containers else {}
+                self._snapshot = snapshot
+                self.history.record_snapshot(snapshot)
+                self._record_containers(snapshot['timestamp'], snapshot['containers'])
+            except Exception as e:
+                logger.error(f"❌ Metrics sampling error: {e}")
+            else:
+                for listener in self._listeners:
+                    try:
+                        listener(snapshot)
+                    except Exception as e:
+                        logger.error(f"❌ Metrics listener error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call `listener(snapshot)` on the event loop after every sample"""
+        self._listeners.append(listener)
+
+    def _record_containers(self, timestamp: float, containers: Dict[str, Dict[str, Any]]):
+        for name, stats in containers.items():
+            history = self.container_history.get(name)
+            if history is None:
+                if len(self.container_history) >= self.max_container_histories:
+                    # Make room by dropping a container that is no longer running
+                    gone = next((n for n in self.container_history if n not in containers), None)
+                    if gone is None:
+                        continue
+                    del self.container_history[gone]
+                history = MetricsHistory.from_spec(self.history_tiers, base_step=self.interval,
+                                                   metrics=("cpu", "memory"))
+                self.container_history[name] = history
+            history.record(timestamp, {"cpu": stats['cpu'], "memory": stats['memory_percent']})
+
+    def _collect(self, slow: bool) -> Dict[str, Any]:
+        """Runs in a worker thread"""
+        started = time.perf_counter()
+        snapshot = None
+        if self.proc:
+            try:
+                snapshot = self._collect_proc()
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ /proc reader failed, switching to psutil: {e}")
+                self.proc.close()
+                self.proc = None
+        if snapshot is None:
+            snapshot = self._collect_psutil()
+        interfaces = snapshot['interfaces']
+        # Empty on the first round, when there is nothing to compare against
+        snapshot['io'] = {
+            **totals(interfaces, 'rx', 'tx', 'rx_packets', 'tx_packets', skip=LOOPBACK),
+            **totals(snapshot['disks'], 'read', 'write', 'read_iops', 'write_iops')
+        } if interfaces or snapshot['disks'] else {}
+
+        if slow:
+            snapshot['temperatures'] = self._read_temperatures()
+            snapshot['gpu'] = self._read_gpus()
+        else:
+            snapshot['temperatures'] = self._snapshot.get('temperatures', {})
+            snapshot['gpu'] = self._snapshot.get('gpu', [])
+
+        self.samples += 1
+        self.last_duration = time.perf_counter() - started
+        return snapshot
+
+    def _collect_proc(self) -> Dict[str, Any]:
+        memory, swap = self.proc.memory()
+        net_names, net_row = self.proc.network()
+        disk_names, disk_row = self.proc.disks()
+        now = time.monotonic()
+        return {
+            'timestamp': time.time(),
+            'cpu': {'usage': self.proc.cpu_percent(), 'cores': self.system['cores'],
+                    'frequency': self.proc.cpu_frequency()},
+            'memory': memory,
+            'swap': swap,
+            'disk': disk_usage(self.disk_path),
+            'network': network_totals(net_row),
+            'interfaces': interface_rates(self._net_rates.update_row(now, net_names, net_row)),
+            'disks': disk_rates(self._disk_rates.update_row(now, disk_names, disk_row))
+        }
+
+    def _collect_psutil(self) -> Dict[str, Any]:
+        psutil = _psutil()
+        freq = psutil.cpu_freq()
+        snapshot = {
+            'timestamp': time.time(),
+            'cpu': {
+                'usage': psutil.cpu_percent(interval=None),
+                'cores': self.system['cores'],
+                'frequency': freq.current if freq else None
+            },
+            'memory': psutil.virtual_memory()._asdict(),
+            'swap': psutil.swap_memory()._asdict(),
+            'disk': psutil.disk_usage(self.disk_path)._asdict(),
+            'network': psutil.net_io_counters()._asdict()
+        }
+        now = time.monotonic()
+        disks = {name: counters for name, counters in (psutil.disk_io_counters(perdisk=True) or {}).items()
+                 if is_whole_disk(name)}
+        snapshot['interfaces'] = interface_rates(self._net_rates.update(now, psutil.net_io_counters(pernic=True)))
+        snapshot['disks'] = disk_rates(self._disk_rates.update(now, disks))
+        return snapshot
+
+    def _read_temperatures(self) -> Dict[str, float]:
+        if self.proc:
+            return self.proc.temperatures()
+        temperatures = {}
+        try:
+            for name, entries in (_psutil().sensors_temperatures() or {}).items():
+                for entry in entries:
+                    temperatures[entry.label or name] = entry.current
+        except (AttributeError, OSError):
+            pass  # not supported on this platform
+        return temperatures
+
+    def _read_gpus(self) -> List[Dict[str, str]]:
+        return read_gpus()
+
+    def latest(self, section: str) -> Optional[Any]:
+        """Most recent reading of one section, or None before the first sample"""
+        return self._snapshot.get(section)
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the latest sample"""
+        timestamp = self._snapshot.get('timestamp')
+        return time.time() - timestamp if timestamp else None
+
+    def uptime(self) -> str:
+        return str(datetime.timedelta(seconds=int(time.time() - self.system['boot_time'])))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Network and disk I/O rates for the monitoring bot
+Turns psutil's lifetime counters into per-interface and per-disk rates between samples
+"""
+
+import logging
+import os
+import sys
+from array import array
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+NET_FIELDS = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv", "errin", "errout")
+DISK_FIELDS = ("read_count", "write_count", "read_bytes", "write_bytes", "read_time", "write_time", "busy_time")
+
+# Excluded from totals: loopback traffic never leaves the host
+LOOPBACK = ("lo", "lo0")
+
+# Only these kernels report busy_time; elsewhere it reads as 0, which is not an idle disk
+HAS_BUSY_TIME = sys.platform.startswith(("linux", "freebsd"))
+
+def counter_delta(current: int, previous: int) -> int:
+    """
+    Increase of a counter between two readings
+
+    A counter that went down either wrapped (32-bit counters from some
+    drivers, or 64-bit ones) or was reset because the device was
+    re-created; a wrap is only assumed when the old value was close to
+    the limit.
+    """
+    if current >= previous:
+        return current - previous
+    if 2**31 <= previous < 2**32:
+        return current + 2**32 - previous
+    if previous >= 2**63:
+        return current + 2**64 - previous
+    return current
+
+class CounterRates:
+    """
+    Per-second rates of a set of counters for every device
+
+    Readings of all devices are flattened into one row in a fixed field
+    order, so each update is a single pass over two aligned rows instead
+    of per-device, per-field lookups; the previous row is kept in an
+    array that is overwritten in place. Devices that appear are reported
+    from their second reading; devices that disappear are dropped.
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self._timestamp: Optional[float] = None
+        self._names: Tuple[str, ...] = ()
+        self._row = array('Q')
+
+    def update(self, timestamp: float, counters: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """Record one reading (psutil namedtuples by device) and return rates since the last one"""
+        names = tuple(counters)
+        row = array('Q', [getattr(counters[name], field, 0) for name in names for field in self.fields])
+        return self.update_row(timestamp, names, row)
+
+    def update_row(self, timestamp: float, names: Tuple[str, ...], row: Sequence[int]) -> Dict[str, Dict[str, float]]:
+        """Record one reading given as a flat row, the fields of each device in `names` order"""
+        previous_time, previous_names, previous_row = self._timestamp, self._names, self._row
+        rates: Dict[str, Dict[str, float]] = {}
+        width = len(self.fields)
+        if previous_time is not None and timestamp > previous_time:
+            elapsed = timestamp - previous_time
+            if names == previous_names:
+                deltas = [counter_delta(c, p) / elapsed for c, p in zip(row, previous_row)]
+                for i, name in enumerate(names):
+                    rates[name] = dict(zip(self.fields, deltas[i * width:(i + 1) * width]))
+            else:
+                # Devices came or went: line rows up by name
+                old = {name: i for i, name in enumerate(previous_names)}
+                for i, name in enumerate(names):
+                    j = old.get(name)
+                    if j is not None:
+                        rates[name] = {field: counter_delta(row[i * width + k], previous_row[j * width + k]) / elapsed
+                                       for k, field in enumerate(self.fields)}
+
+        self._timestamp, self._names = timestamp, names
+        self._row[:] = row if isinstance(row, array) else array('Q', row)
+        return rates
+
+def interface_rates(rates: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {name: {
+        'tx': r['bytes_sent'],
+        'rx': r['bytes_recv'],
+        'tx_packets': r['packets_sent'],
+        'rx_packets': r['packets_recv'],
+        'errors': r['errin'] + r['errout']
+    } for name, r in rates.items()}
+
+def disk_rates(rates: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, Optional[float]]]:
+    disks = {}
+    for name, r in rates.items():
+        ops = r['read_count'] + r['write_count']
+        disks[name] = {
+            'read': r['read_bytes'],
+            'write': r['write_bytes'],
+            'read_iops': r['read_count'],
+            'write_iops': r['write_count'],
+            # Milliseconds spent per completed request, like iostat's await
+            'await': (r['read_time'] + r['write_time']) / ops if ops else None,
+            # busy_time is ms of activity per second
+            'util': min(100.0, r['busy_time'] / 10) if HAS_BUSY_TIME else None
+        }
+    return disks
+
+_whole_disks: Dict[str, bool] = {}
+
+def is_whole_disk(name: str) -> bool:
+    """True for disks, False for partitions and loop/ram devices (whose I/O is counted twice)"""
+    if name not in _whole_disks:
+        _whole_disks[name] = (not name.startswith(("loop", "ram"))
+                              and not os.path.exists(f"/sys/class/block/{name}/partition"))
+    return _whole_disks[name]
+
+def totals(devices: Dict[str, Dict[str, Optional[float]]], *keys: str, skip: Sequence[str] = ()) -> Dict[str, float]:
+    """Sum of the given rates over all devices"""
+    return {key: sum(d[key] or 0 for name, d in devices.items() if name not in skip) for key in keys}
@@ -16,15 +16,6 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
 
 from agents.llm_agent import LLMAgent
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('/app/store/llm_agent.log', mode='a')
-    ]
-)
 logger = logging.getLogger(__name__)
 
 class LLMAgentLauncher:
@@ -143,6 +134,15 @@ async def health_check():
 
 async def main():
     """Main function"""
+    # Set up logging here, not at import, so importing the launcher does not need /app/store
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler('/app/store/llm_agent.log', mode='a')
+        ]
+    )
     logger.info("🚀 Matrix LLM Agent Launcher")
     logger.info("============================")
 
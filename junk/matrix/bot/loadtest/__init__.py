@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Offline Load Testing Package
+In-process stand-ins for Synapse, Ollama and Docker plus a load generator for the bots and agents
+"""
+
+from .fake_docker import FakeDocker
+from .fake_homeserver import FakeHomeserver
+from .fake_ollama import FakeOllama
+
+__all__ = [
+    'FakeDocker',
+    'FakeHomeserver',
+    'FakeOllama'
+]
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Offline Load Test CLI
+python -m loadtest serve | run [--in-process] - fake backends and load generation for the bots
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+from typing import List, Optional
+
+# Launchers import agents the same way (see agent_host.py)
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.join(BOT_DIR, 'agents'))
+
+from loadtest.fake_docker import FakeDocker
+from loadtest.fake_homeserver import FakeHomeserver
+from loadtest.fake_ollama import FakeOllama
+from loadtest.loadgen import format_report, parse_mix, run_load
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("loadtest")
+
+async def start_backends(args) -> List:
+    homeserver = FakeHomeserver(domain=args.domain, host=args.host, port=args.hs_port, latency=args.hs_latency)
+    ollama = FakeOllama(host=args.host, port=args.ollama_port, token_rate=args.token_rate,
+                        latency=args.ollama_latency, response_tokens=args.response_tokens,
+                        parallel=args.parallel)
+    await homeserver.start()
+    await ollama.start()
+    return [homeserver, ollama]
+
+async def start_agents(homeserver: FakeHomeserver, ollama: FakeOllama, names: List[str]):
+    """Run the real agents in an AgentHost against the fake backends"""
+    from agents.host import AgentHost, load_agent_class
+
+    os.environ.setdefault("COORDINATION_ROOM_ID", f"!coordination:{homeserver.domain}")
+    store_root = tempfile.mkdtemp(prefix="loadtest-")
+    host = AgentHost(sync_mode="shared")
+    for name in names:
+        agent = load_agent_class(name)(
+            homeserver_url=homeserver.url,
+            username=f"@{name}:{homeserver.domain}",
+            password="loadtest",
+            store_path=os.path.join(store_root, name)
+        )
+        if hasattr(agent, "ollama_url"):
+            agent.ollama_url = ollama.url
+        host.add(agent)
+
+    if not await host.start():
+        raise RuntimeError("Agents failed to start against the fake homeserver")
+    task = asyncio.create_task(host.run())
+    return host, task
+
+async def serve(args):
+    servers = await start_backends(args)
+    print(f"🏠 Homeserver: {servers[0].url}  (MATRIX_HOMESERVER_URL, any password)")
+    print(f"🦙 Ollama:     {servers[1].url}  (OLLAMA_URL)")
+    if args.docker_socket:
+        docker = FakeDocker(args.docker_socket)
+        await docker.start()
+        servers.append(docker)
+        print(f"🐳 Docker:     {args.docker_socket}  (DOCKER_SOCKET)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for server in servers:
+            await server.stop()
+
+async def run(args) -> int:
+    servers = []
+    host = sync_task = None
+    homeserver_url: Optional[str] = args.homeserver
+    bots = [b.strip() for b in args.bots.split(',') if b.strip()]
+
+    if args.in_process:
+        servers = await start_backends(args)
+        homeserver_url = servers[0].url
+        names = [n.strip() for n in args.agents.split(',') if n.strip()]
+        host, sync_task = await start_agents(servers[0], servers[1], names)
+        bots = bots or [f"@{name}:{args.domain}" for name in names]
+        # Give agents a moment to announce and discover each other
+        await asyncio.sleep(args.warmup)
+    elif not homeserver_url:
+        print("❌ Pass --homeserver URL or --in-process")
+        return 1
+
+    mix = parse_mix(args.mix)
+    if "bbot" in mix and not any(b.startswith("@bbot") for b in bots):
+        logger.warning("bbot commands need the enhanced bot invited via --bots; they may time out")
+
+    try:
+        summary = await run_load(
+            homeserver_url, args.domain, bots,
+            users=args.users, duration=args.duration, mix=mix,
+            think_time=args.think_time, settle=args.settle,
+            reply_timeout=args.timeout, seed=args.seed
+        )
+    finally:
+        if sync_task:
+            sync_task.cancel()
+            await host.stop()
+        for server in servers:
+            await server.stop()
+
+    print(format_report(summary))
+    if servers:
+        print(f"\n🏠 Homeserver: {servers[0].stats}")
+        print(f"🦙 Ollama:     {servers[1].stats}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__.strip().split('\n')[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def backend_options(sub):
+        sub.add_argument("--domain", default="localhost")
+        sub.add_argument("--host", default="127.0.0.1")
+        sub.add_argument("--hs-port", type=int, default=8008)
+        sub.add_argument("--hs-latency", type=float, default=0.0, help="Added to every homeserver request, s")
+        sub.add_argument("--ollama-port", type=int, default=11434)
+        sub.add_argument("--ollama-latency", type=float, default=0.1, help="Prefill time per request, s")
+        sub.add_argument("--token-rate", type=float, default=50.0, help="Generated tokens per second")
+        sub.add_argument("--response-tokens", type=int, default=48)
+        sub.add_argument("--parallel", type=int, default=4, help="Concurrent Ollama requests")
+
+    serve_parser = commands.add_parser("serve", help="Run the fake homeserver and Ollama until interrupted")
+    backend_options(serve_parser)
+    serve_parser.add_argument("--docker-socket", help="Also serve a fake Docker Engine API on this unix socket")
+
+    run_parser = commands.add_parser("run", help="Generate load and report latency percentiles")
+    backend_options(run_parser)
+    run_parser.add_argument("--in-process", action="store_true",
+                            help="Start fake backends and the agents in this process")
+    run_parser.add_argument("--homeserver", help="Homeserver to load (e.g. one started with 'serve')")
+    run_parser.add_argument("--agents", default="orchestrator,llm", help="Agents to host with --in-process")
+    run_parser.add_argument("--bots", default="", help="Comma-separated user ids to invite to each user's room")
+    run_parser.add_argument("--users", type=int, default=10)
+    run_parser.add_argument("--duration", type=float, default=60.0, help="Seconds")
+    run_parser.add_argument("--mix", default="llm=4,ask=2,chain=1", help="e.g. llm=4,ask=2,chain=1,bbot=1")
+    run_parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between commands, s")
+    run_parser.add_argument("--settle", type=float, default=1.0, help="Quiet period after a completing reply, s")
+    run_parser.add_argument("--timeout", type=float, default=60.0, help="Wait for a completing reply, s")
+    run_parser.add_argument("--warmup", type=float, default=2.0, help="Agent discovery time with --in-process, s")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--json", help="Also write the summary here")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args))
+        else:
+            sys.exit(asyncio.run(run(args)))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Fake Docker Engine API for offline testing
+Serves /containers/json, /events and streaming /containers/{id}/stats on a unix socket with synthetic load
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# name -> (average cores busy, resident MB, network KB/s, disk KB/s)
+DEFAULT_CONTAINERS = {
+    "ollama": (2.5, 6144, 40, 20000),
+    "matrix-synapse": (0.3, 512, 200, 150),
+    "qdrant": (0.1, 256, 10, 60),
+    "redis": (0.05, 32, 30, 5)
+}
+
+class FakeDocker:
+    """
+    Docker Engine stand-in listening on a unix socket
+
+    Each container's counters grow at its configured rate with a slow
+    sine wobble, so CPU percentages and I/O rates computed from them
+    look like a live host. `/containers/{id}/stats` streams one document
+    every `interval` seconds (Docker's own cadence is 1s) and answers
+    once with `stream=false`. `restart()` emits a start event on `/events`
+    and resets the container's counters, as a real restart would.
+    """
+
+    def __init__(self,
+                 socket_path: str,
+                 containers: Optional[Dict[str, tuple]] = None,
+                 interval: float = 1.0,
+                 cores: int = 8,
+                 memory_limit: int = 32 * 1024**3):
+        self.socket_path = socket_path
+        self.interval = interval
+        self.cores = cores
+        self.memory_limit = memory_limit
+        self.started = time.monotonic()
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        for name, profile in (containers or DEFAULT_CONTAINERS).items():
+            self.add(name, profile)
+        self._runner: Optional[web.AppRunner] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._closing = False
+
+        self.stats = {"list_requests": 0, "streams": 0, "documents": 0}
+
+    def add(self, name: str, profile: tuple):
+        container_id = hashlib.sha256(name.encode()).hexdigest()
+        self.containers[container_id] = {"name": name, "profile": profile, "created": time.monotonic()}
+
+    def restart(self, name: str):
+        for container_id, container in self.containers.items():
+            if container["name"] == name:
+                container["created"] = time.monotonic()
+                event = {"Type": "container", "Action": "start", "status": "start", "id": container_id,
+                         "Actor": {"ID": container_id, "Attributes": {"name": name}}, "time": int(time.time())}
+                for queue in self._subscribers:
+                    queue.put_nowait(event)
+
+    def remove(self, name: str):
+        for container_id, container in list(self.containers.items()):
+            if container["name"] == name:
+                del self.containers[container_id]
+
+    async def start(self):
+        self._closing = False
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.UnixSite(self._runner, self.socket_path).start()
+        logger.info(f"🐳 Fake Docker listening on {self.socket_path} ({len(self.containers)} containers)")
+
+    async def stop(self):
+        # End open /events and stats streams, or the runner waits out its shutdown timeout for them
+        self._closing = True
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/containers/json", self._on_list)
+        app.router.add_get("/containers/{id}/stats", self._on_stats)
+        app.router.add_get("/events", self._on_events)
+        return app
+
+    async def _on_list(self, request: web.Request) -> web.Response:
+        self.stats["list_requests"] += 1
+        return web.json_response([{
+            "Id": container_id,
+            "Names": [f"/{c['name']}"],
+            "Image": c['name'],
+            "State": "running",
+            "Status": "Up"
+        } for container_id, c in self.containers.items()])
+
+    async def _on_events(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        await response.prepare(request)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                await response.write((json.dumps(event) + "\n").encode())
+        except ConnectionResetError:
+            return response
+        finally:
+            self._subscribers.remove(queue)
+        return response
+
+    async def _on_stats(self, request: web.Request) -> web.StreamResponse:
+        container_id = request.match_info["id"]
+        if container_id not in self.containers:
+            return web.json_response({"message": f"No such container: {container_id}"}, status=404)
+
+        if request.query.get("stream", "true").lower() in ("false", "0"):
+            before = self._counters(container_id, time.monotonic())
+            await asyncio.sleep(self.interval)
+            return web.json_response(self._document(container_id, self._counters(container_id, time.monotonic()), before))
+
+        self.stats["streams"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        await response.prepare(request)
+        before = None
+        while container_id in self.containers and not self._closing:
+            current = self._counters(container_id, time.monotonic())
+            # Like Docker, the first document has an empty precpu_stats
+            document = self._document(container_id, current, before or {**current, "cpu_total": 0, "system_total": 0})
+            before = current
+            try:
+                await response.write((json.dumps(document) + "\n").encode())
+            except ConnectionResetError:
+                return response  # client went away
+            self.stats["documents"] += 1
+            await asyncio.sleep(self.interval)
+        try:
+            await response.write_eof()
+        except ConnectionResetError:
+            pass  # client went away while the container was being removed
+        return response
+
+    def _counters(self, container_id: str, at: float) -> Dict[str, Any]:
+        """Cumulative counters of a container at monotonic time `at`"""
+        container = self.containers[container_id]
+        cores, memory_mb, net_kb, disk_kb = container["profile"]
+        elapsed = max(0.0, at - container["created"])
+        # Integral of rate * (1 + 0.5 sin(t / 20)), so load rises and falls
+        wobble = elapsed + 10 * (1 - math.cos(elapsed / 20))
+        return {
+            "cpu_total": int(cores * wobble * 1e9),
+            "system_total": int(self.cores * (at - self.started + 1000) * 1e9),
+            "memory": int(memory_mb * 1024**2 * (1 + 0.05 * math.sin(elapsed / 30))),
+            "net": int(net_kb * 1024 * wobble),
+            "disk": int(disk_kb * 1024 * wobble)
+        }
+
+    def _document(self, container_id: str, current: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "read": _now(),
+            "name": f"/{self.containers[container_id]['name']}",
+            "id": container_id,
+            "cpu_stats": _cpu(current, self.cores),
+            "precpu_stats": _cpu(before, self.cores),
+            "memory_stats": {
+                "usage": current["memory"] + 64 * 1024**2,
+                "limit": self.memory_limit,
+                "stats": {"inactive_file": 64 * 1024**2}
+            },
+            "networks": {"eth0": {"rx_bytes": current["net"], "tx_bytes": current["net"] // 2}},
+            "blkio_stats": {"io_service_bytes_recursive": [
+                {"major": 259, "minor": 0, "op": "read", "value": current["disk"]},
+                {"major": 259, "minor": 0, "op": "write", "value": current["disk"] // 10}
+            ]},
+            "pids_stats": {"current": 12}
+        }
+
+def _cpu(counters: Dict[str, Any], cores: int) -> Dict[str, Any]:
+    return {
+        "cpu_usage": {"total_usage": counters["cpu_total"]},
+        "system_cpu_usage": counters["system_total"],
+        "online_cpus": cores
+    }
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Fake Matrix homeserver for offline testing
+Implements just enough of the client-server API (login, rooms, sync, send, media) for matrix-nio clients
+and of the appservice API (as_token masquerading, pushed transactions) for the agent host
+"""
+
+import asyncio
+import logging
+import re
+import secrets
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+class FakeRoom:
+    __slots__ = ("room_id", "members", "creator")
+
+    def __init__(self, room_id: str, creator: str):
+        self.room_id = room_id
+        self.creator = creator
+        self.members: Set[str] = set()
+
+class FakeAppService:
+    """A registered appservice and how far its transactions have got"""
+
+    def __init__(self, registration: Dict[str, Any], domain: str, position: int):
+        self.id = registration["id"]
+        self.url = registration["url"].rstrip('/')
+        self.as_token = registration["as_token"]
+        self.hs_token = registration["hs_token"]
+        self.sender = f"@{registration['sender_localpart']}:{domain}"
+        self.user_regexes = [re.compile(n["regex"]) for n in registration["namespaces"].get("users", [])]
+        self.position = position  # first log position not yet pushed
+        self.next_txn = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def is_interested(self, user_id: str) -> bool:
+        return user_id == self.sender or any(r.fullmatch(user_id) for r in self.user_regexes)
+
+class FakeHomeserver:
+    """
+    Single-process stand-in for Synapse
+
+    Every password is accepted and users are created on first login. All
+    events go into one append-only log; a sync token is a position in it, so
+    /sync returns the slice after `since` filtered to the caller's rooms and
+    long-polls on an asyncio.Event when there is nothing new; an initial
+    sync returns the last `initial_timeline` events of each room. The log is
+    trimmed to `max_events`; a client that falls further behind gets a
+    limited timeline, as with Synapse.
+
+    With auto_accept_invites, invited users join immediately, standing in
+    for bots that accept invites. `latency` delays every response.
+
+    Appservices added with register_appservice() authenticate with their
+    as_token, act as any user in their namespace via ?user_id=, register
+    those users, and get every event in rooms where one of them is a member
+    PUT to /_matrix/app/v1/transactions/{txnId}, in order; a failed push is
+    retried with the same transaction id, as Synapse does.
+    """
+
+    def __init__(self,
+                 domain: str = "localhost",
+                 host: str = "127.0.0.1",
+                 port: int = 8008,
+                 latency: float = 0.0,
+                 auto_accept_invites: bool = True,
+                 max_events: int = 100000,
+                 initial_timeline: int = 20):
+        self.domain = domain
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.auto_accept_invites = auto_accept_invites
+        self.max_events = max_events
+        self.initial_timeline = initial_timeline
+
+        self.tokens: Dict[str, str] = {}  # access token -> user id
+        self.rooms: Dict[str, FakeRoom] = {}
+        self._log: List[Tuple[str, Dict[str, Any]]] = []  # (room_id, event)
+        self._log_base = 0  # sync position of _log[0]
+        self._txns: Dict[Tuple[str, str], str] = {}
+        self.media: Dict[str, Tuple[str, bytes]] = {}  # media id -> (content type, data)
+        self.users: Set[str] = set()
+        self.appservices: Dict[str, FakeAppService] = {}  # as_token -> appservice
+        self._new_events = asyncio.Event()
+        self._closing = False
+        self._runner: Optional[web.AppRunner] = None
+        self._push_session: Optional[aiohttp.ClientSession] = None
+
+        self.stats = {"logins": 0, "syncs": 0, "sends": 0, "joins": 0, "uploads": 0, "downloads": 0,
+                      "transactions": 0}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def position(self) -> int:
+        return self._log_base + len(self._log)
+
+    async def start(self):
+        self._closing = False
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"🏠 Fake homeserver for {self.domain} listening on {self.url}")
+        for appservice in self.appservices.values():
+            self._start_pushing(appservice)
+
+    async def stop(self):
+        # Release long-polling /syncs, or the runner waits for them to time out
+        self._closing = True
+        self._new_events.set()
+        for appservice in self.appservices.values():
+            if appservice.task:
+                appservice.task.cancel()
+                appservice.task = None
+        if self._push_session:
+            await self._push_session.close()
+            self._push_session = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def register_appservice(self, registration: Dict[str, Any]) -> FakeAppService:
+        """Add an appservice (e.g. from agents.appservice.build_registration); it gets events from now on"""
+        appservice = FakeAppService(registration, self.domain, self.position)
+        self.appservices[appservice.as_token] = appservice
+        if self._runner:
+            self._start_pushing(appservice)
+        return appservice
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        prefix = "/_matrix/client/{version:(?:r0|v3)}"
+        app.router.add_get("/_matrix/client/versions", self._on_versions)
+        app.router.add_post(f"{prefix}/login", self._on_login)
+        app.router.add_post(f"{prefix}/logout", self._on_logout)
+        app.router.add_post(f"{prefix}/register", self._on_register)
+        app.router.add_get(f"{prefix}/account/whoami", self._on_whoami)
+        app.router.add_post(f"{prefix}/createRoom", self._on_create_room)
+        app.router.add_post(f"{prefix}/join/{{room_id}}", self._on_join)
+        app.router.add_post(f"{prefix}/rooms/{{room_id}}/join", self._on_join)
+        app.router.add_post(f"{prefix}/rooms/{{room_id}}/leave", self._on_leave)
+        app.router.add_post(f"{prefix}/rooms/{{room_id}}/invite", self._on_invite)
+        app.router.add_put(f"{prefix}/rooms/{{room_id}}/send/{{event_type}}/{{txn_id}}", self._on_send)
+        app.router.add_get(f"{prefix}/joined_rooms", self._on_joined_rooms)
+        app.router.add_get(f"{prefix}/sync", self._on_sync)
+        app.router.add_post("/_matrix/media/{version:(?:r0|v3)}/upload", self._on_upload)
+        app.router.add_get("/_matrix/media/{version:(?:r0|v3)}/download/{server}/{media_id}", self._on_download)
+        app.router.add_get("/_matrix/client/v1/media/download/{server}/{media_id}", self._on_download)
+        # Key endpoints answered empty so clients with encryption enabled keep syncing
+        app.router.add_post(f"{prefix}/keys/upload", self._on_keys_upload)
+        app.router.add_post(f"{prefix}/keys/query", self._on_keys_query)
+        app.router.add_post(f"{prefix}/keys/claim", self._on_keys_claim)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        try:
+            return await handler(request)
+        except web.HTTPNotFound:
+            logger.debug(f"Unimplemented endpoint {request.method} {request.path}")
+            return _error("M_UNRECOGNIZED", "Unrecognized request", 404)
+
+    # Rooms and events
+
+    def create_room(self, creator: str, room_id: Optional[str] = None) -> FakeRoom:
+        room_id = room_id or f"!{secrets.token_urlsafe(12)}:{self.domain}"
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = FakeRoom(room_id, creator)
+            self._append(room_id, self._event(creator, "m.room.create", {"creator": creator}, state_key=""))
+        return room
+
+    def join(self, room: FakeRoom, user_id: str):
+        if user_id in room.members:
+            return
+        room.members.add(user_id)
+        self.stats["joins"] += 1
+        self._append(room.room_id, self._event(user_id, "m.room.member", {"membership": "join"}, state_key=user_id))
+
+    def send(self, room_id: str, sender: str, event_type: str, content: Dict[str, Any]) -> str:
+        event = self._event(sender, event_type, content)
+        self._append(room_id, event)
+        self.stats["sends"] += 1
+        return event["event_id"]
+
+    def _event(self, sender: str, event_type: str, content: Dict[str, Any],
+               state_key: Optional[str] = None) -> Dict[str, Any]:
+        event = {
+            "type": event_type,
+            "sender": sender,
+            "content": content,
+            "event_id": f"${secrets.token_urlsafe(18)}",
+            "origin_server_ts": int(time.time() * 1000),
+            "unsigned": {}
+        }
+        if state_key is not None:
+            event["state_key"] = state_key
+        return event
+
+    def _append(self, room_id: str, event: Dict[str, Any]):
+        self._log.append((room_id, event))
+        if len(self._log) > self.max_events:
+            drop = len(self._log) - self.max_events
+            del self._log[:drop]
+            self._log_base += drop
+
+        # Wake every waiting /sync, then arm a fresh event for the next batch
+        self._new_events.set()
+        self._new_events = asyncio.Event()
+
+    def _member_state(self, room: FakeRoom) -> List[Dict[str, Any]]:
+        return [self._event(user_id, "m.room.member", {"membership": "join"}, state_key=user_id)
+                for user_id in sorted(room.members)]
+
+    # Handlers
+
+    def _user(self, request: web.Request) -> Optional[str]:
+        """User behind the request's token; appservices act as ?user_id= if it is in their namespace"""
+        auth = request.headers.get("Authorization", "")
+        token = auth[len("Bearer "):] if auth.startswith("Bearer ") else request.query.get("access_token", "")
+        appservice = self.appservices.get(token)
+        if appservice is None:
+            return self.tokens.get(token)
+        user_id = request.query.get("user_id") or appservice.sender
+        return user_id if appservice.is_interested(user_id) else None
+
+    async def _on_versions(self, request: web.Request) -> web.Response:
+        return web.json_response({"versions": ["r0.6.1", "v1.1", "v1.6"]})
+
+    async def _on_login(self, request: web.Request) -> web.Response:
+        body = await _json(request)
+        identifier = body.get("identifier") or {}
+        user = identifier.get("user") or body.get("user")
+        if not user:
+            return _error("M_BAD_JSON", "Missing user identifier", 400)
+        user_id = user if user.startswith("@") else f"@{user}:{self.domain}"
+
+        token = secrets.token_urlsafe(24)
+        self.tokens[token] = user_id
+        self.users.add(user_id)
+        self.stats["logins"] += 1
+        return web.json_response({
+            "user_id": user_id,
+            "access_token": token,
+            "device_id": body.get("device_id") or secrets.token_hex(5).upper(),
+            "home_server": self.domain
+        })
+
+    async def _on_logout(self, request: web.Request) -> web.Response:
+        auth = request.headers.get("Authorization", "")
+        self.tokens.pop(auth[len("Bearer "):], None)
+        return web.json_response({})
+
+    async def _on_register(self, request: web.Request) -> web.Response:
+        """Only appservice registration: open registration is off, as on the homelab server"""
+        body = await _json(request)
+        if body.get("type") != "m.login.application_service":
+            return _error("M_FORBIDDEN", "Registration has been disabled", 403)
+        user_id = f"@{body.get('username', '')}:{self.domain}"
+        auth = request.headers.get("Authorization", "")
+        appservice = self.appservices.get(auth[len("Bearer "):] if auth.startswith("Bearer ") else "")
+        if appservice is None:
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        if not appservice.is_interested(user_id):
+            return _error("M_EXCLUSIVE", f"{user_id} is not in the appservice namespace", 400)
+        if user_id in self.users:
+            return _error("M_USER_IN_USE", "User ID already taken", 400)
+        self.users.add(user_id)
+        return web.json_response({"user_id": user_id, "home_server": self.domain})
+
+    async def _on_whoami(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if not user_id:
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        return web.json_response({"user_id": user_id})
+
+    async def _on_create_room(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if not user_id:
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        body = await _json(request)
+        room = self.create_room(user_id)
+        self.join(room, user_id)
+        for invitee in body.get("invite", []):
+            self._invite(room, user_id, invitee)
+        return web.json_response({"room_id": room.room_id})
+
+    async def _on_join(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if not user_id:
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        # Unknown rooms (and aliases) are created on demand, e.g. COORDINATION_ROOM_ID
+        room = self.create_room(user_id, request.match_info["room_id"])
+        self.join(room, user_id)
+        return web.json_response({"room_id": room.room_id})
+
+    async def _on_leave(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        room = self.rooms.get(request.match_info["room_id"])
+        if not user_id or room is None or user_id not in room.members:
+            return _error("M_FORBIDDEN", "Not in room", 403)
+        room.members.discard(user_id)
+        self._append(room.room_id, self._event(user_id, "m.room.member", {"membership": "leave"}, state_key=user_id))
+        return web.json_response({})
+
+    async def _on_invite(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        room = self.rooms.get(request.match_info["room_id"])
+        if not user_id or room is None or user_id not in room.members:
+            return _error("M_FORBIDDEN", "Not in room", 403)
+        body = await _json(request)
+        self._invite(room, user_id, body.get("user_id", ""))
+        return web.json_response({})
+
+    def _invite(self, room: FakeRoom, inviter: str, invitee: str):
+        if not invitee.startswith("@"):
+            return
+        if self.auto_accept_invites:
+            self.join(room, invitee)
+        else:
+            self._append(room.room_id, self._event(inviter, "m.room.member", {"membership": "invite"}, state_key=invitee))
+
+    async def _on_send(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        room_id = request.match_info["room_id"]
+        room = self.rooms.get(room_id)
+        if not user_id:
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        if room is None or user_id not in room.members:
+            return _error("M_FORBIDDEN", f"{user_id} is not in {room_id}", 403)
+
+        # Retried transactions return the original event id
+        txn_key = (user_id, request.match_info["txn_id"])
+        event_id = self._txns.get(txn_key)
+        if event_id is None:
+            content = await _json(request)
+            event_id = self._txns[txn_key] = self.send(room_id, user_id, request.match_info["event_type"], content)
+        return web.json_response({"event_id": event_id})
+
+    async def _on_joined_rooms(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if not user_id:
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        return web.json_response({"joined_rooms": [r.room_id for r in self.rooms.values() if user_id in r.members]})
+
+    async def _on_sync(self, request: web.Request) -> web.Response:
+        user_id = self._user(request)
+        if not user_id:
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        self.stats["syncs"] += 1
+
+        since = request.query.get("since")
+        if since is None:
+            # Initial sync: current membership as state plus the last few events per room
+            return web.json_response(self._initial_sync(user_id))
+
+        try:
+            position = int(since)
+        except ValueError:
+            return _error("M_INVALID_PARAM", "Bad since token", 400)
+
+        timeout = min(int(request.query.get("timeout", "0") or 0), 60000) / 1000
+        if position >= self.position and timeout > 0 and not self._closing:
+            try:
+                await asyncio.wait_for(self._new_events.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return web.json_response(self._incremental_sync(user_id, position))
+
+    def _initial_sync(self, user_id: str) -> Dict[str, Any]:
+        rooms = {room.room_id: room for room in self.rooms.values() if user_id in room.members}
+        recent: Dict[str, List[Dict[str, Any]]] = {room_id: [] for room_id in rooms}
+        for room_id, event in reversed(self._log):
+            timeline = recent.get(room_id)
+            if timeline is not None and len(timeline) < self.initial_timeline:
+                timeline.append(event)
+        joined = {room_id: _joined_room(self._member_state(room), recent[room_id][::-1], False)
+                  for room_id, room in rooms.items()}
+        return _sync_response(str(self.position), joined, {})
+
+    def _incremental_sync(self, user_id: str, position: int) -> Dict[str, Any]:
+        limited = position < self._log_base
+        timelines: Dict[str, List[Dict[str, Any]]] = {}
+        invites: Dict[str, Any] = {}
+        for room_id, event in self._log[max(0, position - self._log_base):]:
+            room = self.rooms[room_id]
+            if user_id in room.members:
+                timelines.setdefault(room_id, []).append(event)
+            elif event.get("state_key") == user_id and event["content"].get("membership") == "invite":
+                invites[room_id] = {"invite_state": {"events": [event]}}
+
+        joined = {}
+        for room_id, events in timelines.items():
+            # Rooms the user just joined also get their member list as state
+            newly_joined = any(e.get("state_key") == user_id and e["type"] == "m.room.member" for e in events)
+            state = self._member_state(self.rooms[room_id]) if newly_joined or limited else []
+            joined[room_id] = _joined_room(state, events, limited)
+        return _sync_response(str(self.position), joined, invites)
+
+    async def _on_upload(self, request: web.Request) -> web.Response:
+        if not self._user(request):
+            return _error("M_UNKNOWN_TOKEN", "Unknown access token", 401)
+        media_id = secrets.token_urlsafe(16)
+        self.media[media_id] = (request.content_type, await request.read())
+        self.stats["uploads"] += 1
+        return web.json_response({"content_uri": f"mxc://{self.domain}/{media_id}"})
+
+    async def _on_download(self, request: web.Request) -> web.Response:
+        media = self.media.get(request.match_info["media_id"])
+        if media is None or request.match_info["server"] != self.domain:
+            return _error("M_NOT_FOUND", "Unknown media", 404)
+        self.stats["downloads"] += 1
+        return web.Response(body=media[1], content_type=media[0])
+
+    # Appservice transactions
+
+    def _start_pushing(self, appservice: FakeAppService):
+        if appservice.task is None:
+            if self._push_session is None:
+                self._push_session = aiohttp.ClientSession()
+            appservice.task = asyncio.create_task(self._push_transactions(appservice))
+
+    def _pending_for(self, appservice: FakeAppService) -> Tuple[List[Dict[str, Any]], int]:
+        """Events after the appservice's position in rooms it is interested in, and the new position"""
+        events = []
+        start = max(appservice.position, self._log_base)
+        for room_id, event in self._log[start - self._log_base:]:
+            room = self.rooms[room_id]
+            if (any(appservice.is_interested(member) for member in room.members)
+                    or appservice.is_interested(event.get("state_key", ""))):
+                events.append({**event, "room_id": room_id})
+        return events, self.position
+
+    async def _push_transactions(self, appservice: FakeAppService):
+        failures = 0
+        while True:
+            new_events = self._new_events
+            events, position = self._pending_for(appservice)
+            if not events:
+                appservice.position = position
+                await new_events.wait()
+                continue
+
+            txn_id = f"{appservice.next_txn}"
+            try:
+                async with self._push_session.put(
+                    f"{appservice.url}/_matrix/app/v1/transactions/{txn_id}",
+                    json={"events": events},
+                    headers={"Authorization": f"Bearer {appservice.hs_token}"}
+                ) as response:
+                    if response.status != 200:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, (), status=response.status, message=await response.text()
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Retry the same transaction with backoff, like Synapse
+                failures += 1
+                logger.debug(f"Transaction {txn_id} to appservice {appservice.id} failed: {e}")
+                await asyncio.sleep(min(0.1 * 2 ** failures, 5.0))
+                continue
+
+            failures = 0
+            appservice.position = position
+            appservice.next_txn += 1
+            self.stats["transactions"] += 1
+
+    async def _on_keys_upload(self, request: web.Request) -> web.Response:
+        return web.json_response({"one_time_key_counts": {}})
+
+    async def _on_keys_query(self, request: web.Request) -> web.Response:
+        return web.json_response({"device_keys": {}, "failures": {}})
+
+    async def _on_keys_claim(self, request: web.Request) -> web.Response:
+        return web.json_response({"one_time_keys": {}, "failures": {}})
+
+def _joined_room(state: List[Dict[str, Any]], timeline: List[Dict[str, Any]], limited: bool) -> Dict[str, Any]:
+    return {
+        "state": {"events": state},
+        "timeline": {"events": timeline, "limited": limited, "prev_batch": "0"},
+        "ephemeral": {"events": []},
+        "account_data": {"events": []},
+        "summary": {},
+        "unread_notifications": {"highlight_count": 0, "notification_count": 0}
+    }
+
+def _sync_response(next_batch: str, joined: Dict[str, Any], invites: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "next_batch": next_batch,
+        "rooms": {"join": joined, "invite": invites, "leave": {}},
+        "to_device": {"events": []},
+        "presence": {"events": []},
+        "account_data": {"events": []},
+        "device_lists": {"changed": [], "left": []},
+        "device_one_time_keys_count": {}
+    }
+
+def _error(errcode: str, error: str, status: int) -> web.Response:
+    return web.json_response({"errcode": errcode, "error": error}, status=status)
+
+async def _json(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+        return body if isinstance(body, dict) else {}
+    except ValueError:
+        return {}
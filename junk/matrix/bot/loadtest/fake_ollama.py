@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama server for offline testing
+Serves /api/chat, /api/generate, /api/embeddings and /api/tags with configurable latency and token rate
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Filler the fake model "generates", cycled to the requested length
+_WORDS = ("Back in my day we ran the whole homelab on one box and a prayer , and "
+          "we liked it . The trick is patience , good backups and a cup of coffee .").split()
+
+class FakeOllama:
+    """
+    Ollama stand-in with a simple performance model
+
+    A request waits for one of `parallel` slots (Ollama's NUM_PARALLEL), then
+    `latency` seconds of prefill, then emits `response_tokens` tokens (or the
+    request's smaller num_predict) at `token_rate` tokens per second. Streaming
+    responses send one NDJSON chunk per token; the final chunk carries the
+    same duration fields as Ollama, so tracing and stats work unchanged.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 11434,
+                 token_rate: float = 50.0,
+                 latency: float = 0.1,
+                 response_tokens: int = 48,
+                 parallel: int = 4,
+                 embedding_dim: int = 768,
+                 models: Optional[List[str]] = None):
+        self.host = host
+        self.port = port
+        self.token_rate = token_rate
+        self.latency = latency
+        self.response_tokens = response_tokens
+        self.embedding_dim = embedding_dim
+        self.models = models or ["llama3.2:latest", "nomic-embed-text:latest"]
+        self._slots = asyncio.Semaphore(parallel)
+        self._runner: Optional[web.AppRunner] = None
+
+        self.stats = {"requests": 0, "tokens": 0, "queued": 0}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"🦙 Fake Ollama listening on {self.url} "
+                    f"({self.token_rate:g} tok/s, {self.latency * 1000:.0f}ms latency)")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/tags", self._on_tags)
+        app.router.add_post("/api/chat", self._on_chat)
+        app.router.add_post("/api/generate", self._on_generate)
+        app.router.add_post("/api/embeddings", self._on_embeddings)
+        return app
+
+    async def _on_tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{
+            "name": name,
+            "model": name,
+            "modified_at": _now(),
+            "size": 2019393189,
+            "digest": hashlib.sha256(name.encode()).hexdigest(),
+            "details": {"family": name.split(':')[0], "parameter_size": "3.2B", "quantization_level": "Q4_K_M"}
+        } for name in self.models]})
+
+    async def _on_chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        return await self._complete(request, body, prompt, chat=True)
+
+    async def _on_generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        return await self._complete(request, body, str(body.get("prompt", "")), chat=False)
+
+    async def _on_embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        async with self._slot():
+            await asyncio.sleep(self.latency)
+        return web.json_response({"embedding": _embedding(str(body.get("prompt", "")), self.embedding_dim)})
+
+    async def _complete(self, request: web.Request, body: Dict[str, Any], prompt: str,
+                        chat: bool) -> web.StreamResponse:
+        model = body.get("model", self.models[0])
+        options = body.get("options") or {}
+        # Answers run to response_tokens, as if the model stopped there, unless num_predict cuts them short
+        limit = int(options.get("num_predict") or 0)
+        count = min(limit, self.response_tokens) if limit > 0 else self.response_tokens
+        self.stats["tokens"] += count
+        tokens = [_WORDS[i % len(_WORDS)] + " " for i in range(count)]
+        prompt_tokens = max(1, len(prompt.split()))
+        stream = body.get("stream", True)  # Ollama streams unless told not to
+
+        started = time.perf_counter()
+        async with self._slot():
+            queued = time.perf_counter() - started
+            await asyncio.sleep(self.latency)
+            prefill = time.perf_counter() - started - queued
+
+            if not stream:
+                await asyncio.sleep(count / self.token_rate)
+                timings = _timings(started, queued, prefill, prompt_tokens, count)
+                return web.json_response({**_message(model, "".join(tokens), chat), "done": True, **timings})
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            interval = 1.0 / self.token_rate
+            next_at = time.perf_counter()
+            for token in tokens:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await response.write(_line({**_message(model, token, chat), "done": False}))
+            final = {**_message(model, "", chat), "done": True, "done_reason": "stop",
+                     **_timings(started, queued, prefill, prompt_tokens, count)}
+            await response.write(_line(final))
+            await response.write_eof()
+            return response
+
+    def _slot(self):
+        if self._slots.locked():
+            self.stats["queued"] += 1
+        self.stats["requests"] += 1
+        return self._slots
+
+def _message(model: str, text: str, chat: bool) -> Dict[str, Any]:
+    payload = {"model": model, "created_at": _now()}
+    if chat:
+        payload["message"] = {"role": "assistant", "content": text}
+    else:
+        payload["response"] = text
+    return payload
+
+def _timings(started: float, queued: float, prefill: float,
+             prompt_tokens: int, eval_count: int) -> Dict[str, int]:
+    total = time.perf_counter() - started
+    return {
+        "total_duration": int(total * 1e9),
+        "load_duration": 0,
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": int(prefill * 1e9),
+        "eval_count": eval_count,
+        "eval_duration": int(max(0.0, total - queued - prefill) * 1e9)
+    }
+
+def _embedding(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector: equal texts embed identically"""
+    digest = hashlib.sha256(text.encode()).digest()
+    values = [math.sin(digest[i % len(digest)] * (i + 1)) for i in range(dim)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _line(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload) + "\n").encode()
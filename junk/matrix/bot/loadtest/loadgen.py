@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Matrix bots and agents
+Simulated users issue !llm, !orchestrator and bbot commands and time the replies
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from nio import AsyncClient, LoginResponse, RoomCreateResponse, RoomMessageText
+
+from agents.llm_agent import OLD_PERSON_ACKNOWLEDGMENTS
+
+logger = logging.getLogger(__name__)
+
+_TOPICS = ("backups", "docker networking", "ZFS snapshots", "reverse proxies",
+           "GPU passthrough", "home automation", "VLANs", "log rotation")
+
+# Command kind -> templates; {topic} is filled per request
+COMMANDS: Dict[str, Tuple[str, ...]] = {
+    "llm": ("!llm explain {topic} briefly", "!llm what is the best way to handle {topic}?"),
+    "ask": ("!orchestrator ask llm give me one tip about {topic}",),
+    "chain": ("!orchestrator chain llm->llm summarize the tradeoffs of {topic}",),
+    "bbot": ("bbot ping", "bbot status", "bbot echo {topic}")
+}
+
+# Orchestrator notices posted while a command is still running
+_PROGRESS = ("📤 Asking", "🔄 Started", "⏳ Queued")
+
+# Command kind -> whether a reply body is the one that finishes the command
+COMPLETES: Dict[str, Callable[[str], bool]] = {
+    "llm": lambda body: body not in OLD_PERSON_ACKNOWLEDGMENTS,
+    "ask": lambda body: not body.startswith(_PROGRESS),
+    "chain": lambda body: body.startswith(("✅ Workflow", "❌")),
+    "bbot": lambda body: True
+}
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'llm=4,ask=2,chain=1,bbot=1' -> weights"""
+    mix = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition('=')
+        kind = kind.strip()
+        if kind not in COMMANDS:
+            raise ValueError(f"Unknown command kind {kind!r}; use {', '.join(COMMANDS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Sample:
+    __slots__ = ("kind", "sent_at", "first_reply", "completed", "replies")
+
+    def __init__(self, kind: str, sent_at: float):
+        self.kind = kind
+        self.sent_at = sent_at
+        self.first_reply: Optional[float] = None  # seconds after sending
+        self.completed: Optional[float] = None
+        self.replies = 0
+
+class SimulatedUser:
+    """
+    One user in a private room with the bots, one command outstanding at a time
+
+    A command's first-reply latency is the time to the first bot message in
+    the room. It completes with the reply COMPLETES recognises for its kind:
+    the answer rather than the LLM agent's acknowledgement or orchestrator
+    progress notices, and the workflow result for a chain. A command with
+    no completing reply within `reply_timeout` counts as timed out. After
+    completion the user waits `settle` quiet seconds, so stragglers are not
+    taken for replies to the next command.
+    """
+
+    def __init__(self, index: int, homeserver: str, domain: str, password: str,
+                 bots: List[str], settle: float, reply_timeout: float):
+        self.user_id = f"@loaduser{index}:{domain}"
+        self.client = AsyncClient(homeserver, self.user_id)
+        self.password = password
+        self.bots = bots
+        self.settle = settle
+        self.reply_timeout = reply_timeout
+        self.room_id: Optional[str] = None
+
+        self.samples: List[Sample] = []
+        self._current: Optional[Sample] = None
+        self._reply = asyncio.Event()
+        self._done = asyncio.Event()
+        self._sync_task: Optional[asyncio.Task] = None
+
+    async def setup(self) -> bool:
+        response = await self.client.login(self.password, device_name="loadgen")
+        if not isinstance(response, LoginResponse):
+            logger.error(f"Login failed for {self.user_id}: {response}")
+            return False
+        response = await self.client.room_create(invite=self.bots, name=f"load {self.user_id}")
+        if not isinstance(response, RoomCreateResponse):
+            logger.error(f"Room creation failed for {self.user_id}: {response}")
+            return False
+        self.room_id = response.room_id
+
+        self.client.add_event_callback(self._on_message, RoomMessageText)
+        self._sync_task = asyncio.create_task(self.client.sync_forever(timeout=30000))
+        await self.client.synced.wait()
+        return True
+
+    async def _on_message(self, room, event: RoomMessageText):
+        sample = self._current
+        if room.room_id != self.room_id or event.sender == self.user_id or sample is None:
+            return
+        elapsed = time.perf_counter() - sample.sent_at
+        if sample.first_reply is None:
+            sample.first_reply = elapsed
+        if sample.completed is None and COMPLETES[sample.kind](event.body):
+            sample.completed = elapsed
+            self._done.set()
+        sample.replies += 1
+        self._reply.set()
+
+    async def run(self, mix: Dict[str, float], deadline: float, think_time: float, rng: random.Random):
+        kinds, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            body = rng.choice(COMMANDS[kind]).format(topic=rng.choice(_TOPICS))
+            await self.issue(kind, body)
+            if think_time:
+                await asyncio.sleep(rng.expovariate(1.0 / think_time))
+
+    async def issue(self, kind: str, body: str) -> Sample:
+        sample = Sample(kind, time.perf_counter())
+        self._current = sample
+        self._done.clear()
+        await self.client.room_send(self.room_id, "m.room.message", {"msgtype": "m.text", "body": body})
+
+        try:
+            await asyncio.wait_for(self._done.wait(), self.reply_timeout)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            while True:
+                self._reply.clear()
+                try:
+                    await asyncio.wait_for(self._reply.wait(), self.settle)
+                except asyncio.TimeoutError:
+                    break
+
+        self._current = None
+        self.samples.append(sample)
+        return sample
+
+    async def close(self):
+        if self._sync_task:
+            self._sync_task.cancel()
+        await self.client.close()
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """Per-kind and overall latency percentiles (ms) and throughput"""
+    def stats(group: List[Sample]) -> Dict[str, Any]:
+        answered = [s for s in group if s.completed is not None]
+        first = [s.first_reply * 1000 for s in group if s.first_reply is not None]
+        done = [s.completed * 1000 for s in answered]
+        return {
+            "sent": len(group),
+            "answered": len(answered),
+            "timeouts": len(group) - len(answered),
+            "throughput_per_s": round(len(answered) / elapsed, 2) if elapsed else 0.0,
+            "first_reply_ms": {f"p{int(q * 100)}": _round(percentile(first, q)) for q in (0.5, 0.95, 0.99)},
+            "complete_ms": {f"p{int(q * 100)}": _round(percentile(done, q)) for q in (0.5, 0.95, 0.99)}
+        }
+
+    kinds = sorted({s.kind for s in samples})
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "overall": stats(samples),
+        "by_kind": {kind: stats([s for s in samples if s.kind == kind]) for kind in kinds}
+    }
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+def format_report(summary: Dict[str, Any]) -> str:
+    lines = [f"📊 Load test results ({summary['elapsed_s']}s)", ""]
+    header = f"{'kind':<8} {'sent':>6} {'ok':>6} {'t/o':>5} {'req/s':>7}   " \
+             f"{'first p50/p95/p99 ms':>24}   {'complete p50/p95/p99 ms':>26}"
+    lines.append(header)
+    rows = list(summary["by_kind"].items()) + [("all", summary["overall"])]
+    for kind, s in rows:
+        first = "/".join(_fmt(s["first_reply_ms"][p]) for p in ("p50", "p95", "p99"))
+        done = "/".join(_fmt(s["complete_ms"][p]) for p in ("p50", "p95", "p99"))
+        lines.append(f"{kind:<8} {s['sent']:>6} {s['answered']:>6} {s['timeouts']:>5} "
+                     f"{s['throughput_per_s']:>7}   {first:>24}   {done:>26}")
+    return "\n".join(lines)
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+async def run_load(homeserver: str,
+                   domain: str,
+                   bots: List[str],
+                   users: int = 10,
+                   duration: float = 60.0,
+                   mix: Optional[Dict[str, float]] = None,
+                   think_time: float = 1.0,
+                   settle: float = 1.0,
+                   reply_timeout: float = 60.0,
+                   password: str = "loadtest",
+                   seed: int = 0) -> Dict[str, Any]:
+    """Log in `users` simulated users, run the command mix for `duration` seconds and summarize"""
+    mix = mix or parse_mix("llm=4,ask=2,chain=1")
+    simulated = [SimulatedUser(i, homeserver, domain, password, bots, settle, reply_timeout) for i in range(users)]
+
+    ready = await asyncio.gather(*(u.setup() for u in simulated))
+    active = [u for u, ok in zip(simulated, ready) if ok]
+    logger.info(f"🚀 {len(active)}/{users} users ready, running for {duration:.0f}s")
+
+    started = time.perf_counter()
+    deadline = started + duration
+    try:
+        await asyncio.gather(*(u.run(mix, deadline, think_time, random.Random(seed + i))
+                               for i, u in enumerate(active)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*(u.close() for u in simulated), return_exceptions=True)
+
+    return summarize([s for u in active for s in u.samples], elapsed)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+OpenMetrics exporter for the monitoring bot
+Serves the latest host sample and the bot's own counters on /metrics for Prometheus
+"""
+
+import bisect
+import logging
+import os
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from agents.metrics import LabelKey, format_labels
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+class Family:
+    """
+    One metric family: its header lines, and per series a prebuilt
+    'name{labels} ' prefix and a slot in a float array
+
+    Updating a series writes into its slot; the text prefixes are only
+    rebuilt when the set of series changes.
+    """
+
+    def __init__(self, name: str, kind: str, help_text: str, unit: str = ""):
+        self.name = name
+        self.kind = kind
+        self.header = f"# TYPE {name} {kind}\n" + (f"# UNIT {name} {unit}\n" if unit else "") + f"# HELP {name} {help_text}\n"
+        self.sample_name = f"{name}_total" if kind == "counter" else name
+        self.keys: List[LabelKey] = []
+        self.slots: Dict[LabelKey, int] = {}
+        self.values = array('d')
+        self.prefixes: List[str] = []
+
+    def slot(self, key: LabelKey) -> int:
+        index = self.slots.get(key)
+        if index is None:
+            index = self.slots[key] = len(self.keys)
+            self.keys.append(key)
+            self.values.append(0.0)
+            self.prefixes.append(f"{self.sample_name}{format_labels(key)} ")
+        return index
+
+    def replace(self, series: Dict[LabelKey, float]) -> bool:
+        """Set every series at once, dropping ones not given; True if the series set changed"""
+        changed = list(series) != self.keys
+        if changed:
+            self.keys = list(series)
+            self.slots = {key: i for i, key in enumerate(self.keys)}
+            self.values = array('d', series.values())
+            self.prefixes = [f"{self.sample_name}{format_labels(key)} " for key in self.keys]
+        else:
+            for i, value in enumerate(series.values()):
+                self.values[i] = value
+        return changed
+
+    def render(self, out: List[str]):
+        out.append(self.header)
+        for prefix, value in zip(self.prefixes, self.values):
+            out.append(prefix)
+            out.append(repr(value))
+            out.append("\n")
+
+class HistogramFamily(Family):
+    """Fixed buckets; per series the slots are the cumulative bucket counts, then count and sum"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...], unit: str = ""):
+        super().__init__(name, "histogram", help_text, unit)
+        self.buckets = buckets
+
+    def slot(self, key: LabelKey) -> int:
+        index = self.slots.get(key)
+        if index is None:
+            index = self.slots[key] = len(self.values)
+            self.keys.append(key)
+            for bound in self.buckets:
+                self.prefixes.append(f"{self.name}_bucket{format_labels(key, ('le', f'{bound:g}'))} ")
+            self.prefixes.append(f"{self.name}_bucket{format_labels(key, ('le', '+Inf'))} ")
+            self.prefixes.append(f"{self.name}_count{format_labels(key)} ")
+            self.prefixes.append(f"{self.name}_sum{format_labels(key)} ")
+            self.values.extend([0.0] * (len(self.buckets) + 3))
+        return index
+
+    def observe(self, key: LabelKey, value: float):
+        base = self.slot(key)
+        # Buckets are cumulative, so the value counts in every bucket from its own up to +Inf
+        for i in range(bisect.bisect_left(self.buckets, value), len(self.buckets) + 1):
+            self.values[base + i] += 1
+        self.values[base + len(self.buckets) + 1] += 1
+        self.values[base + len(self.buckets) + 2] += value
+
+class OpenMetricsExporter:
+    """
+    Metric store rendered in the OpenMetrics text format
+
+    Values live in per-family float arrays next to their prebuilt line
+    prefixes, so rendering is a single join, and the rendered body is
+    cached until something changes: the host families change once per
+    sample, whatever the scrape rate.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, Family] = {}
+        self._body: Optional[bytes] = None
+        self._runner: Optional["web.AppRunner"] = None
+        self.scrapes = 0
+
+    def declare(self, name: str, kind: str, help_text: str, unit: str = "",
+                buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Family:
+        family = self._families.get(name)
+        if family is None:
+            if kind == "histogram":
+                family = HistogramFamily(name, help_text, buckets, unit)
+            else:
+                family = Family(name, kind, help_text, unit)
+            self._families[name] = family
+            self._body = None
+        return family
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        family = self._families[name]
+        family.values[family.slot(tuple(sorted(labels.items())))] += amount
+        self._body = None
+
+    def set(self, name: str, value: float, **labels):
+        family = self._families[name]
+        family.values[family.slot(tuple(sorted(labels.items())))] = value
+        self._body = None
+
+    def observe(self, name: str, value: float, **labels):
+        self._families[name].observe(tuple(sorted(labels.items())), value)
+        self._body = None
+
+    def replace(self, name: str, series: Iterable[Tuple[Dict[str, str], float]]):
+        """Set a family's complete series, e.g. one per container; missing ones disappear"""
+        self._families[name].replace({tuple(sorted(labels.items())): value for labels, value in series})
+        self._body = None
+
+    def render(self) -> bytes:
+        if self._body is None:
+            out: List[str] = []
+            for family in self._families.values():
+                family.render(out)
+            out.append("# EOF\n")
+            self._body = "".join(out).encode()
+        return self._body
+
+    async def start(self, port: int, host: str = "0.0.0.0") -> bool:
+        # aiohttp.web is only loaded when the endpoint is enabled
+        from aiohttp import web
+
+        async def metrics_handler(request: web.Request) -> web.Response:
+            self.scrapes += 1
+            return web.Response(body=self.render(), headers={"Content-Type": CONTENT_TYPE})
+
+        app = web.Application()
+        app.router.add_get("/metrics", metrics_handler)
+        runner = web.AppRunner(app, access_log=None)
+        try:
+            await runner.setup()
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            logger.error(f"❌ Failed to start metrics endpoint on port {port}: {e}")
+            await runner.cleanup()
+            return False
+        self._runner = runner
+        logger.info(f"📈 Metrics available at http://{host}:{port}/metrics")
+        return True
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+def declare_host_metrics(exporter: OpenMetricsExporter):
+    for name, kind, help_text, unit in (
+        ("host_cpu_usage_percent", "gauge", "CPU usage over the last sampling interval", "percent"),
+        ("host_memory_bytes", "gauge", "Memory by state (total, used, available)", "bytes"),
+        ("host_swap_used_bytes", "gauge", "Swap in use", "bytes"),
+        ("host_filesystem_bytes", "gauge", "Monitored filesystem by state (total, used, free)", "bytes"),
+        ("host_network_bytes", "counter", "Bytes through all interfaces since boot, by direction", "bytes"),
+        ("host_network_rate_bytes_per_second", "gauge", "Interface throughput by direction", ""),
+        ("host_disk_rate_bytes_per_second", "gauge", "Disk throughput by direction", ""),
+        ("host_disk_iops", "gauge", "Disk requests per second by direction", ""),
+        ("host_disk_await_seconds", "gauge", "Average disk request latency", "seconds"),
+        ("host_temperature_celsius", "gauge", "Temperature sensor readings", "celsius"),
+        ("host_uptime_seconds", "gauge", "Time since boot", "seconds"),
+        ("container_cpu_percent", "gauge", "Container CPU usage, 100 is one core", "percent"),
+        ("container_memory_bytes", "gauge", "Container memory use excluding page cache", "bytes"),
+        ("container_rate_bytes_per_second", "gauge", "Container network and block I/O by kind", ""),
+        ("container_restarts", "counter", "Container restarts seen since the bot started", ""),
+        ("host_metrics_sample_duration_seconds", "gauge", "Time taken by the last metrics sample", "seconds"),
+        ("host_metrics_samples", "counter", "Metrics samples taken", ""),
+        ("bot_alert_firing", "gauge", "1 while an alert rule is firing", ""),
+    ):
+        exporter.declare(name, kind, help_text, unit)
+
+def export_snapshot(exporter: OpenMetricsExporter, snapshot: Dict[str, Any], system: Dict[str, Any]):
+    """Copy a sampler snapshot into the host families"""
+    memory, disk = snapshot['memory'], snapshot['disk']
+    exporter.set("host_cpu_usage_percent", snapshot['cpu']['usage'])
+    exporter.replace("host_memory_bytes", [({"state": state}, memory[state]) for state in ('total', 'used', 'available')])
+    exporter.set("host_swap_used_bytes", snapshot['swap']['used'])
+    exporter.replace("host_filesystem_bytes", [({"state": state}, disk[state]) for state in ('total', 'used', 'free')])
+    exporter.replace("host_network_bytes", [({"direction": "rx"}, snapshot['network']['bytes_recv']),
+                                            ({"direction": "tx"}, snapshot['network']['bytes_sent'])])
+    exporter.replace("host_network_rate_bytes_per_second", [
+        ({"interface": name, "direction": direction}, nic[direction])
+        for name, nic in snapshot.get('interfaces', {}).items() for direction in ('rx', 'tx')])
+
+    disks = snapshot.get('disks', {})
+    exporter.replace("host_disk_rate_bytes_per_second", [
+        ({"device": name, "direction": direction}, d[direction])
+        for name, d in disks.items() for direction in ('read', 'write')])
+    exporter.replace("host_disk_iops", [
+        ({"device": name, "direction": direction}, d[f"{direction}_iops"])
+        for name, d in disks.items() for direction in ('read', 'write')])
+    exporter.replace("host_disk_await_seconds", [
+        ({"device": name}, d['await'] / 1000) for name, d in disks.items() if d['await'] is not None])
+
+    exporter.replace("host_temperature_celsius", [
+        ({"sensor": name}, value) for name, value in snapshot.get('temperatures', {}).items()
+        if isinstance(value, (int, float))])
+    exporter.set("host_uptime_seconds", snapshot['timestamp'] - system['boot_time'])
+
+    containers = snapshot.get('containers', {})
+    exporter.replace("container_cpu_percent", [({"name": n}, c['cpu']) for n, c in containers.items()])
+    exporter.replace("container_memory_bytes", [({"name": n}, c['memory']) for n, c in containers.items()])
+    exporter.replace("container_rate_bytes_per_second", [
+        ({"name": n, "kind": kind}, c[kind]) for n, c in containers.items()
+        for kind in ('net_rx', 'net_tx', 'block_read', 'block_write')])
+    exporter.replace("container_restarts", [
+        ({"name": n}, count) for n, count in snapshot.get('container_restarts', {}).items()])
+
+def exporter_port() -> int:
+    """BOT_METRICS_PORT; 0 (the default) disables the endpoint"""
+    return int(os.getenv("BOT_METRICS_PORT", "0"))
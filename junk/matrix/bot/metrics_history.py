@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Rolling host metrics history for the monitoring bot
+Fixed-size float32 ring buffers at several resolutions, downsampled as samples arrive
+"""
+
+import logging
+import math
+import re
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Metric name -> (label, unit)
+METRICS: Dict[str, Tuple[str, str]] = {
+    "cpu": ("CPU", "%"),
+    "memory": ("Memory", "%"),
+    "swap": ("Swap", "%"),
+    "disk": ("Disk", "%"),
+    "net_rx": ("Network ↓", "B/s"),
+    "net_tx": ("Network ↑", "B/s"),
+    "disk_read": ("Disk read", "B/s"),
+    "disk_write": ("Disk write", "B/s"),
+    "temp": ("Temperature", "°C")
+}
+
+DEFAULT_TIERS = "1m:24h,15m:30d"
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_duration(text: str) -> Optional[int]:
+    """'90s', '10m', '1h', '30d' -> seconds"""
+    match = re.fullmatch(r"(\d+)([smhd])", text.strip().lower())
+    return int(match.group(1)) * _UNITS[match.group(2)] if match else None
+
+def format_duration(seconds: float) -> str:
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds:g}s"
+
+class RingBuffer:
+    """float32 ring of fixed capacity; memory is allocated once"""
+
+    __slots__ = ("values", "capacity", "head", "count")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values = array('f', [math.nan]) * capacity
+        self.head = 0  # next write position
+        self.count = 0
+
+    def append(self, value: float):
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self, n: int) -> List[float]:
+        """Up to n most recent values, oldest first"""
+        n = min(n, self.count)
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.values[start:start + n].tolist()
+        return self.values[start:].tolist() + self.values[:self.head].tolist()
+
+class Tier:
+    """
+    One resolution: per metric, min/avg/max of every `step`-second bucket
+
+    Samples accumulate into the current bucket and are written to the rings
+    when a sample lands in a later bucket; buckets with no samples (bot
+    down) are written as NaN so positions stay aligned with time.
+    """
+
+    def __init__(self, step: int, span: int, metrics: Sequence[str]):
+        self.step = step
+        self.capacity = max(1, span // step)
+        self.rings = {name: (RingBuffer(self.capacity), RingBuffer(self.capacity), RingBuffer(self.capacity))
+                      for name in metrics}
+        self._bucket: Optional[int] = None
+        self._acc: Dict[str, List[float]] = {name: [0.0, 0, math.inf, -math.inf] for name in metrics}
+
+    @property
+    def span(self) -> int:
+        return self.step * self.capacity
+
+    def add(self, timestamp: float, values: Dict[str, Optional[float]]):
+        bucket = int(timestamp // self.step)
+        if self._bucket is None:
+            self._bucket = bucket
+        elif bucket > self._bucket:
+            self._flush()
+            for _ in range(min(bucket - self._bucket - 1, self.capacity)):
+                self._write(math.nan, math.nan, math.nan)
+            self._bucket = bucket
+
+        for name, value in values.items():
+            acc = self._acc.get(name)
+            if acc is None or value is None or math.isnan(value):
+                continue
+            acc[0] += value
+            acc[1] += 1
+            acc[2] = min(acc[2], value)
+            acc[3] = max(acc[3], value)
+
+    def _flush(self):
+        for name, acc in self._acc.items():
+            mins, avgs, maxs = self.rings[name]
+            if acc[1]:
+                mins.append(acc[2])
+                avgs.append(acc[0] / acc[1])
+                maxs.append(acc[3])
+            else:
+                mins.append(math.nan)
+                avgs.append(math.nan)
+                maxs.append(math.nan)
+            acc[:] = [0.0, 0, math.inf, -math.inf]
+
+    def _write(self, low: float, mean: float, high: float):
+        for mins, avgs, maxs in self.rings.values():
+            mins.append(low)
+            avgs.append(mean)
+            maxs.append(high)
+
+    def window(self, name: str, buckets: int) -> Tuple[List[float], List[float], List[float]]:
+        """min/avg/max series for the last `buckets` buckets, the current partial one included"""
+        mins, avgs, maxs = self.rings[name]
+        acc = self._acc[name]
+        closed = buckets - 1 if acc[1] else buckets
+        low, mean, high = mins.latest(closed), avgs.latest(closed), maxs.latest(closed)
+        if acc[1]:
+            low.append(acc[2])
+            mean.append(acc[0] / acc[1])
+            high.append(acc[3])
+        return low, mean, high
+
+    def memory_bytes(self) -> int:
+        return sum(ring.values.itemsize * ring.capacity for rings in self.rings.values() for ring in rings)
+
+class MetricsHistory:
+    """Multi-resolution history of the METRICS, fed one snapshot at a time"""
+
+    def __init__(self, tiers: Sequence[Tuple[int, int]], metrics: Sequence[str] = tuple(METRICS)):
+        self.metrics = tuple(metrics)
+        self.tiers = [Tier(step, span, metrics) for step, span in sorted(tiers)]
+
+    @classmethod
+    def from_spec(cls, spec: str, base_step: float, metrics: Sequence[str] = tuple(METRICS)) -> "MetricsHistory":
+        """'1m:24h,15m:30d' (step:span pairs) plus a base tier at the sampling interval for 10 minutes"""
+        tiers = [(max(1, int(base_step)), 600)]
+        for item in spec.split(','):
+            step, _, span = item.partition(':')
+            step_seconds, span_seconds = parse_duration(step), parse_duration(span)
+            if not step_seconds or not span_seconds:
+                logger.error(f"Ignoring invalid history tier {item!r}")
+                continue
+            tiers.append((step_seconds, span_seconds))
+        return cls(tiers, metrics)
+
+    def record_snapshot(self, snapshot: Dict):
+        """Add one sampler snapshot to every tier"""
+        timestamp = snapshot['timestamp']
+        temperatures = [t for t in snapshot.get('temperatures', {}).values() if isinstance(t, (int, float))]
+        io = snapshot.get('io', {})
+        values = {
+            "cpu": snapshot['cpu']['usage'],
+            "memory": snapshot['memory']['percent'],
+            "swap": snapshot['swap']['percent'],
+            "disk": snapshot['disk']['percent'],
+            "net_rx": io.get('rx'),
+            "net_tx": io.get('tx'),
+            "disk_read": io.get('read'),
+            "disk_write": io.get('write'),
+            "temp": max(temperatures) if temperatures else None
+        }
+        self.record(timestamp, values)
+
+    def record(self, timestamp: float, values: Dict[str, Optional[float]]):
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+
+    def query(self, name: str, seconds: int) -> Optional[Dict]:
+        """Finest tier covering `seconds`, with that window's series and summary"""
+        if name not in self.metrics or not self.tiers:
+            return None
+        tier = next((t for t in self.tiers if t.span >= seconds), self.tiers[-1])
+        buckets = max(1, min(tier.capacity, math.ceil(seconds / tier.step)))
+        low, mean, high = tier.window(name, buckets)
+
+        present = [i for i, v in enumerate(mean) if not math.isnan(v)]
+        if not present:
+            return {"step": tier.step, "series": mean, "min": None, "avg": None, "max": None, "last": None}
+        return {
+            "step": tier.step,
+            "series": mean,
+            "min": min(low[i] for i in present),
+            "avg": sum(mean[i] for i in present) / len(present),
+            "max": max(high[i] for i in present),
+            "last": mean[present[-1]]
+        }
+
+    def memory_bytes(self) -> int:
+        return sum(tier.memory_bytes() for tier in self.tiers)
+
+def sparkline(values: Sequence[float], width: int = 40) -> str:
+    """Text sparkline, averaging values into at most `width` columns; gaps render as spaces"""
+    if not values:
+        return ""
+    columns = []
+    per_column = max(1, math.ceil(len(values) / width))
+    for start in range(0, len(values), per_column):
+        chunk = [v for v in values[start:start + per_column] if not math.isnan(v)]
+        columns.append(sum(chunk) / len(chunk) if chunk else math.nan)
+
+    present = [v for v in columns if not math.isnan(v)]
+    if not present:
+        return " " * len(columns)
+    low, high = min(present), max(present)
+    scale = (len(SPARK_CHARS) - 1) / (high - low) if high > low else 0
+    return "".join(" " if math.isnan(v) else SPARK_CHARS[int((v - low) * scale)] for v in columns)
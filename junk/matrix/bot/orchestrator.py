@@ -16,15 +16,6 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
 
 from agents.orchestrator_agent import OrchestratorAgent
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('/app/store/orchestrator.log', mode='a')
-    ]
-)
 logger = logging.getLogger(__name__)
 
 class OrchestratorLauncher:
@@ -112,6 +103,15 @@ def setup_signal_handlers(launcher):
 
 async def main():
     """Main function"""
+    # Set up logging here, not at import, so importing the launcher does not need /app/store
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler('/app/store/orchestrator.log', mode='a')
+        ]
+    )
     logger.info("🚀 Matrix Orchestrator Agent Launcher")
     logger.info("====================================")
 
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Linux /proc and /sys reader for the metrics sampler
+Reads CPU, memory, network, disk and sensor counters from pre-opened files without psutil
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from io_rates import DISK_FIELDS, NET_FIELDS, is_whole_disk
+
+logger = logging.getLogger(__name__)
+
+# /proc/net/dev columns after the interface name, in NET_FIELDS order
+_NET_COLUMNS = (8, 0, 9, 1, 2, 10)
+# /proc/diskstats columns after major, minor and name, in DISK_FIELDS order; bytes are in 512-byte sectors
+_DISK_COLUMNS = ((0, 1), (4, 1), (2, 512), (6, 512), (3, 1), (7, 1), (9, 1))
+
+# /proc/meminfo line -> slot in the memory array
+_MEMINFO_SLOTS = {key: i for i, key in enumerate((
+    b"MemTotal:", b"MemFree:", b"MemAvailable:", b"Buffers:", b"Cached:", b"SReclaimable:",
+    b"Shmem:", b"Slab:", b"Active:", b"Inactive:", b"SwapTotal:", b"SwapFree:"))}
+
+class ProcReader:
+    """
+    Host counters straight from the kernel's text files
+
+    Every file is opened once and re-read from offset 0 with `os.pread`,
+    so a sample costs one syscall per file instead of open/read/close and
+    psutil's namedtuples. CPU jiffies and the per-device network and disk
+    counters are parsed into preallocated arrays (flat rows in NET_FIELDS
+    and DISK_FIELDS order, as CounterRates takes them) that are reused
+    until the set of devices changes. Sections mirror psutil's values and
+    keys, so the sampler's snapshot looks the same either way.
+    """
+
+    def __init__(self, proc: str = "/proc", sys_root: str = "/sys"):
+        self.proc = proc
+        self._fds: Dict[str, int] = {}
+        try:
+            for name in ("stat", "meminfo", "net/dev", "diskstats"):
+                self._fds[name] = os.open(os.path.join(proc, name), os.O_RDONLY)
+        except OSError:
+            self.close()
+            raise
+        self._sizes: Dict[str, int] = {name: 8192 for name in self._fds}
+        self._cpu = array('Q', [0, 0])  # total and busy jiffies at the previous call
+        self._memory = array('Q', bytes(8 * len(_MEMINFO_SLOTS)))
+        self._net_names: Tuple[str, ...] = ()
+        self._net_row = array('Q')
+        self._disk_names: Tuple[str, ...] = ()
+        self._disk_row = array('Q')
+        self._decoded: Dict[bytes, str] = {}
+
+        # Sensors and frequencies do not come and go while the host is up
+        self._sensors: List[Tuple[str, int]] = []
+        for path in sorted(glob.glob(os.path.join(sys_root, "class/hwmon/hwmon*/temp*_input"))):
+            label = _read_text(path.replace("_input", "_label")) or _read_text(os.path.join(os.path.dirname(path), "name"))
+            try:
+                self._sensors.append((label or os.path.basename(path), os.open(path, os.O_RDONLY)))
+            except OSError:
+                pass
+        self._cpufreq: List[int] = []
+        self._cpuinfo_mhz: Optional[float] = None
+        for path in glob.glob(os.path.join(sys_root, "devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")):
+            try:
+                self._cpufreq.append(os.open(path, os.O_RDONLY))
+            except OSError:
+                pass
+
+    @classmethod
+    def open(cls) -> Optional["ProcReader"]:
+        """None off Linux, when /proc is unreadable, or with HOST_METRICS_PROC=false"""
+        if not sys.platform.startswith("linux") or os.getenv("HOST_METRICS_PROC", "true").lower() != "true":
+            return None
+        try:
+            return cls()
+        except OSError as e:
+            logger.warning(f"⚠️ /proc reader unavailable, using psutil: {e}")
+            return None
+
+    def close(self):
+        for fd in list(self._fds.values()) + [fd for _, fd in self._sensors] + self._cpufreq:
+            os.close(fd)
+        self._fds.clear()
+        self._sensors.clear()
+        self._cpufreq.clear()
+
+    def _read(self, name: str) -> bytes:
+        size = self._sizes[name]
+        data = os.pread(self._fds[name], size, 0)
+        while len(data) >= size:
+            # The file outgrew the buffer (e.g. more devices); read it whole with a bigger one
+            size = self._sizes[name] = size * 2
+            data = os.pread(self._fds[name], size, 0)
+        return data
+
+    def _name(self, raw: bytes) -> str:
+        name = self._decoded.get(raw)
+        if name is None:
+            name = self._decoded[raw] = raw.decode()
+        return name
+
+    def cpu_percent(self) -> float:
+        """Busy share of all CPUs since the previous call, like psutil.cpu_percent(interval=None)"""
+        data = self._read("stat")
+        times = [int(v) for v in data[:data.index(b"\n")].split()[1:]]
+        # guest time is already counted in user time
+        total = sum(times[:8])
+        busy = total - times[3] - times[4]
+        total_delta, busy_delta = total - self._cpu[0], busy - self._cpu[1]
+        self._cpu[0], self._cpu[1] = total, busy
+        if total_delta <= 0:
+            return 0.0
+        return round(min(100.0, max(0.0, busy_delta / total_delta * 100)), 1)
+
+    def boot_time(self) -> float:
+        for line in self._read("stat").splitlines():
+            if line.startswith(b"btime "):
+                return float(line.split()[1])
+        raise ValueError("no btime in /proc/stat")
+
+    def cpu_frequency(self) -> Optional[float]:
+        """Average current frequency in MHz"""
+        if not self._cpufreq:
+            # No cpufreq in sysfs (e.g. in VMs): /proc/cpuinfo's nominal MHz does not change, so read it once
+            if self._cpuinfo_mhz is None:
+                cpuinfo = _read_text(os.path.join(self.proc, "cpuinfo")) or ""
+                mhz = [float(line.split(":")[1]) for line in cpuinfo.splitlines() if line.startswith("cpu MHz")]
+                self._cpuinfo_mhz = sum(mhz) / len(mhz) if mhz else 0.0
+            return self._cpuinfo_mhz or None
+        return sum(int(os.pread(fd, 32, 0)) for fd in self._cpufreq) / len(self._cpufreq) / 1000
+
+    def memory(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(virtual_memory, swap_memory) as psutil reports them on Linux"""
+        values = self._memory
+        for line in self._read("meminfo").splitlines():
+            key, _, rest = line.partition(b" ")
+            slot = _MEMINFO_SLOTS.get(key)
+            if slot is not None:
+                values[slot] = int(rest.split()[0]) * 1024
+        total, free, available, buffers, cached, reclaimable, shared, slab, active, inactive, swap_total, swap_free = values
+        # psutil 6 counts everything not available as used, which keeps used and percent consistent
+        memory = {
+            'total': total, 'available': available,
+            'percent': round((total - available) / total * 100, 1) if total else 0.0,
+            'used': total - available, 'free': free, 'active': active, 'inactive': inactive,
+            'buffers': buffers, 'cached': cached + reclaimable, 'shared': shared, 'slab': slab
+        }
+        swap_used = swap_total - swap_free
+        swap = {
+            'total': swap_total, 'used': swap_used, 'free': swap_free,
+            'percent': round(swap_used / swap_total * 100, 1) if swap_total else 0.0
+        }
+        return memory, swap
+
+    def network(self) -> Tuple[Tuple[str, ...], array]:
+        """Interface names and their counters as one flat row in NET_FIELDS order"""
+        lines = self._read("net/dev").splitlines()[2:]
+        width = len(NET_FIELDS)
+        names = tuple(self._name(line.partition(b":")[0].strip()) for line in lines)
+        if names != self._net_names:
+            self._net_names, self._net_row = names, array('Q', bytes(8 * width * len(names)))
+        row = self._net_row
+        for i, line in enumerate(lines):
+            columns = line.partition(b":")[2].split()
+            for k, column in enumerate(_NET_COLUMNS):
+                row[i * width + k] = int(columns[column])
+        return names, row
+
+    def disks(self) -> Tuple[Tuple[str, ...], array]:
+        """Whole-disk names and their counters as one flat row in DISK_FIELDS order"""
+        rows = []
+        for line in self._read("diskstats").splitlines():
+            columns = line.split()
+            if len(columns) >= 14 and is_whole_disk(self._name(columns[2])):
+                rows.append(columns)
+        width = len(DISK_FIELDS)
+        names = tuple(self._name(columns[2]) for columns in rows)
+        if names != self._disk_names:
+            self._disk_names, self._disk_row = names, array('Q', bytes(8 * width * len(names)))
+        row = self._disk_row
+        for i, columns in enumerate(rows):
+            for k, (column, scale) in enumerate(_DISK_COLUMNS):
+                row[i * width + k] = int(columns[3 + column]) * scale
+        return names, row
+
+    def temperatures(self) -> Dict[str, float]:
+        temperatures = {}
+        for label, fd in self._sensors:
+            try:
+                temperatures[label] = int(os.pread(fd, 32, 0)) / 1000
+            except (OSError, ValueError):
+                pass  # some sensors fail reads while idle
+        return temperatures
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def disk_usage(path: str) -> Dict[str, Any]:
+    """Filesystem usage like psutil.disk_usage: `free` and `percent` leave out blocks reserved for root"""
+    st = os.statvfs(path)
+    total = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    return {'total': total, 'used': used, 'free': free,
+            'percent': round(used / (used + free) * 100, 1) if used + free else 0.0}
+
+def network_totals(row: array) -> Dict[str, int]:
+    """System-wide network counters from a network() row, like psutil.net_io_counters()"""
+    width = len(NET_FIELDS)
+    return {field: sum(row[k::width]) for k, field in enumerate(NET_FIELDS)}
+
+def benchmark(rounds: int) -> Dict[str, Tuple[float, float]]:
+    """Microseconds per call of each section, (psutil, /proc reader)"""
+    import psutil
+
+    reader = ProcReader()
+
+    def timed(call) -> float:
+        call()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            call()
+        return (time.perf_counter() - started) / rounds * 1e6
+
+    results = {
+        "cpu": (timed(lambda: psutil.cpu_percent(interval=None)), timed(reader.cpu_percent)),
+        "memory + swap": (timed(lambda: (psutil.virtual_memory()._asdict(), psutil.swap_memory()._asdict())),
+                          timed(reader.memory)),
+        "network": (timed(lambda: (psutil.net_io_counters()._asdict(), psutil.net_io_counters(pernic=True))),
+                    timed(lambda: network_totals(reader.network()[1]))),
+        "disks": (timed(lambda: psutil.disk_io_counters(perdisk=True)), timed(reader.disks)),
+        "temperatures": (timed(lambda: psutil.sensors_temperatures()), timed(reader.temperatures))
+    }
+    results["total"] = (sum(p for p, _ in results.values()), sum(r for _, r in results.values()))
+    reader.close()
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare psutil with the /proc reader")
+    parser.add_argument("--rounds", type=int, default=2000, help="Calls per section")
+    args = parser.parse_args(argv)
+
+    print(f"{'section':<16}{'psutil µs':>12}{'/proc µs':>12}{'speedup':>10}")
+    for section, (psutil_us, reader_us) in benchmark(args.rounds).items():
+        print(f"{section:<16}{psutil_us:>12.1f}{reader_us:>12.1f}{psutil_us / reader_us:>9.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
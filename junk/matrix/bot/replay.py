@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Matrix Agent Traffic Replayer
+Feeds a recording made with AGENT_RECORD_PATH back into an agent offline and benchmarks it
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+# Add the agents directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
+
+from nio import MatrixRoom, RoomMessageText
+
+from agents.host import AGENT_TYPES, load_agent_class
+from agents.recorder import CaptureTransport, read_recording
+from agents.transport import LocalAgentBus
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+def parse_speed(value: str) -> float:
+    """'1', '10', '10x' or 'max' (0 = no delays)"""
+    value = value.lower()
+    if value == "max":
+        return 0.0
+    speed = float(value.rstrip('x'))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def stub_ollama(agent, latency: float):
+    """Replace the LLM agent's Ollama calls with canned, deterministic responses"""
+    async def generate(prompt: str, context=None, model=None, **options):
+        if latency:
+            await asyncio.sleep(latency)
+        return f"[stub response to {len(prompt)} chars]"
+
+    async def stream(prompt: str, context=None, model=None, **options):
+        if latency:
+            await asyncio.sleep(latency)
+        yield f"[stub response to {len(prompt)} chars]"
+
+    agent._generate_response = generate
+    agent._stream_response = stream
+
+def build_agent(name: str, header: Dict[str, Any], default_room: str, args):
+    user_id = header.get("user_id") or f"@{name}:replay.invalid"
+    agent = load_agent_class(name)(
+        homeserver_url="http://replay.invalid",
+        username=user_id,
+        password="",
+        store_path=tempfile.mkdtemp(prefix=f"replay-{name}-")
+    )
+
+    # Offline: capture sends, keep messages on a private bus, accept old events
+    agent.transport = CaptureTransport()
+    agent.bus = LocalAgentBus()
+    agent.client.user_id = user_id
+    agent.coordination_room = os.getenv("COORDINATION_ROOM_ID", default_room)
+    agent.status = "online"
+    agent.dedup.cutoff_ts = 0
+    agent.payloads = None  # keep captured sends self-contained
+
+    if hasattr(agent, "step_timeout"):
+        agent.step_timeout = args.step_timeout
+    if hasattr(agent, "ollama_url"):
+        if args.ollama_url:
+            agent.ollama_url = args.ollama_url
+        else:
+            stub_ollama(agent, args.ollama_latency)
+    return agent
+
+async def replay(args) -> int:
+    entries = list(read_recording(args.recording))
+    header = next((e["header"] for e in entries if "header" in e), {})
+    events = [e for e in entries if "event" in e]
+    if not events:
+        print(f"❌ No events in {args.recording}")
+        return 1
+
+    name = args.agent or header.get("agent_id")
+    if name not in AGENT_TYPES:
+        print(f"❌ Unknown agent {name!r}; use --agent with one of {list(AGENT_TYPES)}")
+        return 1
+
+    agent = build_agent(name, header, events[0]["room"], args)
+    rooms: Dict[str, MatrixRoom] = {}
+    dispatch: List[float] = []
+
+    print(f"▶️ Replaying {len(events)} events into {name} at "
+          f"{'max speed' if not args.speed else f'{args.speed:g}x'}")
+    started = time.perf_counter()
+    previous_ts = None
+    for entry in events:
+        if args.speed and previous_ts is not None:
+            gap = min(entry["ts"] - previous_ts, args.max_gap) / args.speed
+            if gap > 0:
+                await asyncio.sleep(gap)
+        previous_ts = entry["ts"]
+
+        event = RoomMessageText.from_dict(entry["event"])
+        if not isinstance(event, RoomMessageText):
+            continue
+        room = rooms.get(entry["room"])
+        if room is None:
+            room = rooms[entry["room"]] = MatrixRoom(entry["room"], agent.client.user_id)
+
+        t0 = time.perf_counter()
+        await agent._on_message(room, event)
+        dispatch.append(time.perf_counter() - t0)
+    fed = time.perf_counter() - started
+
+    # Let spawned handlers and workflows finish
+    pending = {t for t in asyncio.all_tasks() if t is not asyncio.current_task()}
+    if pending:
+        await asyncio.wait(pending, timeout=args.drain_timeout)
+    elapsed = time.perf_counter() - started
+
+    sent = agent.transport.sent
+    print("\n📊 Replay results")
+    print(f"   Events:      {len(dispatch)} in {fed:.2f}s feed, {elapsed:.2f}s total")
+    print(f"   Throughput:  {len(dispatch) / elapsed:.1f} events/s")
+    print(f"   Dispatch:    p50 {percentile(dispatch, 0.5) * 1000:.2f}ms  "
+          f"p95 {percentile(dispatch, 0.95) * 1000:.2f}ms  "
+          f"p99 {percentile(dispatch, 0.99) * 1000:.2f}ms  max {max(dispatch) * 1000:.2f}ms")
+    print(f"   Sends:       {len(sent)} captured")
+
+    handlers = agent.metrics.snapshot(agent.agent_id).get("agent_handler_seconds", {})
+    if handlers:
+        print("   Handlers:")
+        for series, stats in sorted(handlers.items(), key=lambda kv: -kv[1]["count"]):
+            print(f"     {series:<32} n={stats['count']:<6} avg={stats['avg']}s p95<={stats['p95']}s")
+
+    if args.sends_out:
+        with open(args.sends_out, "w") as f:
+            for message in sent:
+                f.write(json.dumps(message) + "\n")
+        print(f"   Wrote captured sends to {args.sends_out}")
+
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            task.cancel()
+    await agent.client.close()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded coordination room traffic into an agent")
+    parser.add_argument("recording", help="Recording written with AGENT_RECORD_PATH (*.events.jsonl.gz)")
+    parser.add_argument("--agent", choices=list(AGENT_TYPES), help="Agent to replay into (default: from recording)")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1, 10x, ... or max (default 1)")
+    parser.add_argument("--max-gap", type=float, default=5.0, help="Cap on idle gaps between events, seconds")
+    parser.add_argument("--ollama-url", help="Use this Ollama (or fake) instead of the built-in stub")
+    parser.add_argument("--ollama-latency", type=float, default=0.0, help="Stub Ollama response delay, seconds")
+    parser.add_argument("--step-timeout", type=float, default=5.0,
+                        help="Orchestrator wait for agent replies, which are not re-sent during replay")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Wait for in-flight handlers, seconds")
+    parser.add_argument("--sends-out", help="Write captured outbound messages as JSONL")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(replay(args)))
+
+if __name__ == "__main__":
+    main()
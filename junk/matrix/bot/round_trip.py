@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Synthetic round-trip monitor for the agent fleet
+Periodically pings each agent through Matrix and keeps hourly latency percentiles per agent
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# first: ping sent -> first reply seen; complete: -> last expected reply seen;
+# sync: homeserver timestamp of the first reply -> bot received it
+STAGES = ("first", "complete", "sync")
+
+DEFAULT_PROBES = "llm|!llm Reply with just the word pong|2; orchestrator|!orchestrator status|1"
+
+class LatencySketch:
+    """
+    Fixed log-spaced histogram of latencies in seconds
+
+    Bucket bounds grow by 10% from 1ms to a bit over an hour, so any
+    quantile is within about 5% of the true value, and sketches merge by
+    adding counts. 160 uint32 counters, about 640 bytes per sketch.
+    """
+
+    LOW = 0.001
+    GROWTH = 1.1
+    SIZE = 160
+
+    def __init__(self):
+        self.counts = array('I', bytes(4 * self.SIZE))
+        self.count = 0
+        self.total = 0.0
+        self.low = math.inf
+        self.high = 0.0
+
+    def add(self, value: float):
+        index = 0 if value <= self.LOW else min(self.SIZE - 1, math.ceil(math.log(value / self.LOW, self.GROWTH)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+
+    def merge(self, other: "LatencySketch"):
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen > rank:
+                # Geometric middle of the bucket, kept inside the observed range
+                return min(self.high, max(self.low, self.LOW * self.GROWTH ** (i - 0.5)))
+        return self.high
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+@dataclass
+class Probe:
+    name: str
+    command: str
+    replies: int = 1  # messages that make up a complete answer (the LLM agent acknowledges first)
+    sender: Optional[str] = None  # agent user ID; only its messages count as replies (None: any other user)
+
+@dataclass
+class RoundTrip:
+    agent: str
+    outcome: str  # "ok", "timeout" or "send_failed"
+    first: Optional[float] = None
+    complete: Optional[float] = None
+    sync: Optional[float] = None
+
+def parse_probes(spec: str, domain: Optional[str] = None) -> List[Probe]:
+    """'name|command[|replies[|sender]]' entries separated by ';'; sender defaults to @name:domain"""
+    probes = []
+    for entry in spec.split(';'):
+        parts = [p.strip() for p in entry.split('|')]
+        if len(parts) < 2 or not parts[0] or not parts[1]:
+            continue
+        probes.append(Probe(parts[0], parts[1],
+                            int(parts[2]) if len(parts) > 2 and parts[2] else 1,
+                            parts[3] if len(parts) > 3 and parts[3] else (f"@{parts[0]}:{domain}" if domain else None)))
+    return probes
+
+class RoundTripMonitor:
+    """
+    Sends each probe's command to the probe room in turn and times the replies
+
+    Probes run one at a time and only messages from the probed agent's
+    user ID count, so people talking in the room do not complete a probe
+    early. A probe is complete after `replies` messages; one that is not
+    complete within `timeout` seconds counts as a timeout. Latencies go
+    into one sketch per agent, stage and wall-clock hour; the last `hours`
+    hours are kept.
+    """
+
+    def __init__(self,
+                 probes: List[Probe],
+                 room_id: str,
+                 send: Callable[[str, str], Awaitable[bool]],
+                 interval: float = 300.0,
+                 timeout: float = 120.0,
+                 hours: int = 48):
+        self.probes = probes
+        self.room_id = room_id
+        self.send = send
+        self.interval = interval
+        self.timeout = timeout
+        self.hours = hours
+
+        self.sketches: Dict[Tuple[str, str], "OrderedDict[int, LatencySketch]"] = {}
+        self.outcomes: Dict[Tuple[str, str], int] = {}
+        self.last: Dict[str, RoundTrip] = {}
+        self._listeners: List[Callable[[RoundTrip], None]] = []
+        self._pending: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, send: Callable[[str, str], Awaitable[bool]]) -> Optional["RoundTripMonitor"]:
+        """None unless SLO_ROOM_ID names the room to probe in; SLO_PROBES, SLO_INTERVAL and SLO_TIMEOUT tune it"""
+        room_id = os.getenv("SLO_ROOM_ID")
+        # Agents live on the bot's homeserver: @llm:example.org next to @bot:example.org
+        domain = os.getenv("MATRIX_DOMAIN") or os.getenv("MATRIX_BOT_USERNAME", "").partition(":")[2] or None
+        probes = parse_probes(os.getenv("SLO_PROBES", DEFAULT_PROBES), domain)
+        if not room_id or not probes:
+            return None
+        return cls(probes, room_id, send,
+                   interval=float(os.getenv("SLO_INTERVAL", "300")),
+                   timeout=float(os.getenv("SLO_TIMEOUT", "120")))
+
+    def add_listener(self, callback: Callable[[RoundTrip], None]):
+        """Call `callback(result)` after every probe"""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            for probe in self.probes:
+                try:
+                    self._record(await self.run_probe(probe))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"❌ Round-trip probe {probe.name} failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_probe(self, probe: Probe) -> RoundTrip:
+        pending = self._pending = {"probe": probe, "sent": time.monotonic(), "replies": 0,
+                                   "first": None, "sync": None, "done": asyncio.Event()}
+        try:
+            if not await self.send(self.room_id, probe.command):
+                return RoundTrip(probe.name, "send_failed")
+            try:
+                await asyncio.wait_for(pending["done"].wait(), self.timeout)
+            except asyncio.TimeoutError:
+                return RoundTrip(probe.name, "timeout", pending["first"], None, pending["sync"])
+            return RoundTrip(probe.name, "ok", pending["first"], time.monotonic() - pending["sent"], pending["sync"])
+        finally:
+            self._pending = None
+
+    def on_message(self, room_id: str, sender: str, server_timestamp: Optional[int] = None):
+        """Feed every message the bot receives from other users; counts replies to the probe in flight"""
+        pending = self._pending
+        if pending is None or room_id != self.room_id:
+            return
+        probe = pending["probe"]
+        if probe.sender and sender != probe.sender:
+            return
+        pending["replies"] += 1
+        if pending["first"] is None:
+            pending["first"] = time.monotonic() - pending["sent"]
+            if server_timestamp:
+                pending["sync"] = max(0.0, time.time() - server_timestamp / 1000)
+        if pending["replies"] >= probe.replies:
+            pending["done"].set()
+
+    def _record(self, result: RoundTrip):
+        self.last[result.agent] = result
+        key = (result.agent, result.outcome)
+        self.outcomes[key] = self.outcomes.get(key, 0) + 1
+        hour = int(time.time() // 3600)
+        for stage in STAGES:
+            value = getattr(result, stage)
+            if value is None:
+                continue
+            hourly = self.sketches.setdefault((result.agent, stage), OrderedDict())
+            sketch = hourly.get(hour)
+            if sketch is None:
+                sketch = hourly[hour] = LatencySketch()
+                while len(hourly) > self.hours:
+                    hourly.popitem(last=False)
+            sketch.add(value)
+        if result.outcome != "ok":
+            logger.warning(f"⏱️ Round-trip probe {result.agent}: {result.outcome}")
+        for callback in self._listeners:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error(f"❌ Round-trip listener error: {e}")
+
+    def window(self, agent: str, stage: str, hours: int = 1) -> LatencySketch:
+        """Merged sketch of the current hour and the `hours - 1` before it"""
+        merged = LatencySketch()
+        oldest = int(time.time() // 3600) - hours + 1
+        for hour, sketch in self.sketches.get((agent, stage), {}).items():
+            if hour >= oldest:
+                merged.merge(sketch)
+        return merged
+
+    def hourly(self, agent: str, stage: str) -> List[Tuple[int, LatencySketch]]:
+        return list(self.sketches.get((agent, stage), {}).items())
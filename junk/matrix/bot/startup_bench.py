@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the bot entry points
+Imports each entry point in a fresh interpreter under `python -X importtime` and reports where the time goes
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Entry point -> module imported in the fresh interpreter (all guard their main())
+ENTRY_POINTS = {
+    "enhanced_bot": "enhanced_bot",
+    "agent_host": "agent_host",
+    "llm": "llm",
+    "orchestrator": "orchestrator",
+    "replay": "replay",
+    "health_probe": "health_probe",
+    "test_monitoring": "test_monitoring",
+    "verify_bot": "verify_bot",
+    "loadtest": "loadtest.__main__"
+}
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """(depth, self us, cumulative us, module) for every line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), stripped))
+    return rows
+
+def direct_imports(rows: List[Tuple[int, int, int, str]], module: str) -> Dict[str, int]:
+    """Cumulative time of each module imported directly by `module` (children are listed before their parent)"""
+    children: Dict[str, int] = {}
+    for depth, _, cumulative_us, name in rows:
+        if depth == 0:
+            if name == module:
+                return children
+            children = {}
+        elif depth == 1:
+            children[name] = cumulative_us
+    return {}
+
+def measure(module: str) -> Dict[str, Any]:
+    """One cold start: wall time of the interpreter and import time of the module"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BOT_DIR, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit {result.returncode}"
+        return {"error": error}
+    rows = parse_importtime(result.stderr)
+    total = next((cumulative for depth, _, cumulative, name in rows if depth == 0 and name == module), 0)
+    return {"wall": wall, "import": total / 1e6, "children": direct_imports(rows, module)}
+
+def benchmark(names: List[str], runs: int) -> Dict[str, Dict[str, Any]]:
+    """Median of `runs` cold starts per entry point, plus a bare interpreter for reference"""
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, module in [("python", "sys")] + [(n, ENTRY_POINTS[n]) for n in names]:
+        samples = [measure(module) for _ in range(runs)]
+        failed = next((s for s in samples if "error" in s), None)
+        if failed:
+            results[name] = failed
+            continue
+        slowest = max(samples, key=lambda s: s["import"])["children"]
+        results[name] = {
+            "wall": statistics.median(s["wall"] for s in samples),
+            "import": statistics.median(s["import"] for s in samples),
+            "top": sorted(slowest.items(), key=lambda item: -item[1])[:5]
+        }
+    return results
+
+def format_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None) -> str:
+    lines = [f"{'entry point':<18}{'wall ms':>10}{'import ms':>11}{'vs baseline':>13}  slowest direct imports (ms)"]
+    for name, r in results.items():
+        if "error" in r:
+            lines.append(f"{name:<18}{'failed':>10}  {r['error']}")
+            continue
+        change = ""
+        if baseline and name in baseline and baseline[name].get("wall"):
+            change = f"{(r['wall'] / baseline[name]['wall'] - 1) * 100:+.0f}%"
+        top = ", ".join(f"{module} {us / 1000:.0f}" for module, us in r["top"])
+        lines.append(f"{name:<18}{r['wall'] * 1000:>10.0f}{r['import'] * 1000:>11.0f}{change:>13}  {top}")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the bot entry points")
+    parser.add_argument("entry_points", nargs="*", help=f"Default: all of {', '.join(ENTRY_POINTS)}")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per entry point (median is reported)")
+    parser.add_argument("--json", help="Write results to this file, e.g. to use as a later baseline")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0,
+                        help="With --baseline, exit 1 if an entry point got this many percent slower")
+    args = parser.parse_args(argv)
+
+    unknown = [n for n in args.entry_points if n not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry points: {', '.join(unknown)}")
+    results = benchmark(args.entry_points or list(ENTRY_POINTS), args.runs)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_report(results, baseline))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline:
+        regressed = [name for name, r in results.items()
+                     if "wall" in r and baseline.get(name, {}).get("wall")
+                     and r["wall"] > baseline[name]["wall"] * (1 + args.max_regression / 100)]
+        if regressed:
+            print(f"\n❌ Slower than baseline by more than {args.max_regression:g}%: {', '.join(regressed)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
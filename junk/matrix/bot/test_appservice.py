@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the appservice agent host
+Runs the LLM agent as an appservice against the fake homeserver and Ollama, all in one process
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents.appservice import AppServiceHost, build_registration
+from agents.blobstore import PayloadOffloader
+from agents.llm_agent import LLMAgent
+from loadtest.fake_homeserver import FakeHomeserver
+from loadtest.fake_ollama import FakeOllama
+from loadtest.loadgen import SimulatedUser
+
+DOMAIN = "localhost"
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def run_appservice_round_trip():
+    """A user asks the LLM agent; the question and answer travel only through transactions and as_token calls"""
+    os.environ.pop("COORDINATION_ROOM_ID", None)
+    homeserver = FakeHomeserver(domain=DOMAIN, port=free_port())
+    ollama = FakeOllama(port=free_port(), latency=0.0, response_tokens=8, token_rate=1000)
+    as_port = free_port()
+    registration = build_registration("test-agents", f"http://127.0.0.1:{as_port}", DOMAIN, ["llm"])
+    homeserver.register_appservice(registration)
+    await homeserver.start()
+    await ollama.start()
+
+    host = AppServiceHost(homeserver.url, registration["as_token"], registration["hs_token"],
+                          listen_host="127.0.0.1", listen_port=as_port)
+    agent = LLMAgent(homeserver_url=homeserver.url, username=f"@llm:{DOMAIN}", password="",
+                     store_path=tempfile.mkdtemp(prefix="appservice-test-"))
+    agent.ollama_url = ollama.url
+    host.add(agent)
+    user = SimulatedUser(0, homeserver.url, DOMAIN, "test", [f"@llm:{DOMAIN}"], settle=0.5, reply_timeout=10)
+
+    try:
+        print("  🔑 Registering the agent user with the as_token...")
+        assert await host.start(), "appservice host did not start"
+        assert f"@llm:{DOMAIN}" in homeserver.users
+        assert homeserver.stats["logins"] == 0, "the agent logged in with a password"
+
+        print("  💬 Asking the agent through a pushed transaction...")
+        assert await user.setup(), "simulated user could not log in"
+        sample = await user.issue("llm", "!llm explain backups briefly")
+        assert sample.first_reply is not None, "no reply from the agent"
+
+        replies = [event for room_id, event in homeserver._log
+                   if room_id == user.room_id and event["sender"] == f"@llm:{DOMAIN}" and event["type"] == "m.room.message"]
+        assert replies, "reply was not sent as the masqueraded agent user"
+        assert homeserver.stats["transactions"] > 0 and host.transactions > 0
+
+        print("  📦 Offloading a large payload with the as_token...")
+        payload = {"output": "backups " * 4096}
+        reference = await agent.payloads.offload(payload)
+        assert PayloadOffloader.is_reference(reference), "payload was not offloaded"
+        receiver = PayloadOffloader(agent.payloads.store)  # empty cache, so it downloads
+        assert await receiver.resolve(reference) == payload
+        assert homeserver.stats["uploads"] == 1 and homeserver.stats["downloads"] == 1
+
+        print("  🔁 Replaying an already handled transaction...")
+        assert not await host.handle_transaction("0", []), "retried transaction was handled twice"
+        print(f"  ✅ Reply in {sample.first_reply * 1000:.0f}ms over {host.transactions} transactions")
+    finally:
+        await user.close()
+        await host.stop()
+        await ollama.stop()
+        await homeserver.stop()
+
+def test_appservice_round_trip():
+    asyncio.run(run_appservice_round_trip())
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    print("🚀 Testing the appservice agent host")
+    print("=" * 60)
+    asyncio.run(run_appservice_round_trip())
+    print("=" * 60)
+    print("✅ Test completed successfully!")
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,9 @@ import platform
 import datetime
 import socket
 import psutil
-try:
-    import GPUtil
-    GPU_AVAILABLE = True
-except ImportError:
-    GPU_AVAILABLE = False
-    print("⚠️ GPUtil not available - GPU monitoring disabled")
+
+# GPUtil runs nvidia-smi on every call; hardware only loads it when nvidia-smi exists
+from hardware import has_nvidia_gpu, read_gpus
 
 def format_bytes(bytes_value):
     """Format bytes to human readable format"""
@@ -67,20 +64,8 @@ async def get_server_stats():
 
         # GPU Information (if available)
         print("  🎮 Getting GPU info...")
-        gpu_info = []
-        if GPU_AVAILABLE:
-            try:
-                gpus = GPUtil.getGPUs()
-                for gpu in gpus:
-                    gpu_info.append({
-                        'name': gpu.name,
-                        'load': f"{gpu.load * 100:.1f}%",
-                        'memory': f"{gpu.memoryUsed}/{gpu.memoryTotal}MB",
-                        'temp': f"{gpu.temperature}°C"
-                    })
-            except Exception as e:
-                print(f"    ⚠️ GPU info not available: {e}")
-        else:
+        gpu_info = read_gpus()
+        if not gpu_info:
             print("    ⚠️ GPU monitoring not available")
 
         return {
@@ -263,11 +248,10 @@ async def main():
         print("  ❌ psutil - MISSING")
         return
 
-    try:
-        import GPUtil
-        print("  ✅ GPUtil - OK")
-    except ImportError:
-        print("  ⚠️ GPUtil - MISSING (GPU monitoring disabled)")
+    if has_nvidia_gpu():
+        print("  ✅ GPUtil and nvidia-smi - OK")
+    else:
+        print("  ⚠️ GPUtil or nvidia-smi - MISSING (GPU monitoring disabled)")
 
     # Get and display stats
     stats = await get_server_stats()
@@ -10,6 +10,7 @@ import logging
 import os
 import random
 import re
+import sys
 from datetime import datetime
 from typing import Optional
 
@@ -24,6 +25,10 @@ from nio import (
     InviteEvent
 )
 
+# Shared event deduplication lives with the agents
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot', 'agents'))
+from dedup import EventDeduplicator
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,7 +45,10 @@ class SimpleGrandpaBot:
 
         self.client = None
         self.start_time = datetime.now()
-        self.processed_events = set()  # Track processed events to avoid duplicates
+        # Bounded record of handled events; the timestamp cutoff survives restarts
+        self.dedup = EventDeduplicator(
+            state_path=os.path.join(os.getenv("BOT_STORE_DIR", "/tmp"), "grandpa_events.json")
+        )
 
         # Grandpa's responses
         self.greetings = [
@@ -114,18 +122,13 @@ No need to be formal - just talk to me like your friendly neighborhood grandpa!
 
     async def message_callback(self, room: MatrixRoom, event: RoomMessageText):
         """Handle unencrypted text messages"""
-        # Ignore old events from before bot started
-        if event.server_timestamp < int(self.start_time.timestamp() * 1000):
-            return
-
         # Ignore our own messages
         if event.sender == self.username:
             return
 
-        # Track processed events
-        if event.event_id in self.processed_events:
+        # Ignore old and already processed events
+        if not self.dedup.should_process(event.event_id, event.server_timestamp):
             return
-        self.processed_events.add(event.event_id)
 
         logger.info(f"📨 Received message from {event.sender}: {event.body[:50]}...")
 
@@ -137,19 +140,13 @@ No need to be formal - just talk to me like your friendly neighborhood grandpa!
         # For encrypted rooms, we'll respond to any message activity
         # This is a workaround since decryption requires more setup
 
-        # Ignore old events
-        if hasattr(event, 'server_timestamp'):
-            if event.server_timestamp < int(self.start_time.timestamp() * 1000):
-                return
-
         # Ignore our own messages
         if event.sender == self.username:
             return
 
-        # Track processed events
-        if event.event_id in self.processed_events:
+        # Ignore old and already processed events
+        if not self.dedup.should_process(event.event_id, event.server_timestamp):
             return
-        self.processed_events.add(event.event_id)
 
         logger.info(f"🔐 Received encrypted message from {event.sender}")
 
@@ -285,6 +282,7 @@ Don't be shy - I love to chat! Just type any message and I'll respond.
         except Exception as e:
             logger.error(f"Bot error: {e}")
         finally:
+            self.dedup.save()
             await self.client.close()
 
 async def main():